@@ -1,12 +1,17 @@
 import streamlit as st
 import os
-from dotenv import load_dotenv  # [NUEVO] Importar librería
-from riot_client import LoLClient
-from database import MatchDatabase
-import pandas as pd
-import plotly.graph_objects as go
-import numpy as np
 import time
+import metrics
+import circuit_breaker
+import live_updates
+import sketches
+import charts
+import snapshot
+from dotenv import load_dotenv  # [NUEVO] Importar librería
+import database
+from assets import start_asset_server
+# pandas, plotly, numpy y riotwatcher se importan bajo demanda (metrics.lazy_import)
+# dentro de la pestaña que los usa, para no pagarlos en el arranque ni en cada rerun
 
 # [NUEVO] Cargar variables de entorno al inicio
 load_dotenv()
@@ -18,6 +23,241 @@ st.set_page_config(
     layout="wide"
 )
 
+# Endpoint de métricas Prometheus (opcional, una vez por proceso)
+if os.getenv("METRICS_PORT"):
+    metrics.start_http_server(int(os.getenv("METRICS_PORT")))
+
+# Servidor local de iconos con cabeceras de caché (opcional); si no, se embeben en la página
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL")
+if os.getenv("ASSET_PORT"):
+    start_asset_server(int(os.getenv("ASSET_PORT")))
+    ASSET_BASE_URL = ASSET_BASE_URL or f"http://localhost:{os.getenv('ASSET_PORT')}"
+
+# Partidas que muestra como máximo cada búsqueda del Scout
+SCOUT_LIMIT = 20
+
+# Los LP se calculan solos al sincronizar (snapshots de rango); a mano sólo para corregir
+LP_HELP = "Vacío: se calcula al sincronizar a partir de tu rango. Rellénalo sólo para corregirlo."
+
+
+class MatchDatabase(database.MatchDatabase):
+    """MatchDatabase que anota en la sesión si alguna lectura se sirvió de los últimos datos buenos."""
+
+    def close(self):
+        if self.stale:
+            st.session_state.db_stale = True
+        super().close()
+
+
+# ============ BLOQUES DE PRESENTACIÓN ============
+# Los usan tanto la app normal como la vista de snapshot (mismos datos, distinto origen)
+
+def show_estado(last_3: list):
+    if len(last_3) > 0:
+        wins = sum(1 for m in last_3 if m['win'])
+    
+        # Lógica de STOP
+        streak_losses = 0
+        for m in last_3:
+            if not m['win']: 
+                streak_losses += 1
+            else: 
+                break
+    
+        st.markdown("#### Estado Actual:")
+        if streak_losses >= 2:
+            st.error(f"⛔ **STOP OBLIGATORIO**\n\nLlevas {streak_losses} derrotas seguidas. Cierra el juego 1 hora.")
+        elif wins == 3 and len(last_3) == 3:
+            st.success("🔥 **ON FIRE**\n\n3/3 Victorias. Sigue jugando hasta perder.")
+        else:
+            st.info(f"Racha: {' '.join(['✅' if m['win'] else '❌' for m in last_3])}")
+            st.caption("Recuerda: Bloques de 3 partidas.")
+
+
+def show_alerts(alerts: list):
+    if alerts:
+        st.markdown("#### 📉 Alertas de rendimiento")
+        for alert in alerts[:5]:
+            st.warning(alert['message'])
+
+
+def show_okrs(stats: dict, player: dict, target_cs: float, target_deaths: float):
+    # CS Metric
+    delta_cs = round(stats['cs_min_avg'] - target_cs, 1)
+    st.metric("🌾 Farm Promedio", f"{stats['cs_min_avg']}", delta=delta_cs)
+
+    # Deaths Metric
+    try:
+        avg_deaths_actual = float(stats['kda'].split('/')[1].strip())
+        delta_deaths = round(target_deaths - avg_deaths_actual, 1) 
+        st.metric("💀 Muertes Promedio", f"{avg_deaths_actual}", delta=delta_deaths, delta_color="normal")
+    except:
+        st.caption("Sin datos de KDA aún")
+
+    cs_sketch, deaths_sketch = player.get('cs_min'), player.get('deaths')
+    if cs_sketch and len(cs_sketch) >= sketches.MIN_SAMPLES:
+        st.caption(f"📊 CS/min: mediana {cs_sketch.quantile(0.5):.1f} · p75 {cs_sketch.quantile(0.75):.1f} · "
+                   f"llegas a la meta en el {100 - cs_sketch.percentile(target_cs):.0f}% de tus partidas")
+        st.caption(f"📊 Muertes: mediana {deaths_sketch.quantile(0.5):.0f} · "
+                   f"cumples el tope en el {deaths_sketch.percentile(int(target_deaths) + 0.5):.0f}% de tus partidas")
+
+
+def match_title(r: dict) -> str:
+    # Título del Expander
+    color_emoji = "✅" if r['win'] else "❌"
+    kda_display = f"{r['kills']}/{r['deaths']}/{r['assists']}"
+    return f"{color_emoji} {r['champion']} vs {r['enemy_champion']} | {kda_display} | {r['date'].strftime('%d-%m %H:%M')}"
+
+
+def show_match(r: dict, badges_str: str, pct_caption, editable: bool):
+    if badges_str:
+        st.caption(f"🏅 Logros: :blue-background[{badges_str}]")
+    if pct_caption:
+        st.caption(pct_caption)
+
+    colA, colB, colC = st.columns([2, 2, 1])
+
+    with colA:
+        st.markdown(f"**CS/min:** {r['cs_min']}")
+        st.markdown(f"**Wards:** {r['control_wards']}")
+        if r['lp_change']:
+            lp_color = "green" if r['lp_change'] > 0 else "red"
+            st.markdown(f"**LP:** :{lp_color}[{r['lp_change']}]")
+
+    with colB:
+        st.markdown(f"**Tilt:** {r['tilt_level']}/5")
+        st.markdown(f"**Impacto:** {r['impact_rating']}")
+        if r['vod_review']: st.markdown("✅ **VOD**")
+
+    with colC:
+        # EL BOTÓN DE EDITAR
+        if editable and st.button("✏️ Editar", key=f"btn_edit_{r['game_id']}"):
+            st.session_state.editing_match_id = r['game_id']
+            st.rerun()
+
+    if r['notes']:
+        st.info(f"📝 {r['notes']}")
+    else:
+        st.caption("Sin notas tácticas.")
+
+
+def show_nemesis(nemesis_list: list):
+    st.markdown("### ⚠️ Tus Pesadillas (Nemesis)")
+    st.caption("Rivales contra los que estadísticamente sufres más.")
+
+    cols = st.columns(min(len(nemesis_list), 5))
+
+    for idx, col in enumerate(cols):
+        if idx < len(nemesis_list):
+            n = nemesis_list[idx]
+        
+            wr = int(n['winrate'])
+            wr_color = "red" if wr < 40 else "orange"
+        
+            with col:
+                with st.container(border=True):
+                    st.markdown(f"**{n['enemy_champion']}**")
+                    st.markdown(f"📉 WR: :{wr_color}[{wr}%]")
+                    st.caption(f"Partidas: {n['games']} ({n['wins']}W)")
+                    st.markdown(f"💀 Deaths: **{round(n['avg_deaths'], 1)}**")
+
+
+def show_champion_pool(stats: list, current_patch):
+    st.dataframe(
+        charts.champion_pool_frame(stats, current_patch, ASSET_BASE_URL),
+        column_config={
+            "Icono": st.column_config.ImageColumn("Champ"),
+            "winrate": st.column_config.ProgressColumn("Winrate", format="%.1f%%", min_value=0, max_value=100),
+            "kda_ratio": st.column_config.NumberColumn("KDA", format="%.2f"),
+            "avg_cs_min": st.column_config.NumberColumn("CS/min", format="%.1f 🌾"),
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=500
+    )
+
+
+# ============ VISTA DE SNAPSHOT (SÓLO LECTURA) ============
+# Para quien sólo mira (coach, compañeros): todo sale del snapshot precalculado
+# por scripts/build_snapshot.py, sin consultas a Postgres ni figuras que construir.
+# Se activa con DASHBOARD_MODE=snapshot o abriendo la app con ?view=snapshot
+
+def render_snapshot_view():
+    snap = snapshot.load_snapshot()
+    st.sidebar.title("⚙️ El Cuartel General")
+    st.title("🛡️ LoL Tryhard Tracker")
+    if snap is None:
+        st.error("⛔ No hay snapshot del dashboard.")
+        st.info("Genéralo con: python scripts/build_snapshot.py (o sync_accounts.py --snapshot)")
+        return
+    st.caption(f"👁️ Vista de sólo lectura · datos del {snap['generated_at'].strftime('%d-%m %H:%M')} "
+               f"(revisión {snap['revision']})")
+
+    with st.sidebar:
+        show_estado(snap['recent_matches'][:3])
+        show_alerts(snap['alerts'])
+        st.markdown("---")
+        st.subheader("🎯 Objetivos (Sprint)")
+        target_cs = st.number_input("Meta CS/min", value=7.5, step=0.1)
+        target_deaths = st.number_input("Tope Muertes/game", value=4.0, step=0.5)
+        if snap['stats']:
+            show_okrs(snap['stats'], snapshot.player_sketches(snap), target_cs, target_deaths)
+
+    def diario():
+        st.subheader("📈 Tendencia de LP")
+        trend_choice = st.radio("Ventana", list(snap['trends']), horizontal=True, key="trend_window", label_visibility="collapsed")
+        trend = snap['trends'][trend_choice]
+        if trend:
+            st.plotly_chart(trend['figure'], use_container_width=True)
+            st.caption(trend['caption'])
+        else:
+            st.info("Juega al menos 2 partidas para ver tu gráfica.")
+        if snap.get('rank'):
+            st.caption(charts.rank_caption(snap['rank']))
+
+        st.subheader("🕰️ Tu Horario Biológico (Winrate)")
+        if snap['heatmap']:
+            st.plotly_chart(snap['heatmap'], use_container_width=True)
+            st.caption("💡 **Interpretación:** Evita jugar en las horas rojas. Busca tus bloques verdes.")
+        else:
+            st.info("Juega más partidas para generar tu heatmap de rendimiento.")
+
+        st.divider()
+        st.subheader("📜 Historial de Partidas")
+        for r in snap['recent_matches']:
+            with st.expander(match_title(r)):
+                show_match(r, r['badges'], r['percentile_caption'], editable=False)
+
+    def scout():
+        st.subheader("🔎 Scout de Matchups")
+        if snap['nemesis']:
+            show_nemesis(snap['nemesis'])
+        else:
+            st.info("Aún no hay rivales con partidas suficientes.")
+
+    def pool():
+        st.subheader("🏆 Rendimiento de Champion Pool")
+        if snap['champion_pool']:
+            show_champion_pool(snap['champion_pool'], snap['latest_patch'])
+        else:
+            st.info("Aún no hay estadísticas suficientes.")
+
+    views = {"📊 Diario": diario, "🔎 Scout": scout, "🏆 Champion Pool": pool}
+    active_view = st.radio("Sección", list(views), horizontal=True, label_visibility="collapsed", key="active_tab")
+    with metrics.section(f"snapshot.{active_view.split(' ', 1)[1]}"):
+        views[active_view]()
+
+
+if os.getenv("DASHBOARD_MODE") == "snapshot" or st.query_params.get("view") == "snapshot":
+    render_snapshot_view()
+    metrics.mark_first_render()
+    st.stop()
+
+
+# Partidas nuevas/editadas en vivo (LISTEN/NOTIFY); el historial se refresca cada LIVE_REFRESH
+LIVE_LISTENER = live_updates.get_listener()
+LIVE_REFRESH = float(os.getenv("LIVE_REFRESH_SECONDS", "2"))
+
 # [NUEVO] Obtener API KEY segura
 API_KEY = os.getenv("RIOT_API_KEY")
 
@@ -39,6 +279,10 @@ if 'last_match_id' not in st.session_state:
     st.session_state.last_match_id = None
 if 'editing_match_id' not in st.session_state: 
     st.session_state.editing_match_id = None
+# Partidas llegadas en vivo desde el último rerun completo (estadísticas por actualizar)
+st.session_state.live_new_games = 0
+# Alguna lectura de este rerun vino de la caché de últimos datos buenos (ver MatchDatabase.close)
+st.session_state.db_stale = False
 if 'config_saved' not in st.session_state: 
     # [MEJORA] Si ya hay datos en el .env, asumimos que está configurado
     st.session_state.config_saved = bool(st.session_state.riot_id)
@@ -77,474 +321,453 @@ with st.sidebar:
     main_champs = [c.strip().lower() for c in main_champs_str.split(',')]
 
     # Verificación de Estado Mental (Regla de 3 Bloques)
-    try:
-        db = MatchDatabase()
-        last_3 = db.get_recent_matches(3)
-        db.close()
+    with metrics.section('sidebar.estado'):
+        try:
+            with MatchDatabase() as db:
+                last_3 = db.get_recent_matches(3)
         
-        if len(last_3) > 0:
-            wins = sum(1 for m in last_3 if m['win'])
-            losses = len(last_3) - wins
-            
-            # Lógica de STOP
-            streak_losses = 0
-            for m in last_3:
-                if not m['win']: 
-                    streak_losses += 1
-                else: 
-                    break
-            
-            st.markdown("#### Estado Actual:")
-            if streak_losses >= 2:
-                st.error(f"⛔ **STOP OBLIGATORIO**\n\nLlevas {streak_losses} derrotas seguidas. Cierra el juego 1 hora.")
-            elif wins == 3 and len(last_3) == 3:
-                st.success("🔥 **ON FIRE**\n\n3/3 Victorias. Sigue jugando hasta perder.")
-            else:
-                st.info(f"Racha: {' '.join(['✅' if m['win'] else '❌' for m in last_3])}")
-                st.caption("Recuerda: Bloques de 3 partidas.")
-    except Exception as e:
-        st.caption(f"No hay datos suficientes para mostrar estado.")
+            show_estado(last_3)
+        except Exception as e:
+            st.caption(f"No hay datos suficientes para mostrar estado.")
+
+    # Alertas de rendimiento por campeón (EWMA/CUSUM, calculadas al guardar cada partida)
+    with metrics.section('sidebar.alertas'):
+        try:
+            with MatchDatabase() as db:
+                alerts = db.get_performance_alerts()
+
+            show_alerts(alerts)
+        except Exception:
+            pass
 
     st.markdown("---")
 
     # 3. OKRs (Objetivos Escalables)
     st.subheader("🎯 Objetivos (Sprint)")
     
+    # Filtro de parche (las consultas sólo leen las particiones de ese parche)
+    with metrics.section('sidebar.parches'):
+        try:
+            with MatchDatabase() as db:
+                patches = db.get_patches()
+        except Exception:
+            patches = []
+    patch_choice = st.selectbox("🩹 Parche", ["Todos"] + patches, key="patch_filter")
+    selected_patch = None if patch_choice == "Todos" else patch_choice
+
     # Inputs configurables para OKRs
     target_cs = st.number_input("Meta CS/min", value=7.5, step=0.1)
     target_deaths = st.number_input("Tope Muertes/game", value=4.0, step=0.5)
     
-    try:
-        db = MatchDatabase()
-        stats = db.get_stats_summary() 
-        db.close()
-        
-        # CS Metric
-        delta_cs = round(stats['cs_min_avg'] - target_cs, 1)
-        st.metric("🌾 Farm Promedio", f"{stats['cs_min_avg']}", delta=delta_cs)
-        
-        # Deaths Metric
+    with metrics.section('sidebar.okrs'):
         try:
-            avg_deaths_actual = float(stats['kda']  ('/')[1].strip())
-            delta_deaths = round(target_deaths - avg_deaths_actual, 1) 
-            st.metric("💀 Muertes Promedio", f"{avg_deaths_actual}", delta=delta_deaths, delta_color="normal")
-        except:
-            st.caption("Sin datos de KDA aún")
+            with MatchDatabase() as db:
+                stats = db.get_stats_summary(patch=selected_patch)
+
+            # Distribución completa (sketches de cuantiles), no sólo la media de siempre
+            with MatchDatabase() as db:
+                player = db.get_sketches((('player', ''),)).get(('player', ''), {})
+            show_okrs(stats, player, target_cs, target_deaths)
 
-    except Exception as e:
-        st.write("Juega partidas para ver métricas.")
+        except Exception as e:
+            st.write("Juega partidas para ver métricas.")
 
 # ============ MAIN APP ============
 st.title("🛡️ LoL Tryhard Tracker")
 
+# Con la BD caída, MatchDatabase sirve los últimos datos conocidos sin esperar timeouts
+db_breaker = circuit_breaker.get_breaker('postgres')
+db_banner = st.empty()
+if db_breaker.is_open:
+    db_banner.warning(f"⚠️ La base de datos no responde: se muestran los últimos datos cargados y los cambios "
+               f"no se guardarán. Próximo intento en {db_breaker.retry_in():.0f}s.")
+
 if not st.session_state.config_saved:
     st.warning("⚠️ Confirma tu Riot ID en la barra lateral para empezar.")
     st.stop()
 
-# Pestañas de navegación
-tab1, tab2, tab3 = st.tabs(["📊 Diario & Sincronización", "🔎 Scout & Matchups", "🏆 Champion Pool"])
+
+def account_puuid():
+    """
+    PUUID del Riot ID configurado (para el rango de esta cuenta y no de la última sincronizada).
+
+    Se resuelve con la API una vez por sesión y por Riot ID; la sincronización lo
+    guarda directamente desde get_rank_snapshot.
+    """
+    state = st.session_state
+    if state.get('puuid_riot_id') != state.riot_id:
+        try:
+            from riot_client import LoLClient
+            client = LoLClient(API_KEY, state.region, base_url=os.getenv("RIOT_API_BASE_URL"))
+            state.puuid = client.get_summoner_info(state.riot_id)['puuid']
+        except Exception:
+            return None  # Sin Riot disponible no se muestra el rango; se reintenta en el próximo rerun
+        state.puuid_riot_id = state.riot_id
+    return state.puuid
+
 
 # --- TAB 1: DIARIO (Sincronización y Análisis Post-Game) ---
-with tab1:
+def render_diario():
     # === GRÁFICO DE PROGRESO (LP) ===
     st.subheader("📈 Tendencia de LP")
-    try:
-        db = MatchDatabase()
-        history_matches = db.get_recent_matches(20)
-        db.close()
+    trend_choice = st.radio("Ventana", list(charts.TREND_WINDOWS), horizontal=True, key="trend_window", label_visibility="collapsed")
+    with metrics.section('diario.lp'):
+        try:
+            puuid = account_puuid()
+            with MatchDatabase() as db:
+                # Serie ya ordenada y acumulada en la BD (funciones de ventana)
+                trend = db.get_trend(rolling=5, patch=selected_patch, **charts.TREND_WINDOWS[trend_choice])
+                rank = db.get_current_rank(puuid) if puuid else None
 
-        if len(history_matches) > 1:
-            # Invertir para ir del pasado al futuro
-            history_matches = history_matches[::-1]
-            
-            dates = []
-            lp_changes = []
-            current_lp = 0
-            
-            for m in history_matches:
-                change = m['lp_change'] if m['lp_change'] is not None else 0
-                current_lp += change
-                
-                short_date = m['date'].strftime('%m-%d')
-                dates.append(f"{short_date} ({m['champion']})")
-                lp_changes.append(current_lp)
+            if len(trend) > 1:
+                st.plotly_chart(charts.lp_trend_figure(trend, trend_choice), use_container_width=True)
+                st.caption(charts.trend_caption(trend))
             
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=dates, 
-                y=lp_changes,
-                mode='lines+markers',
-                name='LP',
-                line=dict(color='#00cc96', width=3),
-                marker=dict(size=8)
-            ))
-            
-            fig.update_layout(
-                title="Evolución de LP Acumulado (Últimas 20)",
-                xaxis_title="Partida",
-                yaxis_title="LP Ganado/Perdido (Neto)",
-                height=300,
-                margin=dict(l=20, r=20, t=40, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)'
-            )
-            
-            fig.add_hline(y=0, line_dash="dash", line_color="gray")
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-        else:
-            st.info("Juega y registra LP en al menos 2 partidas para ver tu gráfica.")
+            else:
+                st.info("Juega al menos 2 partidas para ver tu gráfica.")
+            if rank:
+                st.caption(charts.rank_caption(rank))
             
-    except Exception as e:
-        st.error(f"No se pudo cargar el gráfico: {e}")
+        except Exception as e:
+            st.error(f"No se pudo cargar el gráfico: {e}")
 
     # === SECCIÓN NUEVA: HEATMAP DE HORARIOS ===
     st.subheader("🕰️ Tu Horario Biológico (Winrate)")
     
-    try:
-        db = MatchDatabase()
-        heat_data = db.get_activity_heatmap_data()
-        db.close()
+    with metrics.section('diario.heatmap'):
+        try:
+            with MatchDatabase() as db:
+                heat_data = db.get_activity_heatmap_data(patch=selected_patch)
 
-        if heat_data:
-            days = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
-            hours = [str(i) for i in range(24)]
-            
-            # Iniciamos con NaN para que lo vacío no se pinte de rojo
-            z_data = np.full((7, 24), np.nan)
-            text_data = [["" for _ in range(24)] for _ in range(7)]
-
-            for d in heat_data:
-                d_idx = int(d['weekday']) 
-                h_idx = int(d['hour'])
-                games = d['games']
-                wins = d['wins']
-                wr = int((wins/games)*100) if games > 0 else 0
-                
-                # El color (z) ahora es el Winrate
-                z_data[d_idx][h_idx] = wr
-                
-                # El texto sigue mostrando detalles
-                text_data[d_idx][h_idx] = f"WR: {wr}%<br>{games} Games<br>({wins}W - {games-wins}L)"
-
-            fig_heat = go.Figure(data=go.Heatmap(
-                z=z_data,
-                x=hours,
-                y=days,
-                hoverongaps=False,
-                colorscale='RdYlGn',  # Escala Rojo-Amarillo-Verde
-                zmin=0,               # 0% es el rojo más fuerte
-                zmax=100,             # 100% es el verde más fuerte
-                text=text_data,
-                hoverinfo='text'      # Solo mostrar nuestro texto personalizado
-            ))
-
-            fig_heat.update_layout(
-                title="Rendimiento por Horario (Rojo=Lose / Verde=Win)",
-                xaxis_title="Hora del día",
-                height=350,
-                margin=dict(l=20, r=20, t=40, b=20),
-                xaxis=dict(dtick=2),
-                plot_bgcolor='rgba(0,0,0,0)' # Fondo transparente para lo vacío
-            )
-            
-            st.plotly_chart(fig_heat, use_container_width=True)
-            st.caption("💡 **Interpretación:** Evita jugar en las horas rojas. Busca tus bloques verdes.")
-        else:
-            st.info("Juega más partidas para generar tu heatmap de rendimiento.")
+            if heat_data:
+                st.plotly_chart(charts.heatmap_figure(heat_data), use_container_width=True)
+                st.caption("💡 **Interpretación:** Evita jugar en las horas rojas. Busca tus bloques verdes.")
+            else:
+                st.info("Juega más partidas para generar tu heatmap de rendimiento.")
             
-    except Exception as e:
-        st.error(f"Error en Heatmap: {e}")
+        except Exception as e:
+            st.error(f"Error en Heatmap: {e}")
     
     st.divider()
-    col_sync, col_status = st.columns([1, 3])
-    with col_sync:
-        if st.button("🔄 Sincronizar Rankeds", type="primary", use_container_width=True):
-            with st.spinner("Conectando con Riot..."):
-                try:
-                    # [MODIFICADO] Usamos la variable global API_KEY cargada desde .env
-                    client = LoLClient(API_KEY, st.session_state.region)
-                    db = MatchDatabase()
-                    matches = client.get_recent_matches(st.session_state.riot_id, limit=5, queue=420)
+    with metrics.section('diario.sync'):
+        col_sync, col_status = st.columns([1, 3])
+        with col_sync:
+            if st.button("🔄 Sincronizar Rankeds", type="primary", use_container_width=True):
+                with st.spinner("Conectando con Riot..."):
+                    try:
+                        # [MODIFICADO] Usamos la variable global API_KEY cargada desde .env
+                        from riot_client import LoLClient
+                        client = LoLClient(API_KEY, st.session_state.region, base_url=os.getenv("RIOT_API_BASE_URL"))
+                        with MatchDatabase() as db:
+                            # Rango (league-v4) antes que las partidas: de la diferencia con el
+                            # anterior salen los LP de cada partida, sin apuntarlos a mano
+                            try:
+                                rank = client.get_rank_snapshot(st.session_state.riot_id, queue=420)
+                                if rank:
+                                    st.session_state.puuid = rank['puuid']
+                                    st.session_state.puuid_riot_id = st.session_state.riot_id
+                            except Exception as e:
+                                rank = None
+                                st.caption(f"No se pudo leer el rango: {e}")
+                            # Todas las partidas desde el último rango (hasta 20): si falta alguna, la ventana no cuadra
+                            start_time = db.get_lp_sync_start(rank['puuid'], rank['queue']) if rank else None
+                            matches = client.get_recent_matches(st.session_state.riot_id, limit=20 if start_time else 5,
+                                                                queue=420, start_time=start_time)
                     
-                    new_count = 0
-                    for m in matches:
-                        if db.save_match(m): 
-                            new_count += 1
+                            new_count = db.save_matches(matches)
+                            lp_count = db.save_rank_snapshot(rank['puuid'], rank, rank['taken_at']) if rank else 0
                     
-                    if matches:
-                        st.session_state.last_match_data = matches[0]
-                        st.session_state.last_match_id = matches[0]['game_id']
+                            if matches:
+                                st.session_state.last_match_data = matches[0]
+                                st.session_state.last_match_id = matches[0]['game_id']
                     
-                    if new_count > 0:
-                        st.success(f"✨ {new_count} partidas nuevas.")
-                        time.sleep(1)
-                        st.rerun()
-                    else:
-                        st.info("Todo actualizado.")
-                    db.close()
-                except Exception as e:
-                    st.error(f"Error al sincronizar: {str(e)}")
+                            if new_count > 0 or lp_count > 0:
+                                st.success(f"✨ {new_count} partidas nuevas" + (f", LP de {lp_count} calculados." if lp_count else "."))
+                                time.sleep(1)
+                                st.rerun()
+                            else:
+                                st.info("Todo actualizado.")
+                    except Exception as e:
+                        st.error(f"Error al sincronizar: {str(e)}")
 
     # FORMULARIO DE ANÁLISIS (La parte subjetiva)
-    if st.session_state.last_match_data:
-        m = st.session_state.last_match_data
+    with metrics.section('diario.analisis'):
+        if st.session_state.last_match_data:
+            m = st.session_state.last_match_data
         
-        # Validar Constitución (Champion Pool)
-        is_otp = m['champion_name'].lower() in main_champs
+            # Validar Constitución (Champion Pool)
+            is_otp = m['champion_name'].lower() in main_champs
         
-        st.divider()
-        st.subheader(f"🔍 Análisis: {m['champion_name']} vs {m['enemy_champion']}")
+            st.divider()
+            st.subheader(f"🔍 Análisis: {m['champion_name']} vs {m['enemy_champion']}")
         
-        if not is_otp:
-            st.error(f"⚠️ **ALERTA DE CONSTITUCIÓN**: Has jugado {m['champion_name']}, que NO está en tu lista de Mains ({', '.join(main_champs)}). ¡No improvises en Ranked!")
+            if not is_otp:
+                st.error(f"⚠️ **ALERTA DE CONSTITUCIÓN**: Has jugado {m['champion_name']}, que NO está en tu lista de Mains ({', '.join(main_champs)}). ¡No improvises en Ranked!")
 
-        # Formulario
-        db = MatchDatabase()
-        saved = db.get_match_by_id(st.session_state.last_match_id) or {}
-        db.close()
+            # Formulario
+            with MatchDatabase() as db:
+                saved = db.get_match_by_id(st.session_state.last_match_id) or {}
         
-        with st.form("post_game_analysis"):
-            c1, c2, c3 = st.columns(3)
-            with c1:
-                lp = st.number_input("LP Ganados/Perdidos", value=saved.get('lp_change', 0))
-            with c2:
-                tilt = st.slider("Nivel de Tilt (1=Zen, 5=Rage)", 1, 5, saved.get('tilt_level', 1))
-            with c3:
-                impact_options = ["Carree (1v9)", "Hice mi trabajo", "Fui Carreado", "Invisible", "Inteé (Perdí la lane)"]
-                impact_index = 0
-                if saved.get('impact_rating') and saved['impact_rating'] in impact_options:
-                    impact_index = impact_options.index(saved['impact_rating'])
-                impact = st.selectbox("Tu Impacto", impact_options, index=impact_index)
+            with st.form("post_game_analysis"):
+                c1, c2, c3 = st.columns(3)
+                with c1:
+                    lp = st.number_input("LP Ganados/Perdidos", value=saved.get('lp_change'), step=1,
+                                         placeholder="Automático", help=LP_HELP)
+                with c2:
+                    tilt = st.slider("Nivel de Tilt (1=Zen, 5=Rage)", 1, 5, saved.get('tilt_level', 1))
+                with c3:
+                    impact_options = ["Carree (1v9)", "Hice mi trabajo", "Fui Carreado", "Invisible", "Inteé (Perdí la lane)"]
+                    impact_index = 0
+                    if saved.get('impact_rating') and saved['impact_rating'] in impact_options:
+                        impact_index = impact_options.index(saved['impact_rating'])
+                    impact = st.selectbox("Tu Impacto", impact_options, index=impact_index)
             
-            notes = st.text_area("🧠 Notas de Matchup (Estrategia para la próxima)", 
-                               placeholder="Ej: Nivel 1 fuerte, cuidado con su E. Comprar Cortacuras temprano.",
-                               value=saved.get('notes', ""))
+                notes = st.text_area("🧠 Notas de Matchup (Estrategia para la próxima)", 
+                                   placeholder="Ej: Nivel 1 fuerte, cuidado con su E. Comprar Cortacuras temprano.",
+                                   value=saved.get('notes', ""))
             
-            vod = st.checkbox("📺 VOD Review Realizada", value=bool(saved.get('vod_review', 0)))
+                vod = st.checkbox("📺 VOD Review Realizada", value=bool(saved.get('vod_review', 0)))
             
-            # Lógica de cierre automático
-            if st.form_submit_button("💾 Guardar Análisis"):
-                db = MatchDatabase()
-                db.update_match_details(st.session_state.last_match_id, lp, tilt, impact, notes, vod)
-                db.close()
+                # Lógica de cierre automático
+                if st.form_submit_button("💾 Guardar Análisis"):
+                    with MatchDatabase() as db:
+                        db.update_match_details(st.session_state.last_match_id, lp, tilt, impact, notes, vod)
                 
-                st.success("✅ Datos guardados. Cerrando formulario...")
+                    st.success("✅ Datos guardados. Cerrando formulario...")
                 
-                # 1. Esperamos un poquito para que te dé tiempo a leer el mensaje verde
-                time.sleep(1.5)
+                    # 1. Esperamos un poquito para que te dé tiempo a leer el mensaje verde
+                    time.sleep(1.5)
                 
-                # 2. Borramos los datos de la "última partida" de la memoria temporal
-                st.session_state.last_match_data = None
-                st.session_state.last_match_id = None
+                    # 2. Borramos los datos de la "última partida" de la memoria temporal
+                    st.session_state.last_match_data = None
+                    st.session_state.last_match_id = None
                 
-                # 3. Forzamos la recarga de la página (ahora se verá limpia)
-                st.rerun()
+                    # 3. Forzamos la recarga de la página (ahora se verá limpia)
+                    st.rerun()
 
-    # HISTORIAL RECIENTE CON EDICIÓN
     st.divider()
-    st.subheader("📜 Historial de Partidas")
-    db = MatchDatabase()
-    recents = db.get_recent_matches(10)
-    db.close()
+    render_historial()
+
+
+def load_recent_matches(limit: int) -> list:
+    """
+    Últimas partidas, al día con los avisos de live_updates.
+
+    La lista se lee de la BD una vez por sesión; después sólo se aplican los
+    cambios que publica el listener (partidas nuevas o editadas desde cualquier
+    proceso), sin volver a consultar.
+    """
+    state = st.session_state
+    if LIVE_LISTENER is None:
+        with MatchDatabase() as db:
+            recents = db.get_recent_matches(limit)
+        return recents
+
+    seq, events, complete = LIVE_LISTENER.changes_since(state.get('live_seq', 0))
+    if 'live_recents' not in state or not complete:
+        with MatchDatabase() as db:
+            state.live_recents = db.get_recent_matches(limit)
+        state.live_seq = seq  # Tomado antes de la consulta: nada se pierde (como mucho se aplica dos veces)
+        return state.live_recents
+
+    if events:
+        by_id = {r['game_id']: r for r in state.live_recents}
+        for event in events:
+            by_id[event['row']['game_id']] = event['row']
+        state.live_recents = sorted(by_id.values(), key=lambda r: r['date'], reverse=True)[:limit]
+
+        new_games = [e['row'] for e in events if e['op'] == 'insert']
+        for row in new_games:
+            st.toast(f"{'✅' if row['win'] else '❌'} Nueva partida: {row['champion']} vs {row['enemy_champion']}", icon="🆕")
+        state.live_new_games += len(new_games)
+    state.live_seq = seq
+    return state.live_recents
+
+
+def load_match_sketches(recents: list) -> dict:
+    """
+    Sketches de cuantiles del jugador y de los campeones del historial.
+
+    Sólo cambian al insertar partidas, así que se guardan en la sesión hasta que
+    cambia la lista (el fragmento del historial se refresca cada pocos segundos).
+    """
+    keys = (('player', ''),) + tuple(sorted({('champion', r['champion']) for r in recents}))
+    cache_key = (keys, recents[0]['game_id'] if recents else None)
+    cached = st.session_state.get('match_sketches')
+    if cached is None or cached[0] != cache_key:
+        with MatchDatabase() as db:
+            cached = (cache_key, db.get_sketches(keys))
+        st.session_state.match_sketches = cached
+    return cached[1]
+
+
+# HISTORIAL RECIENTE CON EDICIÓN (se refresca solo con las partidas que llegan por LISTEN/NOTIFY)
+@st.fragment(run_every=LIVE_REFRESH if LIVE_LISTENER else None)
+def render_historial():
+    with metrics.section('diario.historial'):
+        st.subheader("📜 Historial de Partidas")
+        recents = load_recent_matches(10)
+
+        if st.session_state.live_new_games:
+            n_new = st.session_state.live_new_games
+            if st.button(f"🆕 {n_new} partida{'s' if n_new > 1 else ''} nueva{'s' if n_new > 1 else ''}: actualizar estadísticas"):
+                st.session_state.live_new_games = 0
+                st.rerun()
     
-    # Función auxiliar para Badges (La mantenemos igual)
-    def get_badges(match):
-        badges = []
-        duration = match.get('game_duration_minutes', 30.0) or 30.0
-        cs_min = match.get('cs_min', 0)
-        deaths = match.get('deaths', 0)
-        
-        if cs_min >= 7.5: badges.append("🌾 CS God")
-        elif cs_min < 5.0 and duration > 15: badges.append("⚠️ Farm Pobre")
-        
-        if deaths <= 2: badges.append("🧱 Muralla")
-        elif deaths >= 7: badges.append("🤡 Feeder")
-            
-        if match.get('control_wards', 0) >= 3: badges.append("👁️ Visionary")
-        
-        kills = match.get('kills', 0)
-        assists = match.get('assists', 0)
-        safe_deaths = deaths if deaths > 0 else 1
-        if (kills + assists) / safe_deaths > 4.0: badges.append("🔥 Carry")
-            
-        return " | ".join(badges)
+        match_sketches = load_match_sketches(recents)
 
-    for r in recents:
-        # Título del Expander
-        color_emoji = "✅" if r['win'] else "❌"
-        kda_display = f"{r['kills']}/{r['deaths']}/{r['assists']}"
-        expander_title = f"{color_emoji} {r['champion']} vs {r['enemy_champion']} | {kda_display} | {r['date'].strftime('%d-%m %H:%M')}"
-        
-        with st.expander(expander_title):
+        for r in recents:
+            with st.expander(match_title(r)):
             
-            # === MODO EDICIÓN (Si le diste al botón editar de esta partida) ===
-            if st.session_state.editing_match_id == r['game_id']:
-                st.info(f"✍️ Editando partida: {r['champion']} vs {r['enemy_champion']}")
+                # === MODO EDICIÓN (Si le diste al botón editar de esta partida) ===
+                if st.session_state.editing_match_id == r['game_id']:
+                    st.info(f"✍️ Editando partida: {r['champion']} vs {r['enemy_champion']}")
                 
-                with st.form(key=f"edit_form_{r['game_id']}"):
-                    c1, c2, c3 = st.columns(3)
-                    with c1:
-                        new_lp = st.number_input("LP Change", value=r['lp_change'] if r['lp_change'] is not None else 0)
-                    with c2:
-                        new_tilt = st.slider("Tilt", 1, 5, r['tilt_level'] if r['tilt_level'] else 1)
-                    with c3:
-                        impact_opts = ["Carree (1v9)", "Hice mi trabajo", "Fui Carreado", "Invisible", "Inteé (Perdí la lane)"]
-                        curr_impact = r['impact_rating'] if r['impact_rating'] in impact_opts else "Hice mi trabajo"
-                        new_impact = st.selectbox("Impacto", impact_opts, index=impact_opts.index(curr_impact))
+                    with st.form(key=f"edit_form_{r['game_id']}"):
+                        c1, c2, c3 = st.columns(3)
+                        with c1:
+                            new_lp = st.number_input("LP Change", value=r['lp_change'], step=1,
+                                                     placeholder="Automático", help=LP_HELP)
+                        with c2:
+                            new_tilt = st.slider("Tilt", 1, 5, r['tilt_level'] if r['tilt_level'] else 1)
+                        with c3:
+                            impact_opts = ["Carree (1v9)", "Hice mi trabajo", "Fui Carreado", "Invisible", "Inteé (Perdí la lane)"]
+                            curr_impact = r['impact_rating'] if r['impact_rating'] in impact_opts else "Hice mi trabajo"
+                            new_impact = st.selectbox("Impacto", impact_opts, index=impact_opts.index(curr_impact))
                     
-                    new_notes = st.text_area("Notas", value=r['notes'] if r['notes'] else "")
-                    new_vod = st.checkbox("VOD Review", value=bool(r['vod_review']))
+                        new_notes = st.text_area("Notas", value=r['notes'] if r['notes'] else "")
+                        new_vod = st.checkbox("VOD Review", value=bool(r['vod_review']))
                     
-                    col_save, col_cancel = st.columns([1, 1])
-                    with col_save:
-                        if st.form_submit_button("💾 Guardar Cambios", type="primary"):
-                            db = MatchDatabase()
-                            db.update_match_details(r['game_id'], new_lp, new_tilt, new_impact, new_notes, new_vod)
-                            db.close()
-                            st.success("Guardado!")
-                            time.sleep(0.5)
-                            # Cerrar modo edición
-                            st.session_state.editing_match_id = None
-                            st.rerun()
+                        col_save, col_cancel = st.columns([1, 1])
+                        with col_save:
+                            if st.form_submit_button("💾 Guardar Cambios", type="primary"):
+                                with MatchDatabase() as db:
+                                    db.update_match_details(r['game_id'], new_lp, new_tilt, new_impact, new_notes, new_vod)
+                                st.success("Guardado!")
+                                time.sleep(0.5)
+                                # Cerrar modo edición
+                                st.session_state.editing_match_id = None
+                                st.rerun()
                             
-                    with col_cancel:
-                        # Truco: Un form_submit_button secundario actúa como cancelar si no hacemos nada
-                        if st.form_submit_button("❌ Cancelar"):
-                            st.session_state.editing_match_id = None
-                            st.rerun()
+                        with col_cancel:
+                            # Truco: Un form_submit_button secundario actúa como cancelar si no hacemos nada
+                            if st.form_submit_button("❌ Cancelar"):
+                                st.session_state.editing_match_id = None
+                                st.rerun()
 
-            # === MODO VISUALIZACIÓN (Lo normal) ===
-            else:
-                badges_str = get_badges(r)
-                if badges_str:
-                    st.caption(f"🏅 Logros: :blue-background[{badges_str}]")
-                
-                colA, colB, colC = st.columns([2, 2, 1])
-                
-                with colA:
-                    st.markdown(f"**CS/min:** {r['cs_min']}")
-                    st.markdown(f"**Wards:** {r['control_wards']}")
-                    if r['lp_change']:
-                        lp_color = "green" if r['lp_change'] > 0 else "red"
-                        st.markdown(f"**LP:** :{lp_color}[{r['lp_change']}]")
-                
-                with colB:
-                    st.markdown(f"**Tilt:** {r['tilt_level']}/5")
-                    st.markdown(f"**Impacto:** {r['impact_rating']}")
-                    if r['vod_review']: st.markdown("✅ **VOD**")
-
-                with colC:
-                    # EL BOTÓN DE EDITAR
-                    if st.button("✏️ Editar", key=f"btn_edit_{r['game_id']}"):
-                        st.session_state.editing_match_id = r['game_id']
-                        st.rerun()
-
-                if r['notes']:
-                    st.info(f"📝 {r['notes']}")
+                # === MODO VISUALIZACIÓN (Lo normal) ===
                 else:
-                    st.caption("Sin notas tácticas.")
+                    pct, pct_label = charts.match_percentiles(r, match_sketches)
+                    show_match(r, charts.match_badges(r, pct), charts.percentile_caption(pct, pct_label), editable=True)
 
 # --- TAB 2: SCOUT (La Guía de Estrategia) ---
-with tab2:
+def render_scout():
     st.subheader("🔎 Scout de Matchups")
+
+    # Índice de enfrentamientos en memoria: se construye una vez por proceso y
+    # cada tecla en los buscadores se responde sin ir a la base de datos
+    with MatchDatabase() as db:
+        index = db.get_matchup_index()
     
     # 1. SECCIÓN NUEVA: DETECTOR DE NEMESIS
-    try:
-        db = MatchDatabase()
-        nemesis_list = db.get_nemesis_list(min_games=2)
-        db.close()
+    with metrics.section('scout.nemesis'):
+        try:
+            nemesis_list = index.nemesis(min_games=2)
         
-        if nemesis_list:
-            st.markdown("### ⚠️ Tus Pesadillas (Nemesis)")
-            st.caption("Rivales contra los que estadísticamente sufres más.")
-            
-            cols = st.columns(min(len(nemesis_list), 5))
-            
-            for idx, col in enumerate(cols):
-                if idx < len(nemesis_list):
-                    n = nemesis_list[idx]
-                    
-                    wr = int(n['winrate'])
-                    wr_color = "red" if wr < 40 else "orange"
-                    
-                    with col:
-                        with st.container(border=True):
-                            st.markdown(f"**{n['enemy_champion']}**")
-                            st.markdown(f"📉 WR: :{wr_color}[{wr}%]")
-                            st.caption(f"Partidas: {n['games']} ({n['wins']}W)")
-                            st.markdown(f"💀 Deaths: **{round(n['avg_deaths'], 1)}**")
-            
-            st.divider()
-    except Exception as e:
-        st.error(f"Error cargando Nemesis: {e}")
+            if nemesis_list:
+                show_nemesis(nemesis_list)
+                st.divider()
+        except Exception as e:
+            st.error(f"Error cargando Nemesis: {e}")
 
     # 2. SECCIÓN ORIGINAL: BÚSQUEDA MANUAL
     st.markdown("Busca en tu base de conocimiento antes de que empiece la línea.")
-    
-    col_search1, col_search2 = st.columns(2)
-    with col_search1:
-        my_champ_search = st.text_input("Yo juego con...", placeholder="Ej: Jax")
-    with col_search2:
-        enemy_champ_search = st.text_input("Contra...", placeholder="Ej: Renekton")
+    with metrics.section('scout.busqueda'):
+        col_search1, col_search2 = st.columns(2)
+        with col_search1:
+            my_champ_search = st.text_input("Yo juego con...", placeholder="Ej: Jax")
+        with col_search2:
+            enemy_champ_search = st.text_input("Contra...", placeholder="Ej: Renekton")
         
-    if my_champ_search or enemy_champ_search:
-        db = MatchDatabase()
-        results = []
-        if my_champ_search and enemy_champ_search:
-            results = db.get_matchup_notes(my_champ_search, enemy_champ_search)
-        elif enemy_champ_search:
-            results = db.get_matches_vs_enemy(f"%{enemy_champ_search}%")
-            
-        db.close()
+        if my_champ_search or enemy_champ_search:
+            results = []
+            if my_champ_search and enemy_champ_search:
+                results = index.matchup_notes(my_champ_search, enemy_champ_search, limit=SCOUT_LIMIT)
+                summary = index.matchup(my_champ_search, enemy_champ_search)
+                if summary:
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Partidas", summary['games'])
+                    m2.metric("Winrate", f"{int(summary['winrate'])}%", help=f"{summary['wins']}W - {summary['games'] - summary['wins']}L")
+                    m3.metric("Muertes medias", round(summary['avg_deaths'], 1))
+                    m4.metric("CS/min medio", round(summary['avg_cs_min'], 1))
+            elif enemy_champ_search:
+                results = index.matches_vs_enemy(enemy_champ_search, limit=SCOUT_LIMIT)
         
-        if results:
-            st.success(f"Encontradas {len(results)} partidas previas.")
-            for res in results:
-                with st.container(border=True):
-                    c1, c2 = st.columns([1, 4])
-                    with c1:
-                        st.markdown(f"**{res['champion']}** vs **{res['enemy_champion']}**")
-                        st.caption(res['date'].strftime('%Y-%m-%d'))
-                        result_emoji = "✅" if res['win'] else "❌"
-                        st.markdown(f"{result_emoji} {'Ganada' if res['win'] else 'Perdida'}")
-                    with c2:
-                        if res['notes']:
-                            st.info(f"💡 {res['notes']}")
-                        else:
-                            st.markdown("*Sin notas registradas*")
-        else:
-            st.warning("No tienes datos previos de este enfrentamiento. ¡Juega con cuidado y anota todo al final!")
+            if results:
+                if len(results) == SCOUT_LIMIT:
+                    st.success(f"Mostrando tus {SCOUT_LIMIT} partidas más recientes.")
+                else:
+                    st.success(f"Encontradas {len(results)} partidas previas.")
+                for res in results:
+                    with st.container(border=True):
+                        c1, c2 = st.columns([1, 4])
+                        with c1:
+                            st.markdown(f"**{res['champion']}** vs **{res['enemy_champion']}**")
+                            st.caption(res['date'].strftime('%Y-%m-%d'))
+                            result_emoji = "✅" if res['win'] else "❌"
+                            st.markdown(f"{result_emoji} {'Ganada' if res['win'] else 'Perdida'}")
+                        with c2:
+                            if res['notes']:
+                                st.info(f"💡 {res['notes']}")
+                            else:
+                                st.markdown("*Sin notas registradas*")
+            else:
+                st.warning("No tienes datos previos de este enfrentamiento. ¡Juega con cuidado y anota todo al final!")
 
 # --- TAB 3: CHAMPION POOL ---
-with tab3:
+def render_pool():
     st.subheader("🏆 Rendimiento de Champion Pool")
-    try:
-        db = MatchDatabase()
-        stats = db.get_champion_performance()
-        db.close()
+    with metrics.section('pool'):
+        try:
+            with MatchDatabase() as db:
+                stats = db.get_champion_performance(patch=selected_patch)
+                current_patch = selected_patch or db.get_latest_patch()
         
-        if stats:
-            df = pd.DataFrame(stats)
-            current_patch = "14.24.1"
-            df['Icono'] = df['champion'].apply(lambda x: f"https://ddragon.leagueoflegends.com/cdn/{current_patch}/img/champion/{x}.png")
-            
-            df = df[['Icono', 'champion', 'games_played', 'winrate', 'kda_ratio', 'avg_cs_min']]
-            
-            st.dataframe(
-                df,
-                column_config={
-                    "Icono": st.column_config.ImageColumn("Champ"),
-                    "winrate": st.column_config.ProgressColumn("Winrate", format="%.1f%%", min_value=0, max_value=100),
-                    "kda_ratio": st.column_config.NumberColumn("KDA", format="%.2f"),
-                    "avg_cs_min": st.column_config.NumberColumn("CS/min", format="%.1f 🌾"),
-                },
-                hide_index=True,
-                use_container_width=True,
-                height=500
-            )
-        else:
-            st.info("Aún no hay estadísticas suficientes.")
-    except Exception as e:
-        st.error(f"Error cargando stats: {e}")
\ No newline at end of file
+            if stats:
+                show_champion_pool(stats, current_patch)
+            else:
+                st.info("Aún no hay estadísticas suficientes.")
+        except Exception as e:
+            st.error(f"Error cargando stats: {e}")
+
+# Navegación: sólo se ejecuta (y consulta la BD) la pestaña visible.
+# st.tabs renderizaría las tres en cada rerun aunque sólo se vea una.
+TABS = {
+    "📊 Diario & Sincronización": render_diario,
+    "🔎 Scout & Matchups": render_scout,
+    "🏆 Champion Pool": render_pool,
+}
+active_tab = st.radio("Sección", list(TABS), horizontal=True, label_visibility="collapsed", key="active_tab")
+with metrics.section(f"tab.{active_tab.split(' ', 1)[1]}"):
+    TABS[active_tab]()
+
+# Conexión perdida sin que el breaker llegue a abrirse: la página también lleva datos antiguos
+if st.session_state.db_stale and not db_breaker.is_open:
+    db_banner.warning("⚠️ Se perdió la conexión con la base de datos: parte de lo que ves son los últimos "
+                      "datos cargados y puede no estar al día.")
+metrics.mark_first_render()
+
+# ============ PANEL DE RENDIMIENTO (DEBUG) ============
+if os.getenv("DEBUG_PANEL"):
+    with st.sidebar.expander("🩺 Rendimiento", expanded=False):
+        st.caption("Acumulado del proceso desde que arrancó el servidor.")
+        for title, metric_name in [("Secciones de la app", 'lol_app_section_seconds'),
+                                   ("Consultas a BD", 'lol_db_query_seconds'),
+                                   ("Llamadas a Riot", 'lol_riot_request_seconds'),
+                                   ("Margen de rate limit", 'lol_riot_rate_limit_remaining'),
+                                   ("Cachés", 'lol_cache_requests_total'),
+                                   ("Arranque en frío", 'lol_app_startup_seconds')]:
+            rows = metrics.REGISTRY.summary(metric_name)
+            if rows:
+                st.markdown(f"**{title}**")
+                st.dataframe(sorted(rows, key=lambda r: -r.get('total', 0)), hide_index=True, use_container_width=True)
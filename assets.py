@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import threading
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any
+
+import metrics
+
+# Origen por defecto: Data Dragon. ASSET_SOURCE puede apuntar a otra URL o a una
+# carpeta local con la misma estructura que el 'dragontail' de Riot:
+#   <carpeta>/<version>/data/en_US/champion.json
+#   <carpeta>/<version>/img/champion/<Campeon>.png
+DEFAULT_SOURCE = "https://ddragon.leagueoflegends.com"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'assets')
+
+# Tras un fallo de descarga no se reintenta hasta pasado este tiempo (segundos)
+RETRY_AFTER_FAILURE = 600
+MEMORY_CACHE_SIZE = 256
+
+
+def _normalize(name: str) -> str:
+    """'Kai'Sa', 'KaiSa' y 'kaisa' apuntan al mismo campeón."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+class ChampionAssets:
+    """
+    Almacén local de iconos y metadatos de campeones.
+
+    Cada parche se descarga una sola vez del origen configurado y se guarda en
+    disco (data/assets/<version>/). Los iconos se sirven después desde disco o
+    desde una caché LRU en memoria, sin peticiones externas al renderizar.
+    """
+
+    def __init__(self, source: Optional[str] = None, cache_dir: Optional[str] = None):
+        self.source = (source or os.getenv("ASSET_SOURCE") or DEFAULT_SOURCE).rstrip('/')
+        self.cache_dir = cache_dir or os.getenv("ASSET_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.is_local = not self.source.startswith(('http://', 'https://'))
+
+        self._lock = threading.Lock()
+        self._champions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._icons: OrderedDict = OrderedDict()
+        self._failed_at: Dict[str, float] = {}
+
+    # --- Origen ---
+    def _read_source(self, relative_path: str) -> bytes:
+        if self.is_local:
+            with open(os.path.join(self.source, relative_path), 'rb') as f:
+                return f.read()
+        prefix = '' if relative_path.startswith('api/') else 'cdn/'
+        with urllib.request.urlopen(f"{self.source}/{prefix}{relative_path}", timeout=10) as response:
+            return response.read()
+
+    def _source_versions(self) -> List[str]:
+        if self.is_local:
+            versions = [d for d in os.listdir(self.source) if re.match(r'^\d+\.\d+\.\d+$', d)]
+            return sorted(versions, key=lambda v: [int(x) for x in v.split('.')], reverse=True)
+        return json.loads(self._read_source('api/versions.json'))
+
+    def _cached_versions(self) -> List[str]:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        versions = [d for d in os.listdir(self.cache_dir)
+                    if os.path.exists(os.path.join(self.cache_dir, d, '.complete'))]
+        return sorted(versions, key=lambda v: [int(x) for x in v.split('.') if x.isdigit()], reverse=True)
+
+    def resolve_version(self, patch: Optional[str] = None) -> Optional[str]:
+        """
+        Traduce un parche de partida ('14.24' o '14.24.640.1234') a una versión de Data Dragon ('14.24.1').
+
+        Se prefiere una versión ya descargada; sólo se consulta el origen si no hay ninguna
+        en disco que corresponda a ese parche.
+        """
+        prefix = '.'.join(patch.split('.')[:2]) + '.' if patch else ''
+        for version in self._cached_versions():
+            if version.startswith(prefix):
+                return version
+
+        if self._recently_failed('versions'):
+            return None
+        try:
+            versions = self._source_versions()
+        except Exception as e:
+            self._mark_failed('versions', e)
+            return None
+        return next((v for v in versions if v.startswith(prefix)), versions[0] if versions else None)
+
+    # --- Descarga (una vez por parche) ---
+    def ensure_version(self, version: str) -> bool:
+        """Descarga metadatos e iconos del parche si aún no están en disco."""
+        version_dir = os.path.join(self.cache_dir, version)
+        if os.path.exists(os.path.join(version_dir, '.complete')):
+            return True
+        if self._recently_failed(version):
+            return False
+
+        with self._lock:
+            if os.path.exists(os.path.join(version_dir, '.complete')):
+                return True
+            try:
+                raw = self._read_source(f"{version}/data/en_US/champion.json")
+                champions = json.loads(raw)['data']
+                os.makedirs(os.path.join(version_dir, 'champion'), exist_ok=True)
+                for champ in champions.values():
+                    icon = self._read_source(f"{version}/img/champion/{champ['image']['full']}")
+                    with open(os.path.join(version_dir, 'champion', champ['image']['full']), 'wb') as f:
+                        f.write(icon)
+                with open(os.path.join(version_dir, 'champion.json'), 'wb') as f:
+                    f.write(raw)
+                open(os.path.join(version_dir, '.complete'), 'w').close()
+                return True
+            except Exception as e:
+                self._mark_failed(version, e)
+                return False
+
+    def _recently_failed(self, key: str) -> bool:
+        return time.time() - self._failed_at.get(key, 0) < RETRY_AFTER_FAILURE
+
+    def _mark_failed(self, key: str, error: Exception):
+        self._failed_at[key] = time.time()
+        print(f"Error descargando assets ({key}) desde {self.source}: {error}")
+
+    # --- Lectura ---
+    def champions(self, version: str) -> Dict[str, Dict[str, Any]]:
+        """Metadatos del parche indexados por nombre normalizado (id y nombre visible)."""
+        if version not in self._champions:
+            if not self.ensure_version(version):
+                return {}
+            with open(os.path.join(self.cache_dir, version, 'champion.json'), encoding='utf-8') as f:
+                data = json.load(f)['data']
+            index = {}
+            for champ in data.values():
+                index[_normalize(champ['id'])] = champ
+                index[_normalize(champ['name'])] = champ
+            self._champions[version] = index
+        return self._champions[version]
+
+    def champion(self, version: str, name: str) -> Optional[Dict[str, Any]]:
+        return self.champions(version).get(_normalize(name))
+
+    def icon_path(self, version: str, name: str) -> Optional[str]:
+        champ = self.champion(version, name)
+        if not champ:
+            return None
+        return os.path.join(self.cache_dir, version, 'champion', champ['image']['full'])
+
+    def icon_bytes(self, version: str, name: str) -> Optional[bytes]:
+        key = (version, _normalize(name))
+        with self._lock:
+            if key in self._icons:
+                self._icons.move_to_end(key)
+                metrics.record_cache('champion_icons', True)
+                return self._icons[key]
+        metrics.record_cache('champion_icons', False)
+
+        path = self.icon_path(version, name)
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self._icons[key] = data
+            while len(self._icons) > MEMORY_CACHE_SIZE:
+                self._icons.popitem(last=False)
+        return data
+
+    def icon_data_uri(self, version: str, name: str) -> Optional[str]:
+        """Icono embebido como data URI: el navegador no hace ninguna petición."""
+        data = self.icon_bytes(version, name)
+        if data is None:
+            return None
+        return "data:image/png;base64," + base64.b64encode(data).decode('ascii')
+
+    def icon_url(self, version: str, name: str, base_url: str) -> Optional[str]:
+        """URL del icono en el servidor de assets local (ver start_asset_server)."""
+        champ = self.champion(version, name)
+        if not champ:
+            return None
+        return f"{base_url.rstrip('/')}/assets/{version}/champion/{champ['image']['full']}"
+
+
+_assets: Optional[ChampionAssets] = None
+
+
+def get_champion_assets() -> ChampionAssets:
+    """Instancia compartida por todas las sesiones del proceso."""
+    global _assets
+    if _assets is None:
+        _assets = ChampionAssets()
+    return _assets
+
+
+class _AssetHandler(BaseHTTPRequestHandler):
+    """Sirve data/assets con cabeceras de caché largas: los ficheros de un parche nunca cambian."""
+
+    def do_GET(self):
+        match = re.match(r'^/assets/([\w.]+)/champion/([\w.]+\.png)$', self.path.split('?')[0])
+        if not match:
+            self.send_error(404)
+            return
+        assets = get_champion_assets()
+        version, filename = match.groups()
+        data = assets.icon_bytes(version, filename[:-4])
+        if data is None:
+            self.send_error(404)
+            return
+
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        self.send_header('ETag', etag)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_asset_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Arranca (una sola vez por proceso) el servidor de iconos en un hilo en segundo plano."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _AssetHandler)
+            threading.Thread(target=_server.serve_forever, name='asset-server', daemon=True).start()
+    return _server
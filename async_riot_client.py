@@ -0,0 +1,344 @@
+import asyncio
+import time
+from datetime import datetime
+from collections import deque
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+import metrics
+import match_parser
+import rank_tracking
+from match_parser import MalformedMatchError
+from circuit_breaker import get_breaker
+from riot_client import LoLClient, ROUTING_MAP
+
+# Rutas regionales de la API de Riot (match-v5 y account-v1)
+REGIONAL_ROUTES = ('americas', 'europe', 'asia', 'sea')
+
+# Límites por defecto de una Development Key; se sustituyen por los que
+# devuelve Riot en la cabecera X-App-Rate-Limit tras la primera respuesta.
+DEFAULT_APP_LIMITS = ((20, 1), (100, 120))
+
+
+class RiotApiError(Exception):
+    """Error HTTP devuelto por la API de Riot."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class _SlidingWindowLimiter:
+    """Limitador de ventanas deslizantes (p.ej. 20 peticiones/1s y 100/120s) para una ruta."""
+
+    def __init__(self, limits: Tuple[Tuple[int, int], ...] = DEFAULT_APP_LIMITS):
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self.set_limits(limits)
+
+    def set_limits(self, limits: Tuple[Tuple[int, int], ...]):
+        self.limits = tuple(limits)
+        self._calls = {seconds: deque() for _, seconds in self.limits}
+
+    def update_from_header(self, header: Optional[str]):
+        if not header:
+            return
+        limits = tuple(tuple(int(x) for x in pair.split(':')) for pair in header.split(','))
+        if limits != self.limits:
+            self.set_limits(limits)
+
+    def pause(self, seconds: float):
+        """Bloquea la ruta tras un 429 durante el Retry-After indicado por Riot."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                for limit, seconds in self.limits:
+                    calls = self._calls[seconds]
+                    while calls and calls[0] <= now - seconds:
+                        calls.popleft()
+                    if len(calls) >= limit:
+                        wait = max(wait, calls[0] + seconds - now)
+                if wait <= 0:
+                    for _, seconds in self.limits:
+                        self._calls[seconds].append(now)
+                    return
+                await asyncio.sleep(wait)
+
+
+class AsyncLoLClient:
+    """
+    Cliente asíncrono de la API de Riot con conexiones keep-alive reutilizadas.
+
+    Mantiene una sesión HTTP (con su propio pool de conexiones) por cada host
+    regional, de modo que cientos de peticiones pueden estar en vuelo a la vez
+    sin repetir el handshake TLS, respetando siempre los rate limits de Riot.
+    El parseo de las partidas es el mismo que el de LoLClient.
+
+    Uso:
+        async with AsyncLoLClient(api_key, 'EUW1') as client:
+            matches = await client.get_recent_matches('Faker#KR1')
+    """
+
+    def __init__(self, api_key: str, region: str = 'EUW1', max_in_flight: int = 100,
+                 connections_per_host: int = 50, timeout: float = 10.0,
+                 base_url: Optional[str] = None, max_retries: int = 3):
+        """
+        Args:
+            api_key: Tu clave de API de Riot Games
+            region: Región del servidor (por defecto 'EUW1')
+            max_in_flight: Peticiones simultáneas máximas del cliente
+            connections_per_host: Tamaño del pool keep-alive de cada host
+            timeout: Timeout total de cada petición en segundos
+            base_url: URL alternativa (p.ej. un servidor mock) en lugar de api.riotgames.com
+            max_retries: Reintentos ante 429/5xx
+        """
+        if not api_key:
+            raise ValueError("API Key no puede estar vacía")
+
+        self.api_key = api_key
+        self.region = region.lower()
+        self.platform = region.upper()
+        self.continental_route = ROUTING_MAP.get(self.platform, 'europe')
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.connections_per_host = connections_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._limiters: Dict[str, _SlidingWindowLimiter] = {}
+        self._accounts: Dict[str, dict] = {}  # Riot ID -> cuenta (rango y partidas la comparten)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    def _host(self, route: str) -> str:
+        if self.base_url:
+            return self.base_url
+        return f"https://{route}.api.riotgames.com"
+
+    def _session(self, route: str) -> aiohttp.ClientSession:
+        """Sesión persistente por host: las conexiones TCP/TLS se reutilizan entre peticiones."""
+        session = self._sessions.get(route)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connections_per_host,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                base_url=self._host(route),
+                connector=connector,
+                timeout=self.timeout,
+                headers={'X-Riot-Token': self.api_key},
+            )
+            self._sessions[route] = session
+        return session
+
+    def _limiter(self, route: str) -> _SlidingWindowLimiter:
+        # Los rate limits de la app son independientes en cada ruta
+        if route not in self._limiters:
+            self._limiters[route] = _SlidingWindowLimiter()
+        return self._limiters[route]
+
+    async def _get(self, route: str, path: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET con control de concurrencia, rate limit y reintentos ante 429/5xx.
+
+        Comparte con LoLClient el circuit breaker 'riot': con Riot caído las
+        peticiones fallan al instante con CircuitOpenError.
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        limiter = self._limiter(route)
+        breaker = get_breaker('riot')
+
+        for attempt in range(self.max_retries + 1):
+            breaker.check()
+            await limiter.acquire()
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    async with self._session(route).get(path, params=params) as response:
+                        status = response.status
+                        headers = response.headers
+                        body = match_parser.loads(await response.read()) if status == 200 else None
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    breaker.record_failure()
+                    raise
+                finally:
+                    metrics.observe('lol_riot_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+
+            if status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            metrics.inc('lol_riot_requests_total', endpoint=endpoint, status=status)
+            limiter.update_from_header(headers.get('X-App-Rate-Limit'))
+            metrics.record_rate_limits('app', headers.get('X-App-Rate-Limit'), headers.get('X-App-Rate-Limit-Count'))
+            metrics.record_rate_limits(endpoint, headers.get('X-Method-Rate-Limit'), headers.get('X-Method-Rate-Limit-Count'))
+
+            if status == 200:
+                return body
+            if attempt < self.max_retries and (status == 429 or status >= 500):
+                retry_after = float(headers.get('Retry-After', 2 ** attempt))
+                if status == 429:
+                    limiter.pause(retry_after)
+                else:
+                    await asyncio.sleep(retry_after)
+                continue
+            raise RiotApiError(self._error_message(status, path), status)
+
+    def _error_message(self, status: int, path: str) -> str:
+        if status == 403:
+            return "API Key inválida o caducada."
+        if status == 404:
+            return f"Recurso no encontrado en {self.continental_route}: {path}"
+        if status == 429:
+            return "Límite de peticiones excedido. Espera unos minutos."
+        return f"Error de API: {status}"
+
+    async def get_summoner_info(self, summoner_name_tag: str) -> dict:
+        """
+        Obtiene la información básica de un invocador usando su Riot ID.
+
+        Args:
+            summoner_name_tag: Riot ID en formato 'NombreJugador#TAG'
+
+        Returns:
+            Dict con puuid, name y tag del jugador
+        """
+        if summoner_name_tag in self._accounts:
+            return self._accounts[summoner_name_tag]
+        if "#" not in summoner_name_tag:
+            raise ValueError("El formato debe ser Nombre#Tag (Ej: Faker#KR1)")
+
+        game_name, tag_line = summoner_name_tag.split('#', 1)
+        if not game_name or not tag_line:
+            raise ValueError("Nombre o Tag vacíos. Usa el formato correcto: Nombre#Tag")
+
+        account = await self._get(
+            self.continental_route,
+            f"/riot/account/v1/accounts/by-riot-id/{quote(game_name)}/{quote(tag_line)}",
+            'account.by_riot_id'
+        )
+        self._accounts[summoner_name_tag] = {
+            'puuid': account['puuid'],
+            'name': account['gameName'],
+            'tag': account['tagLine']
+        }
+        return self._accounts[summoner_name_tag]
+
+    async def get_match_ids(self, puuid: str, count: int = 20, queue: Optional[int] = 420, start: int = 0,
+                            start_time: Optional[datetime] = None) -> List[str]:
+        return await self._get(
+            self.continental_route,
+            f"/lol/match/v5/matches/by-puuid/{puuid}/ids",
+            'match.matchlist_by_puuid',
+            params={'count': count, 'queue': queue, 'start': start,
+                    'startTime': int(start_time.timestamp()) if start_time else None}
+        )
+
+    async def get_league_entries(self, puuid: str) -> List[dict]:
+        return await self._get(self.region, f"/lol/league/v4/entries/by-puuid/{puuid}", 'league.by_puuid')
+
+    async def get_rank_snapshot(self, summoner_name: str, queue: Optional[int] = 420) -> Optional[dict]:
+        """
+        Rango actual del jugador en una cola (mismo formato que LoLClient.get_rank_snapshot).
+
+        Returns:
+            Dict de rank_tracking.queue_entry más puuid y taken_at, o None si no tiene rango
+        """
+        puuid = (await self.get_summoner_info(summoner_name))['puuid']
+        taken_at = datetime.now()
+        snapshot = rank_tracking.queue_entry(await self.get_league_entries(puuid), queue)
+        if snapshot:
+            snapshot.update(puuid=puuid, taken_at=taken_at)
+        return snapshot
+
+    async def get_match(self, match_id: str) -> dict:
+        return await self._get(self.continental_route, f"/lol/match/v5/matches/{match_id}", 'match.by_id')
+
+    async def get_recent_matches(self, summoner_name: str, limit: int = 10, queue: Optional[int] = 420,
+                                 start_time: Optional[datetime] = None) -> list:
+        """
+        Descarga las últimas 'limit' partidas del jugador en paralelo.
+
+        Args:
+            summoner_name: Riot ID en formato 'Nombre#Tag'
+            limit: Número de partidas a descargar (máx 100)
+            queue: Tipo de cola (420=Ranked Solo/Duo, 440=Ranked Flex, None=Todas)
+            start_time: Sólo partidas empezadas desde ese momento (ver MatchDatabase.get_lp_sync_start)
+
+        Returns:
+            Lista de diccionarios con estadísticas de cada partida (mismo formato que LoLClient)
+        """
+        summoner_info = await self.get_summoner_info(summoner_name)
+        puuid = summoner_info['puuid']
+
+        match_ids = await self.get_match_ids(puuid, count=min(limit, 100), queue=queue, start_time=start_time)
+        if not match_ids:
+            return []
+
+        responses = await asyncio.gather(*(self.get_match(m_id) for m_id in match_ids), return_exceptions=True)
+
+        results = []
+        for m_id, match_data in zip(match_ids, responses):
+            try:
+                if isinstance(match_data, Exception):
+                    raise match_data
+                match_parser.archive_raw(match_data, puuid)
+                stats = LoLClient.parse_match(match_data, puuid)
+                if stats:
+                    results.append(stats)
+            except MalformedMatchError as e:
+                metrics.inc('lol_riot_match_errors_total', reason=e.reason)
+                print(f"Partida {m_id} con formato inesperado: {e}")
+            except Exception as e:
+                metrics.inc('lol_riot_match_errors_total')
+                print(f"Error procesando partida {m_id}: {e}")
+        return results
+
+    async def get_recent_matches_many(self, summoner_names: List[str], limit: int = 10, queue: Optional[int] = 420,
+                                      start_times: Optional[Dict[str, datetime]] = None) -> Dict[str, Any]:
+        """
+        Sincroniza varias cuentas a la vez compartiendo pools y rate limits.
+
+        start_times (Riot ID -> momento) limita las partidas de cada cuenta como en get_recent_matches.
+
+        Returns:
+            Dict Riot ID -> lista de partidas, o la excepción si esa cuenta falló
+        """
+        results = await asyncio.gather(
+            *(self.get_recent_matches(name, limit=limit, queue=queue, start_time=(start_times or {}).get(name))
+              for name in summoner_names),
+            return_exceptions=True
+        )
+        return dict(zip(summoner_names, results))
+
+    async def get_rank_snapshots_many(self, summoner_names: List[str], queue: Optional[int] = 420) -> Dict[str, Any]:
+        """
+        Rango de varias cuentas a la vez (una llamada a league-v4 por cuenta).
+
+        Returns:
+            Dict Riot ID -> snapshot (o None si no tiene rango), o la excepción si esa cuenta falló
+        """
+        results = await asyncio.gather(
+            *(self.get_rank_snapshot(name, queue=queue) for name in summoner_names),
+            return_exceptions=True
+        )
+        return dict(zip(summoner_names, results))
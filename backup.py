@@ -0,0 +1,450 @@
+import os
+import re
+import json
+import glob
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.ipc as ipc
+
+# Tablas que se exportan. 'watermark' es la columna que marca hasta dónde llegó
+# la última exportación incremental (la fecha de la última escritura de cada fila,
+# así también se vuelven a exportar las filas editadas), 'partition' la columna de
+# fecha usada para particionar los ficheros por mes (estilo Hive: month=YYYY-MM)
+# y 'key' la clave primaria con la que la importación actualiza las filas existentes.
+# patch_windows, match_sketches y alert_detectors no se exportan: se derivan de
+# 'matches' y se reconstruyen al importar (ver prepare/finish en import_table).
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    'matches': {'watermark': 'updated_at', 'partition': 'date', 'key': ('game_id', 'date')},
+    'rank_snapshots': {'watermark': 'updated_at', 'partition': 'taken_at', 'key': ('puuid', 'queue', 'taken_at')},
+}
+
+# Corte de una exportación incremental: el momento actual, o el inicio de la
+# transacción de escritura más antigua aún abierta (lo que escriba se confirmará
+# después del COPY con un updated_at posterior a su inicio, y entrará en la siguiente)
+WATERMARK_CUTOFF_QUERY = """
+SELECT least(clock_timestamp(), min(xact_start))::timestamp
+FROM pg_stat_activity
+WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()
+"""
+
+DEFAULT_BATCH_ROWS = 5000
+MANIFEST_NAME = '_manifest.json'
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Mapeo de tipos de PostgreSQL (information_schema.data_type) a tipos Arrow
+PG_TO_ARROW = {
+    'text': pa.string(),
+    'character varying': pa.string(),
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'real': pa.float32(),
+    'double precision': pa.float64(),
+    'numeric': pa.float64(),
+    'boolean': pa.bool_(),
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+    'date': pa.date32(),
+    'json': pa.string(),
+    'jsonb': pa.string(),
+    'bytea': pa.binary(),
+}
+
+# Secuencias de escape del formato texto de COPY
+_COPY_UNESCAPE = re.compile(r'\\(.)')
+_COPY_ESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+
+
+def _unescape(field: str) -> str:
+    return _COPY_UNESCAPE.sub(lambda m: _COPY_ESCAPES.get(m.group(1), m.group(1)), field)
+
+
+def _escape(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _parse_value(raw: str, arrow_type: pa.DataType) -> Any:
+    """Convierte un campo de texto de COPY al valor Python del tipo Arrow."""
+    if pa.types.is_integer(arrow_type):
+        return int(raw)
+    if pa.types.is_floating(arrow_type):
+        return float(raw)
+    if pa.types.is_boolean(arrow_type):
+        return raw == 't'
+    if pa.types.is_timestamp(arrow_type):
+        return datetime.fromisoformat(raw)
+    if pa.types.is_date(arrow_type):
+        return datetime.strptime(raw, '%Y-%m-%d').date()
+    if pa.types.is_binary(arrow_type):
+        return bytes.fromhex(raw[2:])  # bytea se exporta como \x<hex>
+    return raw
+
+
+def _format_value(value: Any) -> str:
+    """Convierte un valor Python al formato texto de COPY FROM."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, bytes):
+        return '\\\\x' + value.hex()
+    return _escape(str(value))
+
+
+def get_table_schema(connection, table: str, writable_only: bool = False) -> pa.Schema:
+    """
+    Construye el esquema Arrow a partir de las columnas de la tabla en PostgreSQL.
+
+    Con writable_only se omiten las columnas generadas (no admiten INSERT).
+    """
+    query = f"""
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = %s
+    {"AND is_generated = 'NEVER'" if writable_only else ""}
+    ORDER BY ordinal_position
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(query, (table,))
+        columns = cursor.fetchall()
+    if not columns:
+        raise ValueError(f"La tabla '{table}' no existe")
+    return pa.schema([(name, PG_TO_ARROW.get(data_type, pa.string())) for name, data_type in columns])
+
+
+def load_manifest(out_dir: str) -> Dict[str, Any]:
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'watermarks': {}, 'runs': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir: str, manifest: Dict[str, Any]):
+    # Escritura atómica: si el proceso muere a mitad, el manifiesto anterior sigue válido
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+class _PartitionedBatchWriter:
+    """
+    Recibe el flujo de COPY ... TO STDOUT (formato texto) y lo vuelca a ficheros
+    Parquet/Arrow particionados por mes, en lotes de tamaño acotado.
+
+    psycopg2 llama a write() con trozos arbitrarios del flujo, así que sólo se
+    procesan líneas completas y el resto se guarda para el siguiente trozo.
+    """
+
+    def __init__(self, table_dir: str, schema: pa.Schema, partition_column: Optional[str],
+                 run_id: str, fmt: str = 'parquet', batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.table_dir = table_dir
+        self.schema = schema
+        self.run_id = run_id
+        self.fmt = fmt
+        self.batch_rows = batch_rows
+        self.types = [field.type for field in schema]
+        self.partition_idx = schema.get_field_index(partition_column) if partition_column else -1
+
+        self._pending = b''
+        self._rows: List[List[Any]] = []
+        self._partition: Optional[str] = None
+        self._writer = None
+        self._sink = None
+
+        self.rows_written = 0
+        self.files: List[str] = []
+
+    # --- Interfaz de fichero para copy_expert ---
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._pending += data
+        *lines, self._pending = self._pending.split(b'\n')
+        for line in lines:
+            if line:
+                self._add_row(line.decode('utf-8'))
+        return len(data)
+
+    def _add_row(self, line: str):
+        row = [None if raw == '\\N' else _parse_value(_unescape(raw), arrow_type)
+               for raw, arrow_type in zip(line.split('\t'), self.types)]
+
+        partition = self._partition_for(row)
+        if partition != self._partition:
+            # COPY viene ordenado por fecha: al cambiar de mes cerramos el fichero anterior
+            self._flush()
+            self._close_writer()
+            self._partition = partition
+
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_rows:
+            self._flush()
+
+    def _partition_for(self, row: List[Any]) -> str:
+        if self.partition_idx < 0:
+            return 'all'
+        value = row[self.partition_idx]
+        return f"month={value.strftime('%Y-%m')}" if value is not None else 'month=unknown'
+
+    def _flush(self):
+        if not self._rows:
+            return
+        columns = list(zip(*self._rows))
+        batch = pa.record_batch(
+            [pa.array(col, type=t) for col, t in zip(columns, self.types)],
+            schema=self.schema
+        )
+        self._get_writer().write_batch(batch)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def _get_writer(self):
+        if self._writer is None:
+            part_dir = os.path.join(self.table_dir, self._partition)
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, f"part-{self.run_id}{FORMATS[self.fmt]}")
+            if self.fmt == 'parquet':
+                self._writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+            else:
+                self._sink = pa.OSFile(path, 'wb')
+                self._writer = ipc.new_file(self._sink, self.schema)
+            self.files.append(path)
+        return self._writer
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+        self._writer = None
+        self._sink = None
+
+    def close(self):
+        if self._pending.strip():
+            self._add_row(self._pending.decode('utf-8'))
+            self._pending = b''
+        self._flush()
+        self._close_writer()
+
+
+def export_table(connection, table: str, out_dir: str, since: Any = None, run_id: Optional[str] = None,
+                 fmt: str = 'parquet', batch_rows: int = DEFAULT_BATCH_ROWS) -> Dict[str, Any]:
+    """
+    Exporta una tabla en streaming usando COPY en el servidor.
+
+    Args:
+        connection: Conexión psycopg2 abierta
+        table: Nombre de la tabla (debe estar en EXPORT_TABLES)
+        out_dir: Carpeta raíz del backup
+        since: Watermark de la exportación anterior (None = exportación completa)
+        run_id: Identificador de la ejecución, usado en el nombre de los ficheros
+        fmt: 'parquet' o 'arrow'
+        batch_rows: Filas máximas en memoria antes de escribir un lote
+
+    Returns:
+        Dict con filas exportadas, ficheros generados y el nuevo watermark
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Tabla no exportable: {table}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    config = EXPORT_TABLES[table]
+    watermark = config['watermark']
+    schema = get_table_schema(connection, table)
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S%f')
+
+    columns = ', '.join(f'"{name}"' for name in schema.names)
+    query = f"SELECT {columns} FROM {table}"
+    cutoff = None
+    if watermark:
+        with connection.cursor() as cursor:
+            cursor.execute(WATERMARK_CUTOFF_QUERY)
+            cutoff = cursor.fetchone()[0]
+            # '>=': lo escrito justo en el corte se exporta dos veces antes que ninguna
+            # (la importación actualiza en vez de duplicar)
+            if since is not None:
+                query += cursor.mogrify(f" WHERE {watermark} >= %s", (since,)).decode('utf-8')
+    if config['partition']:
+        query += f" ORDER BY {config['partition']}"
+
+    writer = _PartitionedBatchWriter(
+        os.path.join(out_dir, table), schema, config['partition'],
+        run_id, fmt=fmt, batch_rows=batch_rows
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT", writer)
+    finally:
+        writer.close()
+        connection.rollback()  # Sólo lectura: cerramos la transacción implícita
+
+    return {
+        'table': table,
+        'rows': writer.rows_written,
+        'files': writer.files,
+        'watermark': cutoff if cutoff is not None else since,
+    }
+
+
+def export_all(connection, out_dir: str, full: bool = False, fmt: str = 'parquet',
+               batch_rows: int = DEFAULT_BATCH_ROWS) -> List[Dict[str, Any]]:
+    """Exporta todas las tablas de EXPORT_TABLES desde su último watermark."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    run_id = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+
+    results = []
+    for table in EXPORT_TABLES:
+        since = None if full else manifest['watermarks'].get(table)
+        result = export_table(connection, table, out_dir, since=since, run_id=run_id,
+                              fmt=fmt, batch_rows=batch_rows)
+        result['since'] = since
+        if result['watermark'] is not None:
+            manifest['watermarks'][table] = str(result['watermark'])
+        results.append(result)
+
+    manifest['runs'].append({
+        'run_id': run_id,
+        'format': fmt,
+        'since': {r['table']: r['since'] for r in results},
+        'rows': {r['table']: r['rows'] for r in results},
+    })
+    save_manifest(out_dir, manifest)
+    return results
+
+
+class _BatchTextReader:
+    """Adaptador de lectura para COPY FROM STDIN que serializa lotes Arrow bajo demanda."""
+
+    def __init__(self, batches: Iterator[pa.RecordBatch], columns: List[str]):
+        self._batches = batches
+        self._columns = columns
+        self._buffer = b''
+        self.rows_read = 0
+
+    def _next_chunk(self) -> bool:
+        for batch in self._batches:
+            values = [batch.column(name).to_pylist() for name in self._columns]
+            lines = ['\t'.join(_format_value(v) for v in row) for row in zip(*values)]
+            self.rows_read += batch.num_rows
+            if lines:
+                self._buffer += ('\n'.join(lines) + '\n').encode('utf-8')
+                return True
+        return False
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buffer) < size) and self._next_chunk():
+            pass
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> bytes:
+        while b'\n' not in self._buffer and self._next_chunk():
+            pass
+        idx = self._buffer.find(b'\n')
+        end = len(self._buffer) if idx < 0 else idx + 1
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+
+def _iter_file_batches(path: str, batch_rows: int) -> Tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    if path.endswith('.parquet'):
+        parquet_file = pq.ParquetFile(path)
+        return parquet_file.schema_arrow, parquet_file.iter_batches(batch_size=batch_rows)
+
+    reader = ipc.open_file(pa.memory_map(path, 'r'))
+    return reader.schema, (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+
+def list_backup_files(backup_dir: str, table: str) -> List[str]:
+    pattern = os.path.join(backup_dir, table, '**', '*')
+    return sorted(p for p in glob.glob(pattern, recursive=True)
+                  if os.path.splitext(p)[1] in FORMATS.values())
+
+
+def import_table(connection, table: str, backup_dir: str,
+                 batch_rows: int = DEFAULT_BATCH_ROWS,
+                 prepare: Optional[Callable[[Any, str, str], None]] = None,
+                 finish: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Restaura una tabla desde los ficheros de backup usando COPY FROM STDIN.
+
+    Cada fichero se vuelca a una tabla temporal y se inserta con ON CONFLICT
+    (clave) DO UPDATE: las filas editadas después de exportarlas se actualizan,
+    pero nunca con una versión más antigua que la de la base de datos (se
+    compara el watermark), así que importar dos veces el mismo backup es seguro.
+    Los ficheros se leen en orden de ejecución, de modo que gana la última copia.
+    Backups sin la columna de watermark sólo insertan las filas que faltan.
+    Si se indica, prepare(cursor, table, staging) se llama antes de cada INSERT
+    (p.ej. para crear las particiones que necesitan las filas de staging), y
+    finish(table) al terminar si se escribió alguna fila (p.ej. para recalcular
+    las tablas que se derivan de ella).
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Tabla no importable: {table}")
+
+    config = EXPORT_TABLES[table]
+    target_columns = set(get_table_schema(connection, table, writable_only=True).names)
+    staging = f"_import_{table}"
+    written = 0
+    rows_read = 0
+    files = list_backup_files(backup_dir, table)
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            for path in files:
+                schema, batches = _iter_file_batches(path, batch_rows)
+                # Columnas comunes: permite restaurar backups de versiones anteriores del esquema
+                columns = [name for name in schema.names if name in target_columns]
+                column_list = ', '.join(f'"{name}"' for name in columns)
+                updates = [name for name in columns if name not in config['key']]
+                if config['watermark'] in columns and updates:
+                    conflict = (f"ON CONFLICT ({', '.join(config['key'])}) DO UPDATE SET "
+                                + ', '.join(f'"{name}" = EXCLUDED."{name}"' for name in updates)
+                                + f" WHERE {table}.{config['watermark']} < EXCLUDED.{config['watermark']}")
+                else:
+                    conflict = "ON CONFLICT DO NOTHING"
+
+                reader = _BatchTextReader(batches, columns)
+                cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", reader)
+                if prepare:
+                    prepare(cursor, table, staging)
+                cursor.execute(
+                    f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} {conflict}"
+                )
+                written += cursor.rowcount
+                rows_read += reader.rows_read
+                connection.commit()
+        connection.commit()
+    except Exception as e:
+        connection.rollback()
+        raise Exception(f"Error al importar {table}: {e}")
+
+    if finish and written:
+        finish(table)
+    return {'table': table, 'files': len(files), 'rows_read': rows_read, 'written': written}
+
+
+def import_all(connection, backup_dir: str, batch_rows: int = DEFAULT_BATCH_ROWS,
+               prepare: Optional[Callable[[Any, str, str], None]] = None,
+               finish: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
+    """Restaura todas las tablas de EXPORT_TABLES presentes en el backup."""
+    return [import_table(connection, table, backup_dir, batch_rows=batch_rows, prepare=prepare, finish=finish)
+            for table in EXPORT_TABLES
+            if os.path.isdir(os.path.join(backup_dir, table))]
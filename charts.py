@@ -0,0 +1,181 @@
+from typing import Optional, List, Dict, Any, Tuple
+import metrics
+import sketches
+import rank_tracking
+from assets import get_champion_assets
+# plotly y pandas se importan al construir cada figura (metrics.lazy_import): este
+# módulo lo usan tanto app.py como el generador de snapshots (snapshot.py)
+
+# Ventanas del gráfico de LP: etiqueta -> argumentos de MatchDatabase.get_trend
+TREND_WINDOWS = {
+    "Últimas 20": dict(last_n=20),
+    "Últimas 100": dict(last_n=100),
+    "30 días": dict(days=30),
+    "Todo": dict(),
+}
+
+HEATMAP_DAYS = ['Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+
+def lp_trend_figure(trend: List[Dict[str, Any]], window: str):
+    """Gráfico de LP acumulado y winrate móvil a partir de MatchDatabase.get_trend."""
+    go = metrics.lazy_import('plotly.graph_objects')
+    dates = [f"{m['date'].strftime('%m-%d')} ({m['champion']})" for m in trend]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=[m['cumulative_lp'] for m in trend],
+        mode='lines+markers',
+        name='LP',
+        line=dict(color='#00cc96', width=3),
+        marker=dict(size=8 if len(trend) <= 50 else 4)
+    ))
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=[m['rolling_winrate'] for m in trend],
+        mode='lines',
+        name='WR (media 5)',
+        line=dict(color='#636efa', width=1, dash='dot'),
+        yaxis='y2'
+    ))
+
+    fig.update_layout(
+        title=f"Evolución de LP Acumulado ({window})",
+        xaxis_title="Partida",
+        yaxis_title="LP Ganado/Perdido (Neto)",
+        yaxis2=dict(title="Winrate %", overlaying='y', side='right', range=[0, 100], showgrid=False),
+        height=300,
+        margin=dict(l=20, r=20, t=40, b=20),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend=dict(orientation='h', y=-0.3)
+    )
+
+    fig.add_hline(y=0, line_dash="dash", line_color="gray")
+    return fig
+
+
+def trend_caption(trend: List[Dict[str, Any]]) -> str:
+    last = trend[-1]
+    return f"Últimas 5: WR {last['rolling_winrate']:.0f}% · CS/min {last['rolling_cs_min']:.1f} · Muertes {last['rolling_deaths']:.1f}"
+
+
+def rank_caption(rank: Dict[str, Any]) -> str:
+    """Rango del último snapshot de league-v4 (MatchDatabase.get_current_rank)."""
+    games = rank['wins'] + rank['losses']
+    winrate = rank['wins'] * 100 // games if games else 0
+    return f"🏅 {rank_tracking.rank_label(rank)} · {rank['wins']}W {rank['losses']}L ({winrate}%)"
+
+
+def heatmap_figure(heat_data: List[Dict[str, Any]]):
+    """Heatmap de winrate por día y hora a partir de MatchDatabase.get_activity_heatmap_data."""
+    go = metrics.lazy_import('plotly.graph_objects')
+    pd = metrics.lazy_import('pandas')
+    hours = [str(i) for i in range(24)]
+
+    df_heat = pd.DataFrame(heat_data).astype({'weekday': int, 'hour': int, 'games': int, 'wins': int})
+    df_heat['wr'] = (df_heat['wins'] * 100 // df_heat['games']).astype(int)
+    df_heat['text'] = ("WR: " + df_heat['wr'].astype(str) + "%<br>" + df_heat['games'].astype(str)
+                       + " Games<br>(" + df_heat['wins'].astype(str) + "W - "
+                       + (df_heat['games'] - df_heat['wins']).astype(str) + "L)")
+
+    # Rejilla 7x24 completa: lo vacío queda NaN para que no se pinte de rojo
+    grid = df_heat.pivot(index='weekday', columns='hour', values=['wr', 'text'])
+    z_data = grid['wr'].reindex(index=range(7), columns=range(24)).to_numpy(dtype=float)  # El color (z) es el Winrate
+    text_data = grid['text'].reindex(index=range(7), columns=range(24)).fillna("").to_numpy()
+
+    fig_heat = go.Figure(data=go.Heatmap(
+        z=z_data,
+        x=hours,
+        y=HEATMAP_DAYS,
+        hoverongaps=False,
+        colorscale='RdYlGn',  # Escala Rojo-Amarillo-Verde
+        zmin=0,               # 0% es el rojo más fuerte
+        zmax=100,             # 100% es el verde más fuerte
+        text=text_data,
+        hoverinfo='text'      # Solo mostrar nuestro texto personalizado
+    ))
+
+    fig_heat.update_layout(
+        title="Rendimiento por Horario (Rojo=Lose / Verde=Win)",
+        xaxis_title="Hora del día",
+        height=350,
+        margin=dict(l=20, r=20, t=40, b=20),
+        xaxis=dict(dtick=2),
+        plot_bgcolor='rgba(0,0,0,0)' # Fondo transparente para lo vacío
+    )
+    return fig_heat
+
+
+def match_percentiles(match: Dict[str, Any], match_sketches: Dict[Tuple[str, str], Dict[str, Any]]) -> Tuple[Dict[str, Optional[float]], str]:
+    """
+    Percentil "de mejora" de cada métrica frente a tus partidas del campeón (o a todas si hay pocas).
+
+    Returns:
+        ({métrica: percentil o None}, con qué partidas se compara)
+    """
+    scope, label = match_sketches.get(('champion', match['champion']), {}), f"tus partidas de {match['champion']}"
+    if len(scope.get('cs_min') or ()) < sketches.MIN_SAMPLES:
+        scope, label = match_sketches.get(('player', ''), {}), "tus partidas"
+    values = sketches.match_values(match)
+    return {metric: sketches.improvement_percentile(scope.get(metric), metric, value)
+            for metric, value in values.items()}, label
+
+
+def match_badges(match: Dict[str, Any], pct: Dict[str, Optional[float]]) -> str:
+    """
+    Logros de una partida, relativos a tu propio historial (percentiles); con
+    menos de sketches.MIN_SAMPLES partidas se usan los umbrales fijos.
+    """
+    badges = []
+    duration = match.get('game_duration_minutes', 30.0) or 30.0
+    cs_min = match.get('cs_min', 0)
+    deaths = match.get('deaths', 0)
+    kills = match.get('kills', 0)
+    assists = match.get('assists', 0)
+    safe_deaths = deaths if deaths > 0 else 1
+
+    if pct['cs_min'] is not None:
+        if pct['cs_min'] >= 80: badges.append("🌾 CS God")
+        elif pct['cs_min'] <= 20 and duration > 15: badges.append("⚠️ Farm Pobre")
+    elif cs_min >= 7.5: badges.append("🌾 CS God")
+    elif cs_min < 5.0 and duration > 15: badges.append("⚠️ Farm Pobre")
+
+    if pct['deaths'] is not None:
+        if pct['deaths'] >= 80: badges.append("🧱 Muralla")
+        elif pct['deaths'] <= 20: badges.append("🤡 Feeder")
+    elif deaths <= 2: badges.append("🧱 Muralla")
+    elif deaths >= 7: badges.append("🤡 Feeder")
+
+    if match.get('control_wards', 0) >= 3: badges.append("👁️ Visionary")
+
+    if pct['kda'] is not None:
+        if pct['kda'] >= 80: badges.append("🔥 Carry")
+    elif (kills + assists) / safe_deaths > 4.0: badges.append("🔥 Carry")
+
+    return " | ".join(badges)
+
+
+def percentile_caption(pct: Dict[str, Optional[float]], label: str) -> Optional[str]:
+    if pct['cs_min'] is None:
+        return None
+    return (f"📊 Mejor que el {pct['cs_min']:.0f}% de {label} en CS/min · "
+            f"{pct['deaths']:.0f}% en muertes · {pct['kda']:.0f}% en KDA · "
+            f"duración: percentil {pct['game_duration_minutes']:.0f}")
+
+
+def champion_pool_frame(stats: List[Dict[str, Any]], current_patch: Optional[str], asset_base_url: Optional[str] = None):
+    """Tabla del Champion Pool (DataFrame) con el icono de cada campeón del almacén local."""
+    pd = metrics.lazy_import('pandas')
+    df = pd.DataFrame(stats)
+    # Iconos del almacén local, del parche de tus últimas partidas (sin peticiones a la CDN)
+    assets = get_champion_assets()
+    version = assets.resolve_version(current_patch)
+    if version and asset_base_url:
+        df['Icono'] = df['champion'].apply(lambda x: assets.icon_url(version, x, asset_base_url))
+    elif version:
+        df['Icono'] = df['champion'].apply(lambda x: assets.icon_data_uri(version, x))
+    else:
+        df['Icono'] = None
+    return df[['Icono', 'champion', 'games_played', 'winrate', 'kda_ratio', 'avg_cs_min']]
@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Callable
+
+import metrics
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+# Configuración por defecto (se puede ajustar con variables de entorno)
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURES", "3"))
+DEFAULT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+SNAPSHOT_SIZE = 512
+
+
+class CircuitOpenError(Exception):
+    """La dependencia está marcada como caída: la llamada se rechaza sin intentarla."""
+
+    def __init__(self, dependency: str, retry_in: float):
+        super().__init__(f"{dependency} no disponible; se reintentará en {retry_in:.0f}s")
+        self.dependency = dependency
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de una dependencia externa (Postgres, API de Riot...).
+
+    Tras 'failure_threshold' fallos seguidos se abre y rechaza las llamadas al
+    instante durante 'reset_timeout' segundos. Pasado ese tiempo deja pasar una
+    única llamada de prueba (semiabierto): si sale bien se cierra, si falla
+    vuelve a abrirse. Es compartido por todas las sesiones del proceso.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock  # Reloj monotónico (inyectable en los tests)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return max(0.0, self._opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        """¿Se puede intentar la llamada? En semiabierto sólo pasa la sonda."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._publish()
+                return True
+        metrics.inc('lol_circuit_rejections_total', dependency=self.name)
+        return False
+
+    def check(self):
+        """Como allow(), pero lanza CircuitOpenError si la llamada no se puede hacer."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"✅ {self.name} disponible de nuevo.")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._publish()
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state == CLOSED:
+                    print(f"⚠️ {self.name} no responde: llamadas suspendidas durante {self.reset_timeout:.0f}s.")
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+            self._publish()
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._publish()
+
+    def _publish(self):
+        metrics.set_gauge('lol_circuit_state', _STATE_VALUES[self._state], dependency=self.name)
+
+
+class SnapshotCache:
+    """Último resultado bueno de cada consulta, para servirlo mientras la dependencia está caída."""
+
+    def __init__(self, max_entries: int = SNAPSHOT_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Tuple) -> Optional[Tuple[float, Any]]:
+        """Devuelve (momento en que se guardó, valor) o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        metrics.record_cache('last_known_good', entry is not None)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Circuit breaker compartido de una dependencia ('postgres', 'riot')."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+# Últimos resultados buenos de MatchDatabase, compartidos por todas las sesiones
+DB_SNAPSHOTS = SnapshotCache()
@@ -1,8 +1,240 @@
 import os
+import re
+import json
+import time
+import itertools
+import functools
+import threading
+from collections import OrderedDict
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import psycopg2.errors
+from psycopg2.extensions import connection as PGConnection
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple, Iterator
+from zoneinfo import ZoneInfo
+import metrics
+import matchup_index
+import circuit_breaker
+import sketches
+import performance_alerts
+import rank_tracking
+
+# Migraciones sobre tablas ya existentes (idempotentes, se aplican en orden)
+SCHEMA_MIGRATIONS = [
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS game_version TEXT",
+    "CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (date)",
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS weekday SMALLINT",
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS hour SMALLINT",
+    # El heatmap se resuelve sólo con este índice (index-only scan)
+    "CREATE INDEX IF NOT EXISTS idx_matches_weekday_hour ON matches (weekday, hour) INCLUDE (win)",
+    # Última escritura de cada fila: watermark de los backups incrementales (ver backup.py).
+    # clock_timestamp() y no now(): una transacción larga no escribe con la hora en que empezó
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()",
+    "CREATE INDEX IF NOT EXISTS idx_matches_updated_at ON matches (updated_at)",
+    # Cuenta y cola de cada partida: el reparto de LP sólo mira las de la cuenta y cola del rango
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS puuid TEXT",
+    "ALTER TABLE matches ADD COLUMN IF NOT EXISTS queue_id SMALLINT",
+    "CREATE INDEX IF NOT EXISTS idx_matches_puuid_queue_date ON matches (puuid, queue_id, date)",
+]
+
+# Primera y última partida de cada parche: permite traducir un filtro de parche
+# a un rango de fechas y que Postgres descarte las particiones mensuales ajenas
+PATCH_WINDOWS_TABLE = """
+CREATE TABLE IF NOT EXISTS patch_windows (
+    patch TEXT PRIMARY KEY,
+    first_date TIMESTAMP NOT NULL,
+    last_date TIMESTAMP NOT NULL
+)
+"""
+
+# Sketches de cuantiles (ver sketches.py) por jugador, campeón y rol de cada métrica.
+# Se actualizan en la misma transacción que inserta la partida
+SKETCHES_TABLE = """
+CREATE TABLE IF NOT EXISTS match_sketches (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    sketch JSONB NOT NULL,
+    PRIMARY KEY (scope, key, metric)
+)
+"""
+
+# Estado de los detectores EWMA/CUSUM (ver performance_alerts.py) por campeón y
+# métrica; 'alarm' indica si hay alerta activa. Se actualiza al guardar partidas
+DETECTORS_TABLE = """
+CREATE TABLE IF NOT EXISTS alert_detectors (
+    champion TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    state JSONB NOT NULL,
+    alarm BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (champion, metric)
+)
+"""
+
+# Rango (league-v4) de cada cuenta en cada sincronización: una fila pequeña por
+# cambio; la diferencia entre dos snapshots se reparte entre las partidas jugadas
+RANK_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS rank_snapshots (
+    puuid TEXT NOT NULL,
+    queue TEXT NOT NULL,
+    taken_at TIMESTAMP NOT NULL,
+    tier TEXT NOT NULL,
+    rank TEXT NOT NULL,
+    lp SMALLINT NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (puuid, queue, taken_at)
+)
+"""
+RANK_SNAPSHOTS_MIGRATIONS = [
+    "ALTER TABLE rank_snapshots ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()",
+]
+
+# Ventanas entre snapshots que se revisan al guardar uno nuevo: una partida que
+# llega en una sincronización posterior aún recibe sus LP
+LP_ATTRIBUTION_WINDOWS = 20
+
+# Margen al pedir las partidas desde el último snapshot: startTime de match-v5 filtra
+# por el inicio de la partida y las ventanas de LP por el final
+LP_SYNC_MARGIN = timedelta(hours=1)
+
+# Fecha asignada a las partidas antiguas sin fecha al migrar a la tabla particionada
+UNKNOWN_DATE = datetime(1970, 1, 1)
+
+# Segundos máximos para abrir conexión: con Postgres caído es mejor fallar rápido
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+
+# Filas que trae cada viaje de un cursor de servidor (iter_*): memoria constante
+ITERSIZE = int(os.getenv("DB_ITERSIZE", "2000"))
+
+# Límite por defecto de las lecturas que acaban en la interfaz
+DEFAULT_LIMIT = 50
+
+# Los cursores de servidor necesitan un nombre único dentro de la conexión
+_cursor_ids = itertools.count(1)
+
+# Pool de conexiones del proceso: DB_POOL_MIN conexiones se quedan abiertas entre
+# reruns (con sus sentencias preparadas); por encima de DB_POOL_MAX se abre una
+# conexión suelta que se cierra al terminar
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "4"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+_pools: Dict[str, ThreadedConnectionPool] = {}  # 'primary' y 'replica'
+_pool_lock = threading.Lock()
+
+# Réplica de lectura (opcional, DSN de libpq o URL postgres://): los getters del
+# dashboard leen de ella y las escrituras van siempre al primario
+REPLICA_DSN = os.getenv("DB_REPLICA_DSN")
+# Si la réplica no informa de su LSN (no es un standby, p.ej. otro Postgres local),
+# segundos que las lecturas siguen en el primario después de una escritura
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+# LSN del primario tras la última escritura del proceso y cuándo se hizo: hasta
+# que la réplica lo haya reproducido se lee del primario (read-your-writes)
+_last_write: Optional[Tuple[str, float]] = None
+
+# Sentencias preparadas que guarda cada conexión (las menos usadas se liberan)
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE", "32"))
+
+# Canal de LISTEN/NOTIFY con las partidas nuevas o editadas (ver live_updates)
+NOTIFY_CHANNEL = 'lol_matches'
+NOTIFY_BATCH = 200  # game_ids por aviso (el payload de NOTIFY no puede pasar de 8000 bytes)
+
+# El esquema se verifica una sola vez por proceso, no en cada MatchDatabase()
+_schema_ready = False
+
+# Particiones mensuales que ya sabemos que existen (evita repetir el CREATE)
+_known_partitions = set()
+
+
+class StatementConnection(PGConnection):
+    """Conexión de psycopg2 con su caché LRU de sentencias preparadas (texto SQL -> nombre)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements: OrderedDict = OrderedDict()
+        self.statement_ids = itertools.count(1)
+
+
+def time_buckets(match_date: datetime, end_timestamp_ms: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Día de la semana (0=Domingo, como EXTRACT(DOW)) y hora de la partida en la zona del jugador.
+
+    La zona se configura con PLAYER_TIMEZONE (p.ej. 'Europe/Madrid'); por defecto
+    se usa la del equipo. Si se conoce el instante exacto (gameEndTimestamp de Riot)
+    se usa ese; si no, 'match_date' se interpreta en la hora local del equipo,
+    que es como la guardan LoLClient y AsyncLoLClient.
+    """
+    if end_timestamp_ms is not None:
+        instant = datetime.fromtimestamp(end_timestamp_ms / 1000, tz=timezone.utc)
+    else:
+        instant = match_date.astimezone()
+    player_tz = os.getenv("PLAYER_TIMEZONE")
+    local = instant.astimezone(ZoneInfo(player_tz)) if player_tz else instant.astimezone()
+    return local.isoweekday() % 7, local.hour
+
+
+def partition_name(month: datetime) -> str:
+    """Nombre de la partición mensual de 'matches' (p.ej. matches_y2025m01)."""
+    return f"matches_y{month.year:04d}m{month.month:02d}"
+
+
+def _month_bounds(value: datetime) -> Tuple[datetime, datetime]:
+    start = datetime(value.year, value.month, 1)
+    if value.month == 12:
+        return start, datetime(value.year + 1, 1, 1)
+    return start, datetime(value.year, value.month + 1, 1)
+
+
+def _instrumented(method):
+    """Registra latencia y filas devueltas de cada consulta de MatchDatabase."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            with metrics.timer('lol_db_query_seconds', method=method.__name__):
+                result = method(self, *args, **kwargs)
+        finally:
+            # psycopg2 marca la conexión como cerrada si el servidor se cae a mitad de consulta
+            if self.connection is not None and self.connection.closed:
+                self.breaker.record_failure()
+            if self.replica is not None and self.replica.closed:
+                self.replica_breaker.record_failure()
+        if isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1 if result else 0
+        metrics.observe('lol_db_query_rows', rows, method=method.__name__)
+        return result
+    return wrapper
+
+
+def _last_known_good(method):
+    """
+    Guarda el último resultado bueno de una lectura y lo sirve si Postgres no está disponible.
+
+    Con el circuit breaker abierto (o la conexión perdida) la página se pinta al
+    instante con los últimos datos conocidos en vez de vacía; self.stale lo indica.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        errors = self.errors
+        result = method(self, *args, **kwargs)
+        # Los readers capturan sus errores y devuelven vacío: eso no es un resultado bueno
+        # y no debe pisar el último snapshot (se detecta por el contador de _report_error)
+        failed = self.errors != errors
+        replica_lost = self.replica is not None and self.replica.closed
+        if not failed and self.connection is not None and not self.connection.closed and not replica_lost:
+            circuit_breaker.DB_SNAPSHOTS.put(key, result)
+            return result
+
+        snapshot = circuit_breaker.DB_SNAPSHOTS.get(key)
+        if snapshot is None:
+            return result
+        self.stale = True
+        return snapshot[1]
+    return wrapper
+
 
 class MatchDatabase:
     """Clase para gestionar la persistencia de partidas usando PostgreSQL (Supabase)."""
@@ -14,6 +246,14 @@ class MatchDatabase:
         self.user = os.getenv("DB_USER")
         self.password = os.getenv("DB_PASSWORD")
         self.port = os.getenv("DB_PORT", "5432")
+        self.breaker = circuit_breaker.get_breaker('postgres')
+        self.stale = False  # Algún resultado se ha servido de la caché (BD caída)
+        self.errors = 0  # Errores capturados por _report_error en esta instancia
+        self._pooled = False
+        # Conexión a la réplica de lectura (DB_REPLICA_DSN), abierta con la primera lectura
+        self.replica = None
+        self._replica_pooled = False
+        self.replica_breaker = circuit_breaker.get_breaker('postgres_replica')
 
         # Verificar que existen
         if not all([self.host, self.database, self.user, self.password]):
@@ -22,35 +262,231 @@ class MatchDatabase:
             self.connection = None
             return
 
-        # 2. Conexión
+        # 2. Conexión (sin intentarla si el circuit breaker sabe que la BD está caída)
+        if not self.breaker.allow():
+            self.connection = None
+            return
         try:
-            self.connection = psycopg2.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
+            with metrics.timer('lol_db_query_seconds', method='connect'):
+                self.connection, self._pooled = self._checkout('primary')
             self.connection.autocommit = False # Manejamos transacciones manualmente
+            self.breaker.record_success()
         except Exception as e:
-            print(f"Error conectando a BD: {e}")
+            self.breaker.record_failure()
+            self._report_error('connect', f"Error conectando a BD: {e}")
             self.connection = None
 
         if self.connection:
             self.create_table()
     
+    def _checkout(self, role: str) -> Tuple[StatementConnection, bool]:
+        """
+        Toma una conexión del pool del proceso para 'primary' o 'replica'.
+
+        Returns:
+            (conexión, si viene del pool). Si el pool está agotado se abre una suelta.
+        """
+        params = dict(connect_timeout=CONNECT_TIMEOUT, connection_factory=StatementConnection)
+        if role == 'replica':
+            params['dsn'] = REPLICA_DSN
+        else:
+            params.update(host=self.host, database=self.database, user=self.user,
+                          password=self.password, port=self.port)
+        with _pool_lock:
+            if role not in _pools:
+                _pools[role] = ThreadedConnectionPool(min(POOL_MIN, POOL_MAX), POOL_MAX, **params)
+            pool = _pools[role]
+        cache = 'db_pool' if role == 'primary' else 'db_replica_pool'
+        try:
+            connection = pool.getconn()
+            if connection.closed:  # Se cayó mientras esperaba en el pool
+                pool.putconn(connection, close=True)
+                connection = pool.getconn()
+            metrics.record_cache(cache, True)
+            return connection, True
+        except PoolError:
+            metrics.record_cache(cache, False)
+            return psycopg2.connect(**params), False
+
+    def _reader(self) -> StatementConnection:
+        """
+        Conexión para las lecturas del dashboard: la réplica si hay una configurada,
+        disponible y al día con las escrituras de este proceso; si no, el primario.
+        """
+        if not REPLICA_DSN or (self.replica is None and not self.replica_breaker.allow()):
+            return self.connection
+        if self.replica is None:
+            try:
+                self.replica, self._replica_pooled = self._checkout('replica')
+                self.replica.autocommit = False  # Como el primario (los cursores de servidor lo necesitan)
+                self.replica_breaker.record_success()
+            except Exception as e:
+                self.replica_breaker.record_failure()
+                self._report_error('connect_replica', f"Error conectando a la réplica (se lee del primario): {e}", failed=False)
+                self.replica = None
+                return self.connection
+        if self.replica.closed or not self._replica_caught_up():
+            metrics.inc('lol_db_reads_total', target='primary')
+            return self.connection
+        metrics.inc('lol_db_reads_total', target='replica')
+        return self.replica
+
+    def _replica_caught_up(self) -> bool:
+        """
+        Guardia read-your-writes: ¿ha reproducido la réplica la última escritura del proceso?
+
+        Con un standby se compara su LSN reproducido con el del primario tras la
+        escritura; si la réplica no lo informa, se espera DB_REPLICA_MAX_LAG segundos.
+        """
+        global _last_write
+        pending = _last_write
+        if pending is None:
+            return True
+        lsn, written_at = pending
+        caught_up = None
+        if lsn is not None:
+            try:
+                with self.replica.cursor() as cursor:
+                    cursor.execute("SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn", (lsn,))
+                    caught_up = cursor.fetchone()[0]
+            except Exception as e:
+                self.replica.rollback()
+                self._report_error('replica_lag', f"Error consultando el retraso de la réplica: {e}", failed=False)
+                return False
+        if caught_up is None:
+            caught_up = time.monotonic() - written_at >= REPLICA_MAX_LAG
+        if caught_up and _last_write is pending:
+            _last_write = None
+        return caught_up
+
+    def _remember_write(self):
+        """Anota el LSN del primario tras un commit para que las lecturas siguientes lo vean."""
+        global _last_write
+        if not REPLICA_DSN:
+            return
+        lsn = None  # Sin LSN sólo cuenta el tiempo (DB_REPLICA_MAX_LAG)
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT pg_current_wal_lsn()::text")
+                lsn = cursor.fetchone()[0]
+            self.connection.rollback()
+        except Exception as e:
+            self.connection.rollback()
+            self._report_error('remember_write', f"Error leyendo el LSN del primario: {e}", failed=False)
+        _last_write = (lsn, time.monotonic())
+
+    def _execute(self, cursor, query: str, params=()):
+        """
+        Ejecuta 'query' (con %s, como cursor.execute) como sentencia preparada.
+
+        Cada conexión prepara una consulta la primera vez que la ve y después sólo
+        envía EXECUTE con los parámetros, sin volver a analizarla ni planificarla.
+        Se guardan hasta DB_STATEMENT_CACHE sentencias por conexión (LRU).
+        """
+        connection = cursor.connection  # Primario o réplica: cada una tiene sus sentencias
+        statements = connection.statements
+        name = statements.get(query)
+        metrics.record_cache('prepared_statements', name is not None)
+        if name is not None:
+            statements.move_to_end(query)
+        else:
+            while len(statements) >= STATEMENT_CACHE_SIZE:
+                _, oldest = statements.popitem(last=False)
+                cursor.execute(f"DEALLOCATE {oldest}")
+            name = f"lol_stmt_{next(connection.statement_ids)}"
+            placeholders = itertools.count(1)
+            cursor.execute(f"PREPARE {name} AS {re.sub('%s', lambda m: f'${next(placeholders)}', query)}")
+            statements[query] = name
+
+        try:
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+        except psycopg2.errors.FeatureNotSupported:
+            # "cached plan must not change result type": el esquema cambió; se prepara de nuevo la próxima vez.
+            # La transacción ya está abortada: se deshace para poder liberar la sentencia en el servidor
+            # (si no, el nombre seguiría ocupado en la sesión y la caché y el servidor no cuadrarían)
+            statements.pop(query, None)
+            connection.rollback()
+            cursor.execute(f"DEALLOCATE {name}")
+            raise
+
+    def _report_error(self, method: str, message: str, failed: bool = True):
+        """
+        Cuenta el error en las métricas y lo muestra por consola.
+
+        Con failed=False el error se ha resuelto con un fallback (p.ej. leer del
+        primario) y el resultado de la operación sigue siendo bueno.
+        """
+        if failed:
+            self.errors += 1
+        metrics.inc('lol_db_errors_total', method=method)
+        print(message)
+
     def get_cursor(self):
         """Devuelve un cursor que permite acceder a columnas por nombre."""
         if self.connection:
             return self.connection.cursor(cursor_factory=RealDictCursor)
         return None
 
+    def _read_cursor(self):
+        """Como get_cursor, pero en la conexión de lectura (réplica si procede, ver _reader)."""
+        if self.connection:
+            return self._reader().cursor(cursor_factory=RealDictCursor)
+        return None
+
+    def _stream(self, method: str, query: str, params: Tuple = (), itersize: Optional[int] = None,
+                replica: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Ejecuta la consulta con un cursor de servidor y devuelve las filas de 'itersize' en 'itersize'.
+
+        A diferencia de fetchall(), el resultado nunca está entero en memoria. El
+        cursor vive dentro de la transacción actual: no hagas commit en esta misma
+        conexión hasta terminar de recorrerlo. Con replica=True se lee de la
+        conexión de lectura (ver _reader).
+        """
+        if not self.connection:
+            return
+        connection = self._reader() if replica else self.connection
+        rows = 0
+        try:
+            with metrics.timer('lol_db_query_seconds', method=method):
+                with connection.cursor(name=f"{method}_{next(_cursor_ids)}", cursor_factory=RealDictCursor) as cursor:
+                    cursor.itersize = itersize or ITERSIZE
+                    cursor.execute(query, params)
+                    for row in cursor:
+                        rows += 1
+                        yield row
+        except Exception as e:
+            if connection.closed:
+                (self.replica_breaker if connection is self.replica else self.breaker).record_failure()
+            else:
+                connection.rollback()
+            metrics.inc('lol_db_errors_total', method=method)
+            raise Exception(f"Error leyendo partidas: {e}")
+        finally:
+            metrics.observe('lol_db_query_rows', rows, method=method)
+
     def create_table(self):
-        """Crea la tabla 'matches' si no existe (Sintaxis PostgreSQL)."""
+        """
+        Crea la tabla 'matches' si no existe y aplica las migraciones pendientes (Sintaxis PostgreSQL).
+
+        'matches' está particionada por rangos mensuales de 'date': las consultas con
+        filtro de fechas o de parche sólo leen las particiones afectadas y las
+        temporadas antiguas se pueden desenganchar (ver detach_partitions_before).
+        Una tabla 'matches' antigua sin particionar se migra automáticamente y se
+        conserva como 'matches_legacy'.
+        """
+        global _schema_ready
+        if _schema_ready:
+            return
+
+        # 'patch' se deriva de game_version ('14.24.640.1234' -> '14.24')
         create_table_query = """
         CREATE TABLE IF NOT EXISTS matches (
-            game_id TEXT PRIMARY KEY,
-            date TIMESTAMP,
+            game_id TEXT NOT NULL,
+            date TIMESTAMP NOT NULL,
             champion TEXT NOT NULL,
             role TEXT NOT NULL,
             kills INTEGER NOT NULL,
@@ -66,130 +502,498 @@ class MatchDatabase:
             tilt_level INTEGER,
             impact_rating TEXT,
             notes TEXT,
-            vod_review BOOLEAN DEFAULT FALSE
-        )
+            vod_review BOOLEAN DEFAULT FALSE,
+            game_version TEXT,
+            patch TEXT GENERATED ALWAYS AS (substring(game_version from '^[0-9]+\\.[0-9]+')) STORED,
+            PRIMARY KEY (game_id, date)
+        ) PARTITION BY RANGE (date)
         """
         try:
             with self.connection.cursor() as cursor:
+                cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('matches')")
+                row = cursor.fetchone()
+                legacy = row is not None and row[0] == 'r'
+                cursor.execute("""
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = 'matches' AND column_name = 'weekday'
+                """)
+                needs_buckets = legacy or cursor.fetchone() is None
+                cursor.execute("SELECT to_regclass('match_sketches') IS NULL, to_regclass('alert_detectors') IS NULL")
+                needs_sketches, needs_detectors = cursor.fetchone()
+                if legacy:
+                    self._rename_legacy_table(cursor)
+
                 cursor.execute(create_table_query)
+                for migration in SCHEMA_MIGRATIONS:
+                    cursor.execute(migration)
+                cursor.execute(PATCH_WINDOWS_TABLE)
+                cursor.execute(SKETCHES_TABLE)
+                cursor.execute(DETECTORS_TABLE)
+                cursor.execute(RANK_SNAPSHOTS_TABLE)
+                for migration in RANK_SNAPSHOTS_MIGRATIONS:
+                    cursor.execute(migration)
+
+                if legacy:
+                    self._copy_legacy_matches(cursor)
             self.connection.commit()
+            _schema_ready = True
+            if needs_buckets:
+                self.backfill_time_buckets()
+            if needs_sketches or legacy:
+                self.rebuild_sketches()
+            if needs_detectors or legacy:
+                self.rebuild_detectors()
         except Exception as e:
             self.connection.rollback()
-            print(f"Error al crear la tabla: {e}")
+            _known_partitions.clear()
+            self._report_error('create_table', f"Error al crear la tabla: {e}")
+
+    def _rename_legacy_table(self, cursor):
+        """Aparta la tabla 'matches' sin particionar (con su PK e índices) como 'matches_legacy'."""
+        for migration in SCHEMA_MIGRATIONS:
+            if migration.startswith("ALTER TABLE"):
+                cursor.execute(migration)
+        cursor.execute("ALTER TABLE matches RENAME TO matches_legacy")
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = 'matches_legacy'::regclass AND contype = 'p'")
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(f'ALTER TABLE matches_legacy RENAME CONSTRAINT "{row[0]}" TO matches_legacy_pkey')
+        cursor.execute("DROP INDEX IF EXISTS idx_matches_date")
+
+    def _copy_legacy_matches(self, cursor):
+        """Copia 'matches_legacy' en la tabla particionada creando las particiones necesarias."""
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'matches' AND is_generated = 'NEVER'
+            ORDER BY ordinal_position
+        """)
+        new_columns = [r[0] for r in cursor.fetchall()]
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'matches_legacy'
+        """)
+        legacy_columns = {r[0] for r in cursor.fetchall()}
+        columns = [c for c in new_columns if c in legacy_columns]
+        select_list = ["COALESCE(date, %(unknown)s)" if c == 'date' else c for c in columns]
+
+        cursor.execute("SELECT DISTINCT date_trunc('month', COALESCE(date, %(unknown)s)) FROM matches_legacy",
+                       {'unknown': UNKNOWN_DATE})
+        for (month,) in cursor.fetchall():
+            self._ensure_partition(cursor, month)
+
+        cursor.execute(f"""
+            INSERT INTO matches ({', '.join(columns)})
+            SELECT {', '.join(select_list)} FROM matches_legacy
+            ON CONFLICT DO NOTHING
+        """, {'unknown': UNKNOWN_DATE})
+        copied = cursor.rowcount
+        cursor.execute("""
+            INSERT INTO patch_windows (patch, first_date, last_date)
+            SELECT patch, MIN(date), MAX(date) FROM matches WHERE patch IS NOT NULL GROUP BY patch
+            ON CONFLICT (patch) DO NOTHING
+        """)
+        print(f"✅ {copied} partidas migradas a 'matches' particionada (la tabla original queda como 'matches_legacy').")
+
+    def _ensure_partition(self, cursor, date: datetime):
+        """Crea (si falta) la partición mensual que corresponde a 'date'."""
+        start, end = _month_bounds(date)
+        name = partition_name(start)
+        if name in _known_partitions:
+            return
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF matches FOR VALUES FROM (%s) TO (%s)",
+            (start, end)
+        )
+        # Si la tabla ya existía como partición desenganchada, el CREATE no hace nada
+        cursor.execute(
+            "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass('matches')",
+            (name,)
+        )
+        if cursor.fetchone() is None:
+            raise Exception(f"La partición {name} está desenganchada: vuelve a engancharla "
+                            f"(ALTER TABLE matches ATTACH PARTITION ...) o renómbrala antes de guardar partidas de ese mes")
+        _known_partitions.add(name)
+
+    def prepare_import(self, cursor, table: str, staging: str):
+        """
+        Prepara la inserción de las filas de una tabla de staging (ver backup.import_table).
+
+        Crea las particiones mensuales que necesitan y amplía las ventanas de
+        parche (patch_windows no se exporta; sin ellas el filtro de parche
+        no encontraría las partidas importadas).
+        """
+        if table != 'matches':
+            return
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', date) FROM {staging} WHERE date IS NOT NULL")
+        for (month,) in cursor.fetchall():
+            self._ensure_partition(cursor, month)
+        # En staging 'patch' es una columna normal (vacía): se deriva de game_version como en matches
+        cursor.execute(f"""
+            INSERT INTO patch_windows (patch, first_date, last_date)
+            SELECT patch, MIN(date), MAX(date)
+            FROM (SELECT substring(game_version from '^[0-9]+\\.[0-9]+') AS patch, date FROM {staging}) v
+            WHERE patch IS NOT NULL AND date IS NOT NULL
+            GROUP BY patch
+            ON CONFLICT (patch) DO UPDATE SET
+                first_date = LEAST(patch_windows.first_date, EXCLUDED.first_date),
+                last_date = GREATEST(patch_windows.last_date, EXCLUDED.last_date)
+        """)
+
+    def finish_import(self, table: str):
+        """
+        Recalcula lo que se deriva de una tabla recién importada (ver backup.import_table).
+
+        Las filas importadas no pasan por _insert_match ni update_match_details,
+        así que los sketches de cuantiles y los detectores de rendimiento se
+        reconstruyen desde el historial completo, y el índice de matchups se
+        descarta (aquí y, con un NOTIFY 'reset', en los demás procesos).
+        """
+        if table != 'matches':
+            return
+        self.rebuild_sketches()
+        self.rebuild_detectors()
+        try:
+            with self.connection.cursor() as cursor:
+                self._notify_reset(cursor)
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            self._report_error('finish_import', f"Error avisando de la importación: {e}")
+        matchup_index.INDEX.invalidate()
+
+    def _patch_condition(self, patch: Optional[str]) -> Tuple[str, List[Any]]:
+        """
+        Condición SQL para filtrar por parche.
+
+        Además de 'patch = ...' se acota 'date' a la ventana del parche, de modo que
+        el planificador descarta las particiones mensuales que no lo contienen.
+        """
+        if not patch:
+            return "TRUE", []
+        with self._read_cursor() as cursor:
+            self._execute(cursor, "SELECT first_date, last_date FROM patch_windows WHERE patch = %s", (patch,))
+            window = cursor.fetchone()
+        if not window:
+            return "FALSE", []
+        return "patch = %s AND date BETWEEN %s AND %s", [patch, window['first_date'], window['last_date']]
+
+    def _insert_match(self, cursor, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Inserta una partida dentro de la transacción actual.
+
+        Returns:
+            La fila para el índice de matchups si se insertó, None si ya existía
+        """
+        game_id = match_data.get('game_id')
+        if not game_id: return None
+
+        game_duration = match_data.get('game_duration_minutes', 0)
+        if 'cs_min' not in match_data:
+            cs_min = round(match_data['cs_total'] / game_duration, 2) if game_duration > 0 else 0.0
+        else:
+            cs_min = match_data['cs_min']
+        
+        match_date = match_data.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if isinstance(match_date, str):
+            match_date = datetime.fromisoformat(match_date)
+        game_version = match_data.get('game_version')
+        weekday, hour = time_buckets(match_date, match_data.get('game_end_timestamp'))
+        
+        # Sintaxis Postgres para "INSERT OR IGNORE" es "ON CONFLICT DO NOTHING"
+        insert_query = """
+        INSERT INTO matches (
+            game_id, date, champion, role, kills, deaths, assists,
+            cs_total, cs_min, control_wards, win, enemy_champion, game_duration_minutes,
+            game_version, weekday, hour, puuid, queue_id
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (game_id, date) DO NOTHING
+        """
     
+        self._ensure_partition(cursor, match_date)
+        self._execute(cursor, insert_query, (
+            game_id,
+            match_date,
+            match_data['champion_name'],
+            match_data['role'],
+            match_data['kills'],
+            match_data['deaths'],
+            match_data['assists'],
+            match_data['cs_total'],
+            cs_min,
+            match_data['control_wards_bought'],
+            bool(match_data['win']), # Postgres usa bool
+            match_data.get('enemy_champion', 'Unknown'),
+            game_duration,
+            game_version,
+            weekday,
+            hour,
+            match_data.get('puuid'),
+            match_data.get('queue_id')
+        ))
+        if cursor.rowcount == 0:
+            return None
+        if game_version:
+            self._execute(cursor, """
+                INSERT INTO patch_windows (patch, first_date, last_date)
+                SELECT patch, %s::timestamp, %s::timestamp FROM (SELECT substring(%s::text from '^[0-9]+\\.[0-9]+') AS patch) v
+                WHERE patch IS NOT NULL
+                ON CONFLICT (patch) DO UPDATE SET
+                    first_date = LEAST(patch_windows.first_date, EXCLUDED.first_date),
+                    last_date = GREATEST(patch_windows.last_date, EXCLUDED.last_date)
+            """, (match_date, match_date, game_version))
+        return {
+            'game_id': game_id,
+            'date': match_date,
+            'champion': match_data['champion_name'],
+            'enemy_champion': match_data.get('enemy_champion', 'Unknown'),
+            'win': bool(match_data['win']),
+            'deaths': match_data['deaths'],
+            'cs_min': cs_min,
+            'notes': None,
+        }
+
+    def _notify(self, cursor, op: str, game_ids: List[str]):
+        """
+        Avisa a los dashboards abiertos (ver live_updates) de las partidas cambiadas.
+
+        NOTIFY sólo se entrega al hacer commit, así que nunca anuncia cambios que
+        acaban deshaciéndose. El payload de Postgres está limitado a 8000 bytes.
+        """
+        for i in range(0, len(game_ids), NOTIFY_BATCH):
+            payload = json.dumps({'op': op, 'game_ids': game_ids[i:i + NOTIFY_BATCH]})
+            self._execute(cursor, "SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+
+    def _notify_reset(self, cursor):
+        """
+        Avisa de un cambio masivo en 'matches' (importación, particiones desenganchadas).
+
+        Los procesos con live_updates tiran su índice de matchups y las sesiones
+        recargan el historial; este proceso lo hace con matchup_index.INDEX.invalidate()
+        después del commit.
+        """
+        payload = json.dumps({'op': 'reset', 'game_ids': []})
+        self._execute(cursor, "SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, payload))
+
+    def _update_sketches(self, cursor, matches: List[Dict[str, Any]]):
+        """
+        Añade partidas recién insertadas a sus sketches de cuantiles, dentro de la transacción actual.
+
+        Cada sketch se bloquea (FOR UPDATE, siempre en el mismo orden) mientras se
+        actualiza, así que dos sincronizaciones a la vez no pierden partidas.
+        """
+        samples: Dict[Tuple[str, str, str], List[float]] = {}
+        for match_data in matches:
+            values = sketches.match_values(match_data)
+            for scope, key in sketches.sketch_keys(match_data):
+                for metric, value in values.items():
+                    samples.setdefault((scope, key, metric), []).append(value)
+        keys = sorted(samples)
+        empty = json.dumps(sketches.KLLSketch().to_dict())
+        execute_values(cursor, """
+            INSERT INTO match_sketches (scope, key, metric, sketch) VALUES %s
+            ON CONFLICT (scope, key, metric) DO NOTHING
+        """, [key + (empty,) for key in keys])
+        rows = execute_values(cursor, """
+            SELECT scope, key, metric, sketch FROM match_sketches
+            WHERE (scope, key, metric) IN (VALUES %s)
+            ORDER BY scope, key, metric
+            FOR UPDATE
+        """, keys, fetch=True)
+
+        updated = []
+        for scope, key, metric, data in rows:
+            sketch = sketches.KLLSketch.from_dict(data)
+            for value in samples[(scope, key, metric)]:
+                sketch.update(value)
+            updated.append((scope, key, metric, json.dumps(sketch.to_dict())))
+        execute_values(cursor, """
+            UPDATE match_sketches SET sketch = v.sketch::jsonb
+            FROM (VALUES %s) AS v (scope, key, metric, sketch)
+            WHERE match_sketches.scope = v.scope AND match_sketches.key = v.key AND match_sketches.metric = v.metric
+        """, updated)
+
+    def _update_detectors(self, cursor, observations: List[Tuple[str, str, float]]):
+        """
+        Pasa observaciones (campeón, métrica, valor), en orden cronológico, por sus
+        detectores de rendimiento dentro de la transacción actual. O(1) por observación.
+        """
+        keys = sorted({(champion, metric) for champion, metric, _ in observations})
+        empty = {metric: json.dumps(performance_alerts.CusumDetector(metric).to_dict()) for _, metric in keys}
+        execute_values(cursor, """
+            INSERT INTO alert_detectors (champion, metric, state) VALUES %s
+            ON CONFLICT (champion, metric) DO NOTHING
+        """, [key + (empty[key[1]],) for key in keys])
+        rows = execute_values(cursor, """
+            SELECT champion, metric, state FROM alert_detectors
+            WHERE (champion, metric) IN (VALUES %s)
+            ORDER BY champion, metric
+            FOR UPDATE
+        """, keys, fetch=True)
+
+        detectors = {(champion, metric): performance_alerts.CusumDetector.from_dict(state)
+                     for champion, metric, state in rows}
+        for champion, metric, value in observations:
+            detectors[(champion, metric)].update(value)
+        execute_values(cursor, """
+            UPDATE alert_detectors SET state = v.state::jsonb, alarm = v.alarm
+            FROM (VALUES %s) AS v (champion, metric, state, alarm)
+            WHERE alert_detectors.champion = v.champion AND alert_detectors.metric = v.metric
+        """, [key + (json.dumps(detector.to_dict()), detector.alarm) for key, detector in detectors.items()])
+
+    def _match_observations(self, matches: List[Dict[str, Any]]) -> List[Tuple[str, str, float]]:
+        """Observaciones de los detectores para partidas recién insertadas, de la más antigua a la más reciente."""
+        ordered = sorted(matches, key=lambda m: str(m.get('date', '')))
+        return [(m['champion_name'], metric, value)
+                for m in ordered for metric, value in performance_alerts.match_observations(m)]
+
+    @_instrumented
     def save_match(self, match_data: Dict[str, Any]) -> bool:
         """Guarda una partida en la base de datos."""
         if not self.connection: return False
         
         try:
-            game_id = match_data.get('game_id')
-            if not game_id: return False
-
-            game_duration = match_data.get('game_duration_minutes', 0)
-            if 'cs_min' not in match_data:
-                cs_min = round(match_data['cs_total'] / game_duration, 2) if game_duration > 0 else 0.0
-            else:
-                cs_min = match_data['cs_min']
-            
-            match_date = match_data.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            
-            # Sintaxis Postgres para "INSERT OR IGNORE" es "ON CONFLICT DO NOTHING"
-            insert_query = """
-            INSERT INTO matches (
-                game_id, date, champion, role, kills, deaths, assists,
-                cs_total, cs_min, control_wards, win, enemy_champion, game_duration_minutes
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (game_id) DO NOTHING
-            """
-        
             with self.connection.cursor() as cursor:
-                cursor.execute(insert_query, (
-                    game_id,
-                    match_date,
-                    match_data['champion_name'],
-                    match_data['role'],
-                    match_data['kills'],
-                    match_data['deaths'],
-                    match_data['assists'],
-                    match_data['cs_total'],
-                    cs_min,
-                    match_data['control_wards_bought'],
-                    bool(match_data['win']), # Postgres usa bool
-                    match_data.get('enemy_champion', 'Unknown'),
-                    game_duration
-                ))
-                inserted = cursor.rowcount > 0
+                row = self._insert_match(cursor, match_data)
+                if row:
+                    self._update_sketches(cursor, [match_data])
+                    self._update_detectors(cursor, self._match_observations([match_data]))
+                    self._notify(cursor, 'insert', [row['game_id']])
             self.connection.commit()
-            return inserted
+
+            if row:
+                self._remember_write()
+                matchup_index.INDEX.apply_match(row)
+            return row is not None
             
         except Exception as e:
             self.connection.rollback()
+            _known_partitions.clear()  # Una partición creada en esta transacción ya no existe
+            metrics.inc('lol_db_errors_total', method='save_match')
             raise Exception(f"Error al guardar la partida: {e}")
+
+    @_instrumented
+    def save_matches(self, matches: List[Dict[str, Any]]) -> int:
+        """
+        Guarda varias partidas en una sola transacción (y un solo aviso a los dashboards).
+
+        Returns:
+            Número de partidas nuevas (las que ya existían se ignoran)
+        """
+        if not self.connection: return 0
+
+        try:
+            with self.connection.cursor() as cursor:
+                inserted = [(m, self._insert_match(cursor, m)) for m in matches]
+                rows = [row for _, row in inserted if row]
+                if rows:
+                    new_matches = [m for m, row in inserted if row]
+                    self._update_sketches(cursor, new_matches)
+                    self._update_detectors(cursor, self._match_observations(new_matches))
+                    self._notify(cursor, 'insert', [row['game_id'] for row in rows])
+            self.connection.commit()
+
+            if rows:
+                self._remember_write()
+            for row in rows:
+                matchup_index.INDEX.apply_match(row)
+            return len(rows)
+
+        except Exception as e:
+            self.connection.rollback()
+            _known_partitions.clear()
+            metrics.inc('lol_db_errors_total', method='save_matches')
+            raise Exception(f"Error al guardar las partidas: {e}")
     
+    @_instrumented
     def update_match_details(self, game_id: str, lp_change: Optional[int] = None, 
                            tilt_level: Optional[int] = None, impact_rating: Optional[str] = None, 
                            notes: Optional[str] = None, vod_review: Optional[bool] = None) -> bool:
-        """Actualiza los detalles subjetivos de una partida."""
+        """
+        Actualiza los detalles subjetivos de una partida.
+
+        El tilt pasa a los detectores de rendimiento la primera vez que se registra
+        y sólo si mantiene el orden de las partidas: si una partida posterior del
+        mismo campeón ya tiene tilt, éste se guarda pero los detectores no lo ven
+        hasta la siguiente reconstrucción (rebuild_detectors recorre por fecha).
+        """
         if not self.connection: return False
 
-        update_fields = []
-        params = []
-        
-        if lp_change is not None: 
-            update_fields.append("lp_change = %s")
-            params.append(lp_change)
-        if tilt_level is not None: 
-            update_fields.append("tilt_level = %s")
-            params.append(tilt_level)
-        if impact_rating is not None: 
-            update_fields.append("impact_rating = %s")
-            params.append(impact_rating)
-        if notes is not None: 
-            update_fields.append("notes = %s")
-            params.append(notes)
-        if vod_review is not None: 
-            update_fields.append("vod_review = %s")
-            params.append(bool(vod_review))
-        
-        if not update_fields: return False
-        
-        params.append(game_id)
-        update_query = f"UPDATE matches SET {', '.join(update_fields)} WHERE game_id = %s"
-        
+        if all(value is None for value in (lp_change, tilt_level, impact_rating, notes, vod_review)):
+            return False
+
+        # Una sola forma de UPDATE (preparada una vez): los campos a None conservan su valor.
+        # Devuelve el tilt anterior (sólo el primero que se registra cuenta para los detectores)
+        # y si alguna partida posterior del campeón ya tiene tilt (llegaría fuera de orden)
+        update_query = """
+        UPDATE matches SET
+            lp_change = COALESCE(%s, matches.lp_change),
+            tilt_level = COALESCE(%s, matches.tilt_level),
+            impact_rating = COALESCE(%s, matches.impact_rating),
+            notes = COALESCE(%s, matches.notes),
+            vod_review = COALESCE(%s, matches.vod_review),
+            updated_at = clock_timestamp()
+        FROM (SELECT game_id, date, tilt_level FROM matches WHERE game_id = %s FOR UPDATE) AS old
+        WHERE matches.game_id = old.game_id AND matches.date = old.date
+        RETURNING matches.champion, old.tilt_level, matches.tilt_level, EXISTS (
+            SELECT 1 FROM matches later
+            WHERE later.champion = matches.champion AND later.date > matches.date AND later.tilt_level IS NOT NULL
+        )
+        """
+        params = (lp_change, tilt_level, impact_rating, notes,
+                  None if vod_review is None else bool(vod_review), game_id)
+
         try:
             with self.connection.cursor() as cursor:
-                cursor.execute(update_query, params)
-                updated = cursor.rowcount > 0
+                self._execute(cursor, update_query, params)
+                rows = cursor.fetchall()
+                updated = len(rows) > 0
+                if updated:
+                    new_tilts = [(champion, 'tilt_level', float(new)) for champion, old, new, out_of_order in rows
+                                 if old is None and new is not None and not out_of_order]
+                    if new_tilts:
+                        self._update_detectors(cursor, new_tilts)
+                    self._notify(cursor, 'update', [game_id])
             self.connection.commit()
+
+            if updated:
+                self._remember_write()
+                matchup_index.INDEX.apply_details(game_id, notes=notes)
             return updated
         except Exception as e:
             self.connection.rollback()
+            metrics.inc('lol_db_errors_total', method='update_match_details')
             raise Exception(f"Error al actualizar: {e}")
     
+    @_instrumented
+    @_last_known_good
     def get_recent_matches(self, limit: int = 10) -> List[Dict[str, Any]]:
         if not self.connection: return []
         select_query = "SELECT * FROM matches ORDER BY date DESC LIMIT %s"
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute(select_query, (limit,))
+            with self._read_cursor() as cursor:
+                self._execute(cursor, select_query, (limit,))
                 return cursor.fetchall()
         except Exception as e:
-            print(f"Error: {e}")
+            self._report_error('get_recent_matches', f"Error: {e}")
             return []
         
-    def get_stats_summary(self) -> Dict[str, Any]:
+    @_instrumented
+    @_last_known_good
+    def get_stats_summary(self, patch: Optional[str] = None) -> Dict[str, Any]:
         if not self.connection: return {}
         try:
-            with self.get_cursor() as cursor:
+            with self._read_cursor() as cursor:
+                condition, params = self._patch_condition(patch)
+
                 # Stats Generales
-                cursor.execute("SELECT COUNT(*) as total, SUM(CASE WHEN win THEN 1 ELSE 0 END) as wins FROM matches")
+                self._execute(cursor, f"SELECT COUNT(*) as total, SUM(CASE WHEN win THEN 1 ELSE 0 END) as wins FROM matches WHERE {condition}", params)
                 gen = cursor.fetchone()
                 total_games = gen['total'] if gen else 0
                 total_wins = gen['wins'] if gen and gen['wins'] else 0
                 winrate = (total_wins / total_games * 100) if total_games > 0 else 0.0
                 
                 # Promedios
-                cursor.execute("SELECT AVG(kills) as k, AVG(deaths) as d, AVG(assists) as a, AVG(cs_min) as cs FROM matches")
+                self._execute(cursor, f"SELECT AVG(kills) as k, AVG(deaths) as d, AVG(assists) as a, AVG(cs_min) as cs FROM matches WHERE {condition}", params)
                 avgs = cursor.fetchone()
                 
             return {
@@ -200,40 +1004,175 @@ class MatchDatabase:
                 'cs_min_avg': round(avgs['cs'], 1) if avgs and avgs['cs'] else 0
             }
         except Exception as e:
-            print(f"Error stats: {e}")
+            self._report_error('get_stats_summary', f"Error stats: {e}")
             return {}
 
+    @_instrumented
+    @_last_known_good
     def get_match_by_id(self, game_id: str) -> Optional[Dict[str, Any]]:
         if not self.connection: return None
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute("SELECT * FROM matches WHERE game_id = %s", (game_id,))
+            with self._read_cursor() as cursor:
+                self._execute(cursor, "SELECT * FROM matches WHERE game_id = %s", (game_id,))
                 return cursor.fetchone()
-        except Exception:
+        except Exception as e:
+            self._report_error('get_match_by_id', f"Error partida: {e}")
             return None
 
-    def get_matchup_notes(self, my_champion: str, enemy_champion: str) -> List[Dict[str, Any]]:
+    @_instrumented
+    @_last_known_good
+    def get_matchup_notes(self, my_champion: str, enemy_champion: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
         if not self.connection: return []
-        query = "SELECT * FROM matches WHERE champion = %s AND enemy_champion = %s ORDER BY date DESC"
+        query = "SELECT * FROM matches WHERE champion = %s AND enemy_champion = %s ORDER BY date DESC LIMIT %s"
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute(query, (my_champion, enemy_champion))
+            with self._read_cursor() as cursor:
+                cursor.execute(query, (my_champion, enemy_champion, limit))
                 return cursor.fetchall()
-        except Exception:
+        except Exception as e:
+            self._report_error('get_matchup_notes', f"Error matchup: {e}")
             return []
 
-    def get_matches_vs_enemy(self, enemy_champion_pattern: str) -> List[Dict[str, Any]]:
+    @_instrumented
+    @_last_known_good
+    def get_matches_vs_enemy(self, enemy_champion_pattern: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
         if not self.connection: return []
         # En Postgres LIKE es Case Sensitive, ILIKE no lo es
-        query = "SELECT * FROM matches WHERE enemy_champion ILIKE %s ORDER BY date DESC"
+        query = "SELECT * FROM matches WHERE enemy_champion ILIKE %s ORDER BY date DESC LIMIT %s"
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute(query, (enemy_champion_pattern,))
+            with self._read_cursor() as cursor:
+                cursor.execute(query, (enemy_champion_pattern, limit))
                 return cursor.fetchall()
-        except Exception:
+        except Exception as e:
+            self._report_error('get_matches_vs_enemy', f"Error matchup: {e}")
             return []
+
+    # --- Lecturas en streaming (exportaciones, análisis, reprocesados) ---
+    def iter_matches(self, columns: Optional[List[str]] = None, since: Optional[datetime] = None,
+                     patch: Optional[str] = None, itersize: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las partidas (más antigua primero) sin cargarlas en memoria.
+
+        Args:
+            columns: Columnas a leer (por defecto todas)
+            since: Sólo partidas posteriores a esta fecha
+            patch: Sólo partidas de este parche (p.ej. '14.24')
+            itersize: Filas por viaje al servidor (por defecto DB_ITERSIZE)
+        """
+        if not self.connection: return iter(())
+        condition, params = self._patch_condition(patch)
+        if since is not None:
+            condition, params = f"{condition} AND date > %s", params + [since]
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM matches WHERE {condition} ORDER BY date"
+        return self._stream('iter_matches', query, tuple(params), itersize, replica=True)
+
+    def iter_matchup_notes(self, my_champion: str, enemy_champion: str,
+                           itersize: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Como get_matchup_notes, pero sin límite y en streaming."""
+        query = "SELECT * FROM matches WHERE champion = %s AND enemy_champion = %s ORDER BY date DESC"
+        return self._stream('iter_matchup_notes', query, (my_champion, enemy_champion), itersize, replica=True)
+
+    def iter_matches_vs_enemy(self, enemy_champion_pattern: str,
+                              itersize: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Como get_matches_vs_enemy, pero sin límite y en streaming."""
+        query = "SELECT * FROM matches WHERE enemy_champion ILIKE %s ORDER BY date DESC"
+        return self._stream('iter_matches_vs_enemy', query, (enemy_champion_pattern,), itersize, replica=True)
     
-    def get_champion_performance(self) -> List[Dict[str, Any]]:
+    @_instrumented
+    @_last_known_good
+    def get_trend(self, last_n: Optional[int] = None, days: Optional[int] = None,
+                  start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  rolling: int = 5, patch: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Serie temporal de una ventana de partidas calculada en el servidor.
+
+        Args:
+            last_n: Sólo las últimas N partidas
+            days: Sólo las partidas de los últimos N días
+            start: Fecha inicial (incluida)
+            end: Fecha final (excluida)
+            rolling: Tamaño de la media móvil en partidas
+            patch: Sólo las partidas de ese parche ('14.24')
+
+        Returns:
+            Lista cronológica (de más antigua a más reciente) con date, champion, win,
+            lp_change, cumulative_lp, rolling_winrate, rolling_cs_min y rolling_deaths
+        """
+        if not self.connection: return []
+
+        conditions = []
+        params: List[Any] = []
+        if days is not None:
+            conditions.append("date >= %s")
+            params.append(datetime.now() - timedelta(days=days))
+        if start is not None:
+            conditions.append("date >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("date < %s")
+            params.append(end)
+        if patch:
+            condition, patch_params = self._patch_condition(patch)
+            conditions.append(condition)
+            params.extend(patch_params)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit = "LIMIT %s" if last_n is not None else ""
+        if last_n is not None:
+            params.append(last_n)
+        params.append(max(rolling, 1) - 1)
+
+        # La ventana se recorta con el índice de 'date' (y el de parche con las
+        # particiones) y las acumuladas se calculan con funciones de ventana:
+        # a Python sólo llega la serie final
+        query = f"""
+        WITH windowed AS (
+            SELECT game_id, date, champion, win, lp_change, cs_min, deaths
+            FROM matches
+            {where}
+            ORDER BY date DESC
+            {limit}
+        )
+        SELECT
+            game_id,
+            date,
+            champion,
+            win,
+            lp_change,
+            CAST(SUM(COALESCE(lp_change, 0)) OVER cumulative AS INTEGER) as cumulative_lp,
+            CAST(AVG(CASE WHEN win THEN 100.0 ELSE 0.0 END) OVER moving AS FLOAT) as rolling_winrate,
+            CAST(AVG(cs_min) OVER moving AS FLOAT) as rolling_cs_min,
+            CAST(AVG(deaths) OVER moving AS FLOAT) as rolling_deaths
+        FROM windowed
+        WINDOW
+            cumulative AS (ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW),
+            moving AS (ORDER BY date ROWS BETWEEN %s PRECEDING AND CURRENT ROW)
+        ORDER BY date
+        """
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Exception as e:
+            self._report_error('get_trend', f"Error tendencia: {e}")
+            return []
+
+    @_instrumented
+    @_last_known_good
+    def get_latest_patch(self) -> Optional[str]:
+        """Devuelve el parche ('14.24') de la partida más reciente con versión registrada."""
+        if not self.connection: return None
+        query = "SELECT game_version FROM matches WHERE game_version IS NOT NULL ORDER BY date DESC LIMIT 1"
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(query)
+                row = cursor.fetchone()
+            return '.'.join(row['game_version'].split('.')[:2]) if row else None
+        except Exception as e:
+            self._report_error('get_latest_patch', f"Error parche: {e}")
+            return None
+
+    @_instrumented
+    @_last_known_good
+    def get_champion_performance(self, patch: Optional[str] = None) -> List[Dict[str, Any]]:
         if not self.connection: return []
         # Sintaxis Postgres para CAST de booleanos a int para sumar: SUM(win::int)
         query = """
@@ -244,20 +1183,26 @@ class MatchDatabase:
             AVG(kills) as avg_kills,
             AVG(deaths) as avg_deaths,
             AVG(assists) as avg_assists,
-            AVG(cs_min) as avg_cs_min
+            AVG(cs_min) as avg_cs_min,
+            (CAST(SUM(CASE WHEN win THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*)) * 100 as winrate,
+            CAST(SUM(kills + assists) AS FLOAT) / GREATEST(SUM(deaths), 1) as kda_ratio
         FROM matches
+        WHERE {condition}
         GROUP BY champion
         ORDER BY games_played DESC, wins DESC
         """
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute(query)
+            with self._read_cursor() as cursor:
+                condition, params = self._patch_condition(patch)
+                cursor.execute(query.format(condition=condition), params)
                 return cursor.fetchall()
         except Exception as e:
-            print(f"Error champ perf: {e}")
+            self._report_error('get_champion_performance', f"Error champ perf: {e}")
             return []
         
-    def get_nemesis_list(self, min_games: int = 2) -> List[Dict[str, Any]]:
+    @_instrumented
+    @_last_known_good
+    def get_nemesis_list(self, min_games: int = 2, patch: Optional[str] = None) -> List[Dict[str, Any]]:
         if not self.connection: return []
         query = """
         SELECT 
@@ -268,41 +1213,464 @@ class MatchDatabase:
             AVG(cs_min) as avg_cs_min,
             AVG(deaths) as avg_deaths
         FROM matches
-        WHERE enemy_champion IS NOT NULL AND enemy_champion != 'Unknown'
+        WHERE enemy_champion IS NOT NULL AND enemy_champion != 'Unknown' AND {condition}
         GROUP BY enemy_champion
         HAVING COUNT(*) >= %s
         ORDER BY winrate ASC, games DESC
         LIMIT 5
         """
         try:
-            with self.get_cursor() as cursor:
-                cursor.execute(query, (min_games,))
+            with self._read_cursor() as cursor:
+                condition, params = self._patch_condition(patch)
+                self._execute(cursor, query.format(condition=condition), params + [min_games])
                 return cursor.fetchall()
         except Exception as e:
-            print(e)
+            self._report_error('get_nemesis_list', f"Error nemesis: {e}")
             return []
 
-    def get_activity_heatmap_data(self) -> List[Dict[str, Any]]:
+    @_instrumented
+    @_last_known_good
+    def get_activity_heatmap_data(self, patch: Optional[str] = None) -> List[Dict[str, Any]]:
         if not self.connection: return []
-        # PostgreSQL usa EXTRACT(DOW ...) para día semana (0=Domingo)
-        # y EXTRACT(HOUR ...) para hora
+        # weekday (0=Domingo) y hour se calculan al guardar, en la zona del jugador
+        # (ver time_buckets); la agregación sale entera de idx_matches_weekday_hour
         query = """
         SELECT 
-            CAST(EXTRACT(DOW FROM date) AS INTEGER) as weekday,
-            CAST(EXTRACT(HOUR FROM date) AS INTEGER) as hour,
+            weekday,
+            hour,
             COUNT(*) as games,
             SUM(CASE WHEN win THEN 1 ELSE 0 END) as wins
         FROM matches
+        WHERE weekday IS NOT NULL AND {condition}
         GROUP BY weekday, hour
         """
+        try:
+            with self._read_cursor() as cursor:
+                condition, params = self._patch_condition(patch)
+                cursor.execute(query.format(condition=condition), params)
+                return cursor.fetchall()
+        except Exception as e:
+            self._report_error('get_activity_heatmap_data', f"Error heatmap: {e}")
+            return []
+
+    def backfill_time_buckets(self, recompute: bool = False, batch_size: int = 1000) -> int:
+        """
+        Calcula weekday/hour de las partidas que no los tienen.
+
+        Args:
+            recompute: Recalcula todas las partidas (p.ej. tras cambiar PLAYER_TIMEZONE)
+            batch_size: Partidas actualizadas por sentencia
+
+        Returns:
+            Número de partidas actualizadas
+        """
+        if not self.connection: return 0
+        where = "TRUE" if recompute else "weekday IS NULL OR hour IS NULL"
+
+        def flush(cursor, batch):
+            execute_values(cursor, """
+                UPDATE matches SET weekday = v.weekday, hour = v.hour, updated_at = clock_timestamp()
+                FROM (VALUES %s) AS v (game_id, date, weekday, hour)
+                WHERE matches.game_id = v.game_id AND matches.date = v.date
+            """, batch, template="(%s, %s::timestamp, %s::smallint, %s::smallint)")
+
+        try:
+            updated, batch = 0, []
+            with self.connection.cursor() as cursor:
+                # Se leen en streaming: el historial completo nunca está en memoria
+                for row in self._stream('backfill_time_buckets', f"SELECT game_id, date FROM matches WHERE {where}",
+                                        itersize=batch_size):
+                    batch.append((row['game_id'], row['date']) + time_buckets(row['date']))
+                    if len(batch) >= batch_size:
+                        flush(cursor, batch)
+                        updated, batch = updated + len(batch), []
+                if batch:
+                    flush(cursor, batch)
+                    updated += len(batch)
+            self.connection.commit()
+            return updated
+        except Exception as e:
+            self.connection.rollback()
+            self._report_error('backfill_time_buckets', f"Error calculando franjas horarias: {e}")
+            return 0
+
+    @_instrumented
+    @_last_known_good
+    def get_sketches(self, keys: Tuple[Tuple[str, str], ...]) -> Dict[Tuple[str, str], Dict[str, sketches.KLLSketch]]:
+        """
+        Sketches de cuantiles de varios ámbitos en una sola consulta.
+
+        Args:
+            keys: Ámbitos (scope, key), p.ej. (('player', ''), ('champion', 'Jax'), ('role', 'TOP'))
+
+        Returns:
+            {(scope, key): {métrica: KLLSketch}}; los ámbitos sin partidas no aparecen
+        """
+        if not self.connection or not keys: return {}
+        query = "SELECT scope, key, metric, sketch FROM match_sketches WHERE (scope, key) IN %s"
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(query, (tuple(keys),))
+                result: Dict[Tuple[str, str], Dict[str, sketches.KLLSketch]] = {}
+                for row in cursor.fetchall():
+                    result.setdefault((row['scope'], row['key']), {})[row['metric']] = sketches.KLLSketch.from_dict(row['sketch'])
+                return result
+        except Exception as e:
+            self._report_error('get_sketches', f"Error sketches: {e}")
+            return {}
+
+    def rebuild_sketches(self) -> int:
+        """
+        Recalcula todos los sketches de cuantiles desde el historial (en streaming).
+
+        Se hace al crear la tabla, al desenganchar particiones y al importar un
+        backup; después los sketches se mantienen al insertar cada partida.
+
+        Returns:
+            Número de sketches guardados
+        """
+        if not self.connection: return 0
+        query = "SELECT champion, role, kills, deaths, assists, cs_min, game_duration_minutes FROM matches"
+        try:
+            with self.connection.cursor() as cursor:
+                # Las inserciones concurrentes esperan y se aplican sobre el resultado
+                cursor.execute("LOCK TABLE match_sketches IN EXCLUSIVE MODE")
+                built = sketches.build(self._stream('rebuild_sketches', query))
+                cursor.execute("DELETE FROM match_sketches")
+                if built:
+                    execute_values(cursor, "INSERT INTO match_sketches (scope, key, metric, sketch) VALUES %s",
+                                   [key + (json.dumps(sketch.to_dict()),) for key, sketch in built.items()])
+            self.connection.commit()
+            return len(built)
+        except Exception as e:
+            self.connection.rollback()
+            self._report_error('rebuild_sketches', f"Error calculando sketches: {e}")
+            return 0
+
+    @_instrumented
+    @_last_known_good
+    def get_performance_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Alertas activas de los detectores de rendimiento (sin recorrer el historial).
+
+        Returns:
+            Lista de {'champion', 'metric', 'message'}, las más fuertes primero
+        """
+        if not self.connection: return []
+        query = "SELECT champion, metric, state FROM alert_detectors WHERE alarm"
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+        except Exception as e:
+            self._report_error('get_performance_alerts', f"Error alertas: {e}")
+            return []
+        detectors = [(row['champion'], performance_alerts.CusumDetector.from_dict(row['state'])) for row in rows]
+        detectors.sort(key=lambda item: item[1].cusum)
+        return [{'champion': champion, 'metric': detector.metric,
+                 'message': performance_alerts.alert_message(champion, detector)}
+                for champion, detector in detectors]
+
+    def rebuild_detectors(self) -> int:
+        """
+        Recalcula el estado de los detectores de rendimiento recorriendo el historial en orden.
+
+        Se hace al crear la tabla y al importar un backup; después se actualizan
+        con cada partida guardada.
+
+        Returns:
+            Número de detectores guardados
+        """
+        if not self.connection: return 0
+        query = """
+        SELECT champion, win, deaths, cs_min, game_duration_minutes, tilt_level
+        FROM matches ORDER BY date
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("LOCK TABLE alert_detectors IN EXCLUSIVE MODE")
+                built = performance_alerts.build(self._stream('rebuild_detectors', query))
+                cursor.execute("DELETE FROM alert_detectors")
+                if built:
+                    execute_values(cursor, "INSERT INTO alert_detectors (champion, metric, state, alarm) VALUES %s",
+                                   [key + (json.dumps(detector.to_dict()), detector.alarm) for key, detector in built.items()])
+            self.connection.commit()
+            return len(built)
+        except Exception as e:
+            self.connection.rollback()
+            self._report_error('rebuild_detectors', f"Error calculando detectores: {e}")
+            return 0
+
+    def _attribute_lp(self, cursor, puuid: str, queue: str) -> List[str]:
+        """
+        Reparte entre las partidas los LP de las últimas ventanas entre snapshots, dentro de la transacción actual.
+
+        Sólo cuentan las partidas de esa cuenta y cola (las guardadas antes de
+        registrar puuid y queue_id no entran en ninguna ventana). Una ventana sólo
+        se reparte si esas partidas coinciden con las que cuenta league-v4 (número
+        y victorias); si no (faltan partidas por sincronizar...) se deja para más adelante.
+
+        Returns:
+            game_ids a los que se han asignado LP
+        """
+        self._execute(cursor, """
+            SELECT taken_at, tier, rank, lp, wins, losses FROM rank_snapshots
+            WHERE puuid = %s AND queue = %s ORDER BY taken_at DESC LIMIT %s
+        """, (puuid, queue, LP_ATTRIBUTION_WINDOWS + 1))
+        snapshots = cursor.fetchall()[::-1]
+        if len(snapshots) < 2:
+            return []
+        self._execute(cursor, """
+            SELECT game_id, date, win, lp_change FROM matches
+            WHERE puuid = %s AND queue_id = %s AND date > %s AND date <= %s ORDER BY date FOR UPDATE
+        """, (puuid, rank_tracking.QUEUE_IDS.get(queue), snapshots[0][0], snapshots[-1][0]))
+        games = cursor.fetchall()
+
+        updates = []
+        for prev, cur in zip(snapshots, snapshots[1:]):
+            window = [g for g in games if prev[0] < g[1] <= cur[0]]
+            pending = [g for g in window if g[3] is None]
+            if not pending:
+                continue
+            played, won = (cur[4] + cur[5]) - (prev[4] + prev[5]), cur[4] - prev[4]
+            if len(window) != played or sum(1 for g in window if g[2]) != won:
+                continue
+            # Los LP puestos a mano se respetan y se descuentan del total de la ventana
+            delta = (rank_tracking.ladder_points(*cur[1:4]) - rank_tracking.ladder_points(*prev[1:4])
+                     - sum(g[3] for g in window if g[3] is not None))
+            values = rank_tracking.split_lp(delta, [g[2] for g in pending])
+            if values is not None:
+                updates.extend((g[0], g[1], lp) for g, lp in zip(pending, values))
+
+        if updates:
+            execute_values(cursor, """
+                UPDATE matches SET lp_change = v.lp_change, updated_at = clock_timestamp()
+                FROM (VALUES %s) AS v (game_id, date, lp_change)
+                WHERE matches.game_id = v.game_id AND matches.date = v.date AND matches.lp_change IS NULL
+            """, updates)
+            metrics.inc('lol_lp_attributed_total', len(updates))
+        return [game_id for game_id, _, _ in updates]
+
+    @_instrumented
+    def save_rank_snapshot(self, puuid: str, snapshot: Dict[str, Any], taken_at: Optional[datetime] = None) -> int:
+        """
+        Guarda el rango de una cuenta y asigna los LP a las partidas que aún no los tienen.
+
+        El rango debe consultarse antes de descargar las partidas de la sincronización:
+        una partida que termina entre las dos llamadas cae así en la ventana siguiente
+        en lugar de descuadrar esta. Un snapshot igual al anterior no se guarda.
+
+        Args:
+            puuid: PUUID de la cuenta
+            snapshot: Rango de una cola (ver rank_tracking.queue_entry)
+            taken_at: Momento de la consulta a league-v4 (hora local, como 'date'; por defecto ahora)
+
+        Returns:
+            Número de partidas a las que se han asignado LP
+        """
+        if not self.connection: return 0
+        taken_at = taken_at or datetime.now()
+        current = (snapshot['tier'], snapshot['rank'], snapshot['lp'], snapshot['wins'], snapshot['losses'])
+
+        try:
+            with self.connection.cursor() as cursor:
+                self._execute(cursor, """
+                    SELECT tier, rank, lp, wins, losses FROM rank_snapshots
+                    WHERE puuid = %s AND queue = %s ORDER BY taken_at DESC LIMIT 1 FOR UPDATE
+                """, (puuid, snapshot['queue']))
+                last = cursor.fetchone()
+                attributed = []
+                if last is None or tuple(last) != current:
+                    self._execute(cursor, """
+                        INSERT INTO rank_snapshots (puuid, queue, taken_at, tier, rank, lp, wins, losses)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT DO NOTHING
+                    """, (puuid, snapshot['queue'], taken_at) + current)
+                    attributed = self._attribute_lp(cursor, puuid, snapshot['queue'])
+                    if attributed:
+                        self._notify(cursor, 'update', attributed)
+            self.connection.commit()
+
+            if attributed:
+                self._remember_write()
+            return len(attributed)
+        except Exception as e:
+            self.connection.rollback()
+            metrics.inc('lol_db_errors_total', method='save_rank_snapshot')
+            raise Exception(f"Error al guardar el rango: {e}")
+
+    @_instrumented
+    def get_lp_sync_start(self, puuid: str, queue: str = 'RANKED_SOLO_5x5') -> Optional[datetime]:
+        """
+        Desde cuándo pedir partidas para que la ventana del próximo snapshot quede completa.
+
+        Returns:
+            El último snapshot de la cuenta en esa cola menos LP_SYNC_MARGIN
+            (startTime de match-v5), o None si aún no tiene ninguno
+        """
+        if not self.connection: return None
+        query = "SELECT max(taken_at) AS taken_at FROM rank_snapshots WHERE puuid = %s AND queue = %s"
+        try:
+            with self._read_cursor() as cursor:
+                self._execute(cursor, query, (puuid, queue))
+                row = cursor.fetchone()
+            return row['taken_at'] - LP_SYNC_MARGIN if row and row['taken_at'] else None
+        except Exception as e:
+            self._report_error('get_lp_sync_start', f"Error rango: {e}")
+            return None
+
+    @_instrumented
+    @_last_known_good
+    def get_current_rank(self, puuid: str, queue: str = 'RANKED_SOLO_5x5') -> Optional[Dict[str, Any]]:
+        """
+        Último rango registrado de una cuenta en esa cola.
+
+        Args:
+            puuid: Cuenta (con varias sincronizadas, cada una tiene su rango)
+            queue: queueType de league-v4
+        """
+        if not self.connection: return None
+        query = """
+        SELECT puuid, queue, taken_at, tier, rank, lp, wins, losses FROM rank_snapshots
+        WHERE puuid = %s AND queue = %s ORDER BY taken_at DESC LIMIT 1
+        """
+        try:
+            with self._read_cursor() as cursor:
+                self._execute(cursor, query, (puuid, queue))
+                return cursor.fetchone()
+        except Exception as e:
+            self._report_error('get_current_rank', f"Error rango: {e}")
+            return None
+
+    @_instrumented
+    @_last_known_good
+    def get_patches(self) -> List[str]:
+        """Parches con partidas registradas, del más reciente al más antiguo."""
+        if not self.connection: return []
+        try:
+            with self._read_cursor() as cursor:
+                cursor.execute("SELECT patch FROM patch_windows ORDER BY last_date DESC")
+                return [row['patch'] for row in cursor.fetchall()]
+        except Exception as e:
+            self._report_error('get_patches', f"Error parches: {e}")
+            return []
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """Particiones mensuales enganchadas a 'matches' con su rango de fechas."""
+        if not self.connection: return []
+        query = """
+        SELECT child.relname as name, pg_get_expr(child.relpartbound, child.oid) as bounds
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.oid = to_regclass('matches')
+        ORDER BY child.relname
+        """
         try:
             with self.get_cursor() as cursor:
                 cursor.execute(query)
                 return cursor.fetchall()
         except Exception as e:
-            print(e)
+            self._report_error('list_partitions', f"Error particiones: {e}")
             return []
 
+    def detach_partitions_before(self, cutoff: datetime) -> List[str]:
+        """
+        Desengancha de 'matches' las particiones mensuales anteriores a 'cutoff'.
+
+        Las tablas desenganchadas (matches_yAAAAmMM) siguen existiendo con sus datos,
+        pero dejan de aparecer en las consultas; se pueden exportar y borrar, o volver
+        a enganchar con ALTER TABLE matches ATTACH PARTITION.
+
+        Args:
+            cutoff: Se desenganchan los meses que terminan antes o en esta fecha
+
+        Returns:
+            Nombres de las particiones desenganchadas
+        """
+        if not self.connection: return []
+        detached = []
+        try:
+            with self.connection.cursor() as cursor:
+                for partition in self.list_partitions():
+                    name = partition['name']
+                    try:
+                        month = datetime.strptime(name, 'matches_y%Ym%m')
+                    except ValueError:
+                        continue  # Particiones creadas a mano: no se tocan
+                    if _month_bounds(month)[1] <= cutoff:
+                        cursor.execute(f"ALTER TABLE matches DETACH PARTITION {name}")
+                        detached.append(name)
+                if detached:
+                    self._notify_reset(cursor)
+            self.connection.commit()
+            _known_partitions.difference_update(detached)
+            if detached:
+                # Percentiles, Scout y Nemesis dejan de contar las temporadas desenganchadas
+                matchup_index.INDEX.invalidate()
+                self.rebuild_sketches()
+            return detached
+        except Exception as e:
+            self.connection.rollback()
+            metrics.inc('lol_db_errors_total', method='detach_partitions_before')
+            raise Exception(f"Error al desenganchar particiones: {e}")
+
+    def load_store(self, columns: Optional[List[str]] = None, since: Optional[datetime] = None,
+                   patch: Optional[str] = None, itersize: Optional[int] = None):
+        """
+        Carga el historial en un MatchStore (columnas compactas para análisis en memoria).
+
+        Las filas llegan en streaming con iter_matches, así que nunca coexisten
+        todas como dicts. Mismos filtros que iter_matches.
+
+        Returns:
+            MatchStore con las partidas, de la más antigua a la más reciente
+        """
+        from match_store import MatchStore  # NumPy sólo se carga si se usa
+        store = MatchStore()
+        if self.connection:
+            store.extend(self.iter_matches(columns=columns, since=since, patch=patch, itersize=itersize))
+        return store
+
+    def get_matchup_index(self) -> matchup_index.MatchupIndex:
+        """
+        Devuelve el índice de enfrentamientos en memoria, construyéndolo la primera vez.
+
+        Se lee 'matches' una única vez por proceso; después el índice se actualiza
+        con cada save_match/update_match_details y las consultas no van a la BD.
+        """
+        index = matchup_index.INDEX
+        if index.ready or not self.connection:
+            return index
+
+        index.start_build()
+        # Del primario: con la réplica retrasada se perderían partidas recién guardadas
+        query = f"SELECT {', '.join(matchup_index.INDEX_COLUMNS)} FROM matches"
+        try:
+            index.build(self._stream('get_matchup_index', query))
+        except Exception as e:
+            index.abort_build()
+            print(f"Error índice matchups: {e}")
+        return index
+
     def close(self):
-        if self.connection: 
-            self.connection.close()
\ No newline at end of file
+        """Devuelve las conexiones a sus pools (o las cierra si no venían de ellos)."""
+        for role, connection, pooled in (('primary', self.connection, self._pooled),
+                                         ('replica', self.replica, self._replica_pooled)):
+            if not connection:
+                continue
+            if pooled and role in _pools:
+                _pools[role].putconn(connection, close=bool(connection.closed))
+            else:
+                connection.close()
+        self.connection = None
+        self.replica = None
+
+    def __enter__(self) -> 'MatchDatabase':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # También con excepciones y con st.rerun() (que se lanza como excepción):
+        # una conexión que no vuelve al pool se queda ocupada para siempre
+        self.close()
+        return False
\ No newline at end of file
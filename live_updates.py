@@ -0,0 +1,155 @@
+import os
+import json
+import select
+import threading
+from collections import deque
+from typing import Optional, List, Dict, Any, Tuple
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+import metrics
+import matchup_index
+from database import NOTIFY_CHANNEL, CONNECT_TIMEOUT
+
+# Cambios que se recuerdan para las sesiones que van por detrás
+HISTORY_SIZE = 500
+# Espera entre reintentos si se pierde la conexión de escucha
+RECONNECT_DELAY = 5.0
+POLL_TIMEOUT = 1.0
+
+
+class MatchListener(threading.Thread):
+    """
+    Escucha los NOTIFY de MatchDatabase y publica las partidas cambiadas para las sesiones abiertas.
+
+    Hay una sola conexión de escucha por proceso. Con cada aviso se leen sólo las
+    partidas afectadas y se añaden a un historial numerado; cada sesión pide
+    changes_since(último número visto) desde un st.fragment, sin tocar la BD.
+    También aplica al índice de matchups las escrituras de otros procesos (cron,
+    otro equipo).
+    """
+
+    def __init__(self, **connect_params):
+        super().__init__(name='match-listener', daemon=True)
+        self._params = connect_params
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=HISTORY_SIZE)
+        self._seq = 0
+        self._floor = 0  # Los cambios con número <= floor pueden haberse perdido
+        self._stop_event = threading.Event()
+        self.connected = False
+
+    @property
+    def seq(self) -> int:
+        """Número del último cambio publicado."""
+        with self._lock:
+            return self._seq
+
+    def changes_since(self, seq: int) -> Tuple[int, List[Dict[str, Any]], bool]:
+        """
+        Cambios posteriores a 'seq'.
+
+        Returns:
+            (último número, eventos {'seq', 'op', 'row'}, completo). Si no es
+            completo (la sesión se quedó muy atrás o se cortó la escucha) hay que
+            recargar los datos de la BD.
+        """
+        with self._lock:
+            events = [e for e in self._events if e['seq'] > seq]
+            return self._seq, events, seq >= self._floor
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                metrics.inc('lol_db_errors_total', method='match_listener')
+                print(f"⚠️ Escucha de partidas interrumpida: {e}")
+            if self.connected:
+                # Lo que se notificara mientras no escuchábamos se ha perdido
+                with self._lock:
+                    self._floor = self._seq
+                self.connected = False
+            self._stop_event.wait(RECONNECT_DELAY)
+
+    def _listen(self):
+        connection = psycopg2.connect(**self._params)
+        connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            self.connected = True
+            while not self._stop_event.is_set():
+                if select.select([connection], [], [], POLL_TIMEOUT) == ([], [], []):
+                    continue
+                connection.poll()
+                changes: Dict[str, str] = {}  # game_id -> 'insert' | 'update'
+                while connection.notifies:
+                    payload = json.loads(connection.notifies.pop(0).payload)
+                    if payload['op'] == 'reset':
+                        self._reset()
+                        continue
+                    for game_id in payload['game_ids']:
+                        if changes.get(game_id) != 'insert':
+                            changes[game_id] = payload['op']
+                if changes:
+                    self._publish(connection, changes)
+        finally:
+            connection.close()
+
+    def _reset(self):
+        """Cambio masivo en otro proceso (importación, particiones): todo se recarga de la BD."""
+        matchup_index.INDEX.invalidate()
+        with self._lock:
+            # Ninguna sesión está al día: changes_since devuelve incompleto y recargan
+            self._seq += 1
+            self._floor = self._seq
+        metrics.inc('lol_live_updates_total', op='reset')
+
+    def _publish(self, connection, changes: Dict[str, str]):
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("SELECT * FROM matches WHERE game_id = ANY(%s)", (list(changes),))
+            rows = [dict(row) for row in cursor.fetchall()]
+
+        with self._lock:
+            for row in rows:
+                self._seq += 1
+                if len(self._events) == self._events.maxlen:
+                    self._floor = self._events[0]['seq']
+                self._events.append({'seq': self._seq, 'op': changes[row['game_id']], 'row': row})
+
+        for row in rows:
+            if changes[row['game_id']] == 'insert':
+                matchup_index.INDEX.apply_match(row)
+            else:
+                matchup_index.INDEX.apply_details(row['game_id'], notes=row['notes'])
+            metrics.inc('lol_live_updates_total', op=changes[row['game_id']])
+
+
+_listener: Optional[MatchListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> Optional[MatchListener]:
+    """
+    Escucha compartida por todas las sesiones (se arranca la primera vez).
+
+    Devuelve None si no hay credenciales de BD o si LIVE_UPDATES=0.
+    """
+    global _listener
+    if os.getenv("LIVE_UPDATES", "1") == "0":
+        return None
+    params = dict(host=os.getenv("DB_HOST"), database=os.getenv("DB_NAME"), user=os.getenv("DB_USER"),
+                  password=os.getenv("DB_PASSWORD"), port=os.getenv("DB_PORT", "5432"),
+                  connect_timeout=CONNECT_TIMEOUT)
+    if not all([params['host'], params['database'], params['user'], params['password']]):
+        return None
+    with _listener_lock:
+        if _listener is None:
+            _listener = MatchListener(**params)
+            _listener.start()
+        return _listener
@@ -0,0 +1,245 @@
+import os
+import glob
+import gzip
+import json
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import NamedTuple, Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union
+
+try:
+    import orjson  # Decodificador rápido (opcional)
+except ImportError:
+    orjson = None
+
+import metrics
+
+# Versión del formato de MatchRecord: se sube al cambiar campos o cálculos, para
+# saber qué partidas hay que volver a derivar desde el archivo de respuestas
+SCHEMA_VERSION = 2
+
+# Carpeta del archivo de respuestas crudas de match-v5 (vacío = no se archiva)
+RAW_ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR")
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class MalformedMatchError(Exception):
+    """La respuesta de match-v5 no tiene la forma esperada."""
+
+    def __init__(self, reason: str, detail: str = ''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+class MatchRecord(NamedTuple):
+    """Estadísticas del jugador en una partida (mismos campos que el dict de LoLClient.parse_match)."""
+    game_id: str
+    date: str
+    game_end_timestamp: int
+    champion_name: str
+    kills: int
+    deaths: int
+    assists: int
+    win: bool
+    cs_total: int
+    cs_min: float
+    game_duration_minutes: float
+    control_wards_bought: int
+    role: str
+    enemy_champion: str
+    game_version: Optional[str]
+    puuid: str  # Cuenta y cola de la partida: acotan el reparto de LP entre snapshots de rango
+    queue_id: Optional[int]
+    schema_version: int = SCHEMA_VERSION
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def loads(raw: Union[bytes, str]) -> Any:
+    """Decodifica JSON con orjson si está instalado."""
+    try:
+        return orjson.loads(raw) if orjson else json.loads(raw)
+    except ValueError as e:
+        raise MalformedMatchError('invalid_json', str(e)[:80])
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value) if orjson else json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def parse_match(match_data: Dict[str, Any], puuid: str) -> Optional[MatchRecord]:
+    """
+    Extrae las estadísticas del jugador de una respuesta de match-v5.
+
+    Función pura (sin red ni BD), apta para ejecutarse en otro proceso.
+
+    Args:
+        match_data: Respuesta completa de match.by_id
+        puuid: PUUID del jugador
+
+    Returns:
+        MatchRecord, o None si el jugador no aparece en la partida
+
+    Raises:
+        MalformedMatchError: Si faltan campos o tienen un tipo inesperado
+    """
+    try:
+        info = match_data['info']
+        participant = next((p for p in info['participants'] if p['puuid'] == puuid), None)
+        if not participant:
+            return None
+
+        # Cálculo seguro del rol
+        role = participant.get('teamPosition', '')
+        if not role or role == 'Invalid':
+            role = participant.get('individualPosition', 'Unknown')
+
+        game_duration_minutes = round(info['gameDuration'] / 60, 2)
+        cs_total = participant['totalMinionsKilled'] + participant['neutralMinionsKilled']
+        cs_min = round(cs_total / game_duration_minutes, 2) if game_duration_minutes > 0 else 0.0
+
+        return MatchRecord(
+            game_id=match_data['metadata']['matchId'],
+            date=datetime.fromtimestamp(info['gameEndTimestamp'] / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+            game_end_timestamp=info['gameEndTimestamp'],
+            champion_name=participant['championName'],
+            kills=participant['kills'],
+            deaths=participant['deaths'],
+            assists=participant['assists'],
+            win=bool(participant['win']),
+            cs_total=cs_total,
+            cs_min=cs_min,
+            game_duration_minutes=game_duration_minutes,
+            control_wards_bought=participant['visionWardsBoughtInGame'],
+            role=role,
+            enemy_champion=enemy_laner(info['participants'], participant),
+            game_version=info.get('gameVersion'),
+            puuid=puuid,
+            queue_id=info.get('queueId'),
+        )
+    except KeyError as e:
+        raise MalformedMatchError('missing_field', str(e))
+    except (TypeError, ValueError, AttributeError, OverflowError) as e:
+        raise MalformedMatchError('bad_type', str(e)[:80])
+
+
+def enemy_laner(participants: List[Dict[str, Any]], player: Dict[str, Any]) -> str:
+    """Campeón del rival directo (mismo teamPosition en el otro equipo) o 'Unknown'."""
+    player_role = player.get('teamPosition')
+    if not player_role or player_role == 'Invalid':
+        return 'Unknown'
+    for participant in participants:
+        if participant.get('teamId') != player.get('teamId') and participant.get('teamPosition') == player_role:
+            return participant['championName']
+    return 'Unknown'
+
+
+# --- Archivo de respuestas crudas ---
+_archive_lock = threading.Lock()
+
+
+def archive_raw(match_data: Dict[str, Any], puuid: str, archive_dir: Optional[str] = None):
+    """
+    Añade una respuesta de match-v5 al archivo (una línea JSON por partida, un fichero por mes).
+
+    No hace nada si no hay carpeta (RAW_ARCHIVE_DIR). Con el archivo se pueden volver
+    a derivar todas las estadísticas sin pedir nada a Riot (scripts/reprocess_archive.py).
+    """
+    archive_dir = archive_dir or RAW_ARCHIVE_DIR
+    if not archive_dir:
+        return
+    try:
+        month = datetime.fromtimestamp(match_data['info']['gameEndTimestamp'] / 1000).strftime('%Y-%m')
+    except (KeyError, TypeError, ValueError):
+        month = datetime.now().strftime('%Y-%m')
+    line = dumps({'schema_version': SCHEMA_VERSION, 'puuid': puuid, 'match': match_data}) + b'\n'
+    with _archive_lock:
+        os.makedirs(archive_dir, exist_ok=True)
+        with open(os.path.join(archive_dir, f"matches-{month}.jsonl"), 'ab') as f:
+            f.write(line)
+
+
+def read_archive(archive_dir: str) -> Iterator[bytes]:
+    """Líneas del archivo (ficheros .jsonl y .jsonl.gz), sin decodificar."""
+    paths = sorted(glob.glob(os.path.join(archive_dir, '*.jsonl')) + glob.glob(os.path.join(archive_dir, '*.jsonl.gz')))
+    for path in paths:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+# --- Procesado en paralelo ---
+def parse_chunk(lines: List[bytes]) -> Tuple[List[MatchRecord], Dict[str, int]]:
+    """Decodifica y procesa un bloque de líneas del archivo. Devuelve (registros, contadores)."""
+    records = []
+    counts: Counter = Counter()
+    for line in lines:
+        try:
+            entry = loads(line)
+            if not isinstance(entry, dict) or 'match' not in entry or 'puuid' not in entry:
+                raise MalformedMatchError('bad_envelope')
+            record = parse_match(entry['match'], entry['puuid'])
+        except MalformedMatchError as e:
+            counts[e.reason] += 1
+            continue
+        if record is None:
+            counts['not_participant'] += 1
+        else:
+            counts['parsed'] += 1
+            records.append(record)
+    return records, dict(counts)
+
+
+def _chunks(lines: Iterable[bytes], size: int) -> Iterator[List[bytes]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_lines(lines: Iterable[bytes], workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                counts: Optional[Counter] = None) -> Iterator[MatchRecord]:
+    """
+    Procesa líneas del archivo repartiendo bloques entre varios procesos.
+
+    Los registros salen en el mismo orden que las líneas y sólo hay unos pocos
+    bloques en vuelo a la vez, así que la memoria no crece con el archivo.
+
+    Args:
+        lines: Líneas JSON ({'puuid', 'match'}), p.ej. de read_archive
+        workers: Procesos (por defecto, uno por CPU; 1 = en este proceso)
+        chunk_size: Líneas por bloque enviado a cada proceso
+        counts: Counter donde acumular 'parsed', 'not_participant' y los motivos de error
+    """
+    counts = counts if counts is not None else Counter()
+    workers = workers or os.cpu_count() or 1
+
+    def account(result: Tuple[List[MatchRecord], Dict[str, int]]) -> List[MatchRecord]:
+        records, chunk_counts = result
+        counts.update(chunk_counts)
+        for result_name, value in chunk_counts.items():
+            metrics.inc('lol_match_parse_total', value, result=result_name)
+        return records
+
+    if workers == 1:
+        for chunk in _chunks(lines, chunk_size):
+            yield from account(parse_chunk(chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(parse_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from account(pending.popleft().result())
+        while pending:
+            yield from account(pending.popleft().result())
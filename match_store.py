@@ -0,0 +1,237 @@
+import re
+import sys
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+import numpy as np
+
+# Columnas numéricas: código de tipo de array.array y dtype de NumPy equivalente.
+# NULL es NaN en las columnas decimales y el mínimo del tipo en las enteras.
+NUMERIC_COLUMNS = {
+    'date': ('q', 'int64'),  # Segundos desde 1970 (column('date') la devuelve como datetime64)
+    'kills': ('h', 'int16'),
+    'deaths': ('h', 'int16'),
+    'assists': ('h', 'int16'),
+    'cs_total': ('h', 'int16'),
+    'cs_min': ('f', 'float32'),
+    'control_wards': ('h', 'int16'),
+    'win': ('b', 'int8'),
+    'game_duration_minutes': ('f', 'float32'),
+    'lp_change': ('h', 'int16'),
+    'tilt_level': ('b', 'int8'),
+    'vod_review': ('b', 'int8'),
+    'weekday': ('b', 'int8'),
+    'hour': ('b', 'int8'),
+}
+BOOL_COLUMNS = ('win', 'vod_review')
+
+# Columnas con pocos valores distintos: se guardan como IDs de una tabla de cadenas
+# común (un mismo campeón tiene el mismo ID como 'champion' y como 'enemy_champion')
+INTERNED_COLUMNS = ('champion', 'enemy_champion', 'role', 'patch', 'game_version', 'impact_rating')
+
+# Texto libre: listas de Python normales
+TEXT_COLUMNS = ('game_id', 'notes')
+
+COLUMNS = ('game_id', 'date', 'champion', 'role', 'kills', 'deaths', 'assists', 'cs_total', 'cs_min',
+           'control_wards', 'win', 'enemy_champion', 'game_duration_minutes', 'lp_change', 'tilt_level',
+           'impact_rating', 'notes', 'vod_review', 'game_version', 'patch', 'weekday', 'hour')
+
+# Nombres de LoLClient.parse_match -> nombres de la tabla 'matches'
+ALIASES = {'champion_name': 'champion', 'control_wards_bought': 'control_wards'}
+
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+NULLS = {code: (float('nan') if code == 'f' else -2 ** (array(code).itemsize * 8 - 1)) for code in 'qhbf'}
+
+
+class MatchRow:
+    """
+    Vista de una partida dentro de un MatchStore (no copia los datos).
+
+    Se usa como el dict de siempre (row['win'], row.get('notes')) o por atributo
+    (row.win). to_dict() la convierte en un dict normal.
+    """
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'MatchStore', index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._store.value(name, self._index)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._store.value(name, self._index)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value = self._store.value(name, self._index) if name in COLUMNS else None
+        return default if value is None else value
+
+    def keys(self) -> Tuple[str, ...]:
+        return COLUMNS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self._store.value(name, self._index) for name in COLUMNS}
+
+    def __repr__(self):
+        return f"MatchRow({self._store.value('game_id', self._index)!r})"
+
+
+class MatchStore:
+    """
+    Historial de partidas en columnas tipadas, para análisis en memoria.
+
+    Cada partida ocupa unas decenas de bytes (frente a varios cientos de un dict
+    con 20 claves): los números van en arrays compactos, los campeones, roles y
+    parches se guardan como IDs de 2 bytes y sólo game_id y las notas quedan como
+    cadenas. Acepta tanto las filas de MatchDatabase como los dicts de
+    LoLClient.parse_match, y column() da las columnas como arrays de NumPy.
+    """
+
+    def __init__(self):
+        self._numeric = {name: array(code) for name, (code, _) in NUMERIC_COLUMNS.items()}
+        self._interned = {name: array('H') for name in INTERNED_COLUMNS}
+        self._text: Dict[str, List[Optional[str]]] = {name: [] for name in TEXT_COLUMNS}
+        self._strings: List[Optional[str]] = [None]  # ID 0 = NULL
+        self._string_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> 'MatchStore':
+        store = cls()
+        store.extend(rows)
+        return store
+
+    # --- Escritura ---
+    def append(self, row: Dict[str, Any]):
+        """Añade una partida (fila de la BD o resultado de parse_match)."""
+        values = {ALIASES.get(k, k): v for k, v in row.items()}
+
+        date = values.get('date')
+        if isinstance(date, str):
+            date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+        values['date'] = None if date is None else (date - EPOCH) // SECOND
+        if values.get('patch') is None and values.get('game_version'):
+            match = re.match(r'^\d+\.\d+', values['game_version'])
+            values['patch'] = match.group(0) if match else None
+
+        for name, column in self._numeric.items():
+            value = values.get(name)
+            column.append(NULLS[column.typecode] if value is None else value)
+        for name, column in self._interned.items():
+            column.append(self.intern(values.get(name)))
+        for name, column in self._text.items():
+            column.append(values.get(name))
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.append(row)
+
+    def intern(self, value: Optional[str]) -> int:
+        """ID de una cadena en la tabla del store (la añade si es nueva)."""
+        if value is None:
+            return 0
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    # --- Lectura ---
+    def __len__(self) -> int:
+        return len(self._text['game_id'])
+
+    def __getitem__(self, index: int) -> MatchRow:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(index)
+        return MatchRow(self, index)
+
+    def __iter__(self) -> Iterator[MatchRow]:
+        return (MatchRow(self, i) for i in range(len(self)))
+
+    def value(self, name: str, index: int) -> Any:
+        """Valor de una columna en una partida, con los tipos de Python de siempre."""
+        if name in self._text:
+            return self._text[name][index]
+        if name in self._interned:
+            return self._strings[self._interned[name][index]]
+        column = self._numeric[name]
+        value = column[index]
+        if value != value or value == NULLS[column.typecode]:  # NaN o NULL entero
+            return None
+        if name == 'date':
+            return EPOCH + value * SECOND
+        return bool(value) if name in BOOL_COLUMNS else value
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Columna como array de NumPy (copia, el store puede seguir creciendo).
+
+        Las columnas internadas devuelven los IDs (ver string_id/strings) y las de
+        texto un array de objetos. NULL es NaN/NaT o el mínimo del tipo entero.
+        """
+        if name in self._numeric:
+            values = np.array(self._numeric[name], dtype=NUMERIC_COLUMNS[name][1])
+            return values.astype('datetime64[s]') if name == 'date' else values
+        if name in self._interned:
+            return np.array(self._interned[name], dtype='uint16')
+        return np.array(self._text[name], dtype=object)
+
+    def string_id(self, value: str) -> Optional[int]:
+        """ID de una cadena ya presente (p.ej. un campeón), o None."""
+        return self._string_ids.get(value)
+
+    def strings(self, name: str) -> List[Optional[str]]:
+        """Valores de una columna internada, ya decodificados."""
+        strings = self._strings
+        return [strings[i] for i in self._interned[name]]
+
+    def iter_tuples(self, *names: str) -> Iterator[Tuple[Any, ...]]:
+        """
+        Recorre varias columnas a la vez como tuplas (el recorrido fila a fila más rápido).
+
+        Los valores son los almacenados: sin convertir NULL a None, 'date' en
+        segundos y 'win' como 0/1.
+        """
+        columns = []
+        for name in names:
+            if name in self._text:
+                columns.append(self._text[name])
+            elif name in self._interned:
+                columns.append(self.strings(name))
+            else:
+                columns.append(self._numeric[name])
+        return zip(*columns)
+
+    def winrate_by(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """Partidas, victorias y winrate agrupados por una columna internada (p.ej. 'champion')."""
+        ids = self.column(name)
+        wins = self.column('win') == 1
+        games_by_id = np.bincount(ids, minlength=len(self._strings))
+        wins_by_id = np.bincount(ids, weights=wins, minlength=len(self._strings))
+        result = {}
+        for string_id in np.nonzero(games_by_id)[0].tolist():
+            if string_id == 0:
+                continue
+            games, won = int(games_by_id[string_id]), int(wins_by_id[string_id])
+            result[self._strings[string_id]] = {'games': games, 'wins': won, 'winrate': won / games * 100}
+        return result
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [row.to_dict() for row in self]
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada de los datos (arrays + cadenas)."""
+        size = sum(sys.getsizeof(c) for c in self._numeric.values())
+        size += sum(sys.getsizeof(c) for c in self._interned.values())
+        size += sum(sys.getsizeof(s) for s in self._strings if s is not None)
+        for column in self._text.values():
+            size += sys.getsizeof(column) + sum(sys.getsizeof(s) for s in column if s is not None)
+        return size
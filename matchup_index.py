@@ -0,0 +1,202 @@
+import heapq
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+import metrics
+
+# Columnas que necesita el Scout (lo demás se queda en la BD)
+INDEX_COLUMNS = ('game_id', 'date', 'champion', 'enemy_champion', 'win', 'deaths', 'cs_min', 'notes')
+
+
+def _key(name: Optional[str]) -> str:
+    return (name or '').strip().lower()
+
+
+class MatchupStats:
+    """Agregado de un enfrentamiento (mi campeón vs campeón enemigo)."""
+    __slots__ = ('champion', 'enemy_champion', 'games', 'wins', 'deaths_sum', 'cs_min_sum', 'matches')
+
+    def __init__(self, champion: str, enemy_champion: str):
+        self.champion = champion
+        self.enemy_champion = enemy_champion
+        self.games = 0
+        self.wins = 0
+        self.deaths_sum = 0
+        self.cs_min_sum = 0.0
+        self.matches: List[Dict[str, Any]] = []  # Más reciente primero
+
+    def add(self, row: Dict[str, Any]):
+        self.games += 1
+        self.wins += 1 if row['win'] else 0
+        self.deaths_sum += row['deaths'] or 0
+        self.cs_min_sum += row['cs_min'] or 0.0
+
+        # Casi siempre llega la partida más reciente: inserción al principio
+        date = row['date'] or datetime.min
+        idx = 0
+        while idx < len(self.matches) and (self.matches[idx]['date'] or datetime.min) > date:
+            idx += 1
+        self.matches.insert(idx, row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'champion': self.champion,
+            'enemy_champion': self.enemy_champion,
+            'games': self.games,
+            'wins': self.wins,
+            'winrate': self.wins / self.games * 100 if self.games else 0.0,
+            'avg_deaths': self.deaths_sum / self.games if self.games else 0.0,
+            'avg_cs_min': self.cs_min_sum / self.games if self.games else 0.0,
+            'latest_notes': [m['notes'] for m in self.matches if m['notes']][:3],
+        }
+
+
+class MatchupIndex:
+    """
+    Índice en memoria (mi campeón, campeón enemigo) -> estadísticas y partidas.
+
+    Se construye una vez con una sola lectura de 'matches' y después se mantiene
+    al día con save_match y update_match_details, de modo que las búsquedas del
+    Scout y la lista de Nemesis no tocan la base de datos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pairs: Dict[Tuple[str, str], MatchupStats] = {}
+        self._by_game: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._building = False
+        self._invalidated = False  # invalidate() durante una carga: su resultado ya no vale
+        self.ready = False
+
+    # --- Construcción y mantenimiento ---
+    def start_build(self):
+        """Marca el inicio de la carga: las escrituras concurrentes se encolan."""
+        with self._lock:
+            self._building = True
+            self._invalidated = False
+            self._pending = []
+
+    def build(self, rows: Iterable[Dict[str, Any]]):
+        pairs: Dict[Tuple[str, str], MatchupStats] = {}
+        by_game: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            self._add(pairs, by_game, row)
+
+        with self._lock:
+            if self._invalidated:
+                # La tabla cambió por debajo (importación, particiones): la próxima lectura la rehace
+                self._pending = []
+                self._building = False
+                return
+            # Partidas guardadas mientras se leía la tabla
+            for row in self._pending:
+                self._add(pairs, by_game, row)
+            self._pairs, self._by_game = pairs, by_game
+            self._pending = []
+            self._building = False
+            self.ready = True
+
+    def abort_build(self):
+        with self._lock:
+            self._building = False
+            self._pending = []
+
+    def invalidate(self):
+        """Descarta el índice (p.ej. tras importar un backup): se reconstruye con la siguiente consulta."""
+        with self._lock:
+            self.ready = False
+            self._invalidated = self._building
+            self._pairs, self._by_game = {}, {}
+
+    @staticmethod
+    def _add(pairs, by_game, row: Dict[str, Any]):
+        row = {col: row.get(col) for col in INDEX_COLUMNS}
+        if not row['game_id'] or row['game_id'] in by_game:
+            return
+        key = (_key(row['champion']), _key(row['enemy_champion']))
+        stats = pairs.get(key)
+        if stats is None:
+            stats = pairs[key] = MatchupStats(row['champion'], row['enemy_champion'])
+        stats.add(row)
+        by_game[row['game_id']] = row
+
+    def apply_match(self, row: Dict[str, Any]):
+        """Añade una partida recién insertada (no hace nada si el índice aún no existe)."""
+        with self._lock:
+            if self._building:
+                self._pending.append(row)
+            elif self.ready:
+                self._add(self._pairs, self._by_game, row)
+
+    def apply_details(self, game_id: str, notes: Optional[str] = None):
+        """Refleja una edición de update_match_details (sólo las notas afectan al índice)."""
+        with self._lock:
+            row = self._by_game.get(game_id)
+            if row is not None and notes is not None:
+                row['notes'] = notes
+            if notes is not None:
+                for pending in self._pending:
+                    if pending.get('game_id') == game_id:
+                        pending['notes'] = notes
+
+    # --- Consultas ---
+    def matchup(self, my_champion: str, enemy_champion: str) -> Optional[Dict[str, Any]]:
+        """Resumen del enfrentamiento (partidas, victorias, medias y últimas notas)."""
+        with self._lock:
+            stats = self._pairs.get((_key(my_champion), _key(enemy_champion)))
+            metrics.record_cache('matchup_index', self.ready)
+            return stats.to_dict() if stats else None
+
+    def matchup_notes(self, my_champion: str, enemy_champion: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Equivalente en memoria de MatchDatabase.get_matchup_notes (sin distinguir mayúsculas)."""
+        with self._lock:
+            stats = self._pairs.get((_key(my_champion), _key(enemy_champion)))
+            metrics.record_cache('matchup_index', self.ready)
+            return stats.matches[:limit] if stats else []
+
+    def matches_vs_enemy(self, enemy_search: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Equivalente en memoria de get_matches_vs_enemy('%texto%')."""
+        needle = _key(enemy_search)
+        with self._lock:
+            metrics.record_cache('matchup_index', self.ready)
+            found = [m for (_, enemy), stats in self._pairs.items() if needle in enemy for m in stats.matches[:limit]]
+        date = lambda m: m['date'] or datetime.min
+        if limit is not None:
+            return heapq.nlargest(limit, found, key=date)
+        return sorted(found, key=date, reverse=True)
+
+    def nemesis(self, min_games: int = 2, limit: int = 5) -> List[Dict[str, Any]]:
+        """Equivalente en memoria de get_nemesis_list: peor winrate por campeón enemigo."""
+        by_enemy: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            metrics.record_cache('matchup_index', self.ready)
+            for (_, enemy), stats in self._pairs.items():
+                if not enemy or enemy == 'unknown':
+                    continue
+                agg = by_enemy.setdefault(enemy, {'enemy_champion': stats.enemy_champion, 'games': 0,
+                                                  'wins': 0, 'deaths_sum': 0, 'cs_min_sum': 0.0})
+                agg['games'] += stats.games
+                agg['wins'] += stats.wins
+                agg['deaths_sum'] += stats.deaths_sum
+                agg['cs_min_sum'] += stats.cs_min_sum
+
+        result = []
+        for agg in by_enemy.values():
+            if agg['games'] < min_games:
+                continue
+            result.append({
+                'enemy_champion': agg['enemy_champion'],
+                'games': agg['games'],
+                'wins': agg['wins'],
+                'winrate': agg['wins'] / agg['games'] * 100,
+                'avg_cs_min': agg['cs_min_sum'] / agg['games'],
+                'avg_deaths': agg['deaths_sum'] / agg['games'],
+            })
+        result.sort(key=lambda n: (n['winrate'], -n['games']))
+        return result[:limit]
+
+
+# Índice compartido por todas las sesiones del proceso
+INDEX = MatchupIndex()
@@ -0,0 +1,254 @@
+import sys
+import time
+import importlib
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Tuple
+
+# Buckets por defecto (segundos) pensados para consultas SQL y llamadas HTTP
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500, 1000, 5000)
+
+# Métricas conocidas: nombre -> (tipo, ayuda, buckets)
+METRICS: Dict[str, Tuple[str, str, Optional[Tuple[float, ...]]]] = {
+    'lol_db_query_seconds': ('histogram', "Latencia de las consultas de MatchDatabase", DEFAULT_BUCKETS),
+    'lol_db_query_rows': ('histogram', "Filas devueltas por consulta de MatchDatabase", ROW_BUCKETS),
+    'lol_db_errors_total': ('counter', "Errores capturados en MatchDatabase", None),
+    'lol_db_reads_total': ('counter', "Lecturas de MatchDatabase con réplica configurada, por destino (replica/primary)", None),
+    'lol_riot_request_seconds': ('histogram', "Latencia de las llamadas a la API de Riot", DEFAULT_BUCKETS),
+    'lol_riot_requests_total': ('counter', "Llamadas a la API de Riot por código de estado", None),
+    'lol_riot_match_errors_total': ('counter', "Partidas descartadas al procesar la respuesta de Riot", None),
+    'lol_match_parse_total': ('counter', "Respuestas de match-v5 procesadas desde el archivo, por resultado", None),
+    'lol_riot_rate_limit_remaining': ('gauge', "Peticiones restantes en cada ventana de rate limit de Riot", None),
+    'lol_cache_requests_total': ('counter', "Aciertos y fallos de las cachés en memoria", None),
+    'lol_app_section_seconds': ('histogram', "Tiempo de render de cada sección de app.py", DEFAULT_BUCKETS),
+    'lol_app_startup_seconds': ('gauge', "Arranque en frío: importaciones y primer render", None),
+    'lol_circuit_state': ('gauge', "Estado del circuit breaker de cada dependencia (0=cerrado, 1=abierto, 2=semiabierto)", None),
+    'lol_circuit_rejections_total': ('counter', "Llamadas rechazadas al instante por un circuit breaker abierto", None),
+    'lol_live_updates_total': ('counter', "Partidas nuevas o editadas recibidas por LISTEN/NOTIFY", None),
+    'lol_lp_attributed_total': ('counter', "Partidas con lp_change deducido de los snapshots de rango (league-v4)", None),
+}
+
+# Referencia para medir el arranque: este módulo es de lo primero que importa app.py
+PROCESS_START = time.perf_counter()
+_first_render_done = False
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Registro en memoria de contadores, gauges e histogramas (compartido por todo el proceso)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
+
+    def _key(self, name: str, labels: Dict[str, Any]):
+        if name not in METRICS:
+            raise KeyError(f"Métrica desconocida: {name}")
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = _Histogram(METRICS[name][2])
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render_prometheus(self) -> str:
+        """Devuelve todas las métricas en el formato de texto de Prometheus."""
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: kv[0])
+            lines = []
+            current = None
+            for (name, labels), value in items:
+                kind, help_text, _ = METRICS[name]
+                if name != current:
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    current = name
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels, le=_fmt(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {value.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_fmt(value.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {value.count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, name: str) -> List[Dict[str, Any]]:
+        """Resumen legible de una métrica (para el panel de debug de la app)."""
+        rows = []
+        with self._lock:
+            for (metric, labels), value in self._values.items():
+                if metric != name:
+                    continue
+                row = dict(labels)
+                if isinstance(value, _Histogram):
+                    row.update({
+                        'count': value.count,
+                        'total': round(value.sum, 4),
+                        'avg': round(value.sum / value.count, 4) if value.count else 0.0,
+                        'p95<=': _quantile_bound(value, 0.95),
+                    })
+                else:
+                    row['value'] = value
+                rows.append(row)
+        return rows
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + '}'
+
+
+def _quantile_bound(hist: _Histogram, q: float) -> Optional[float]:
+    """Límite superior del bucket que contiene el cuantil q (aproximación de Prometheus)."""
+    if not hist.count:
+        return None
+    target = q * hist.count
+    cumulative = 0
+    for bound, count in zip(hist.buckets, hist.counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float('inf')
+
+
+REGISTRY = MetricsRegistry()
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set
+observe = REGISTRY.observe
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """Mide la duración del bloque y la registra en el histograma indicado."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - start, **labels)
+
+
+def section(name: str):
+    """Atajo para medir una sección de app.py."""
+    return timer('lol_app_section_seconds', section=name)
+
+
+def lazy_import(module_name: str):
+    """
+    Importa un módulo pesado en el momento en que se necesita.
+
+    La primera importación del proceso queda registrada como fase de arranque;
+    las siguientes salen de sys.modules y no cuestan nada.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    REGISTRY.set('lol_app_startup_seconds', time.perf_counter() - start, phase=f"import.{module_name}")
+    return module
+
+
+def mark_first_render():
+    """Registra el tiempo hasta el primer render completo del proceso (sólo la primera vez)."""
+    global _first_render_done
+    if not _first_render_done:
+        _first_render_done = True
+        REGISTRY.set('lol_app_startup_seconds', time.perf_counter() - PROCESS_START, phase='first_render')
+
+
+def record_cache(cache: str, hit: bool):
+    REGISTRY.inc('lol_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def record_rate_limits(scope: str, limit_header: Optional[str], count_header: Optional[str]):
+    """
+    Registra el margen restante a partir de las cabeceras de Riot.
+
+    Las cabeceras tienen el formato 'peticiones:segundos,...', p.ej.
+    X-App-Rate-Limit: '20:1,100:120' y X-App-Rate-Limit-Count: '3:1,40:120'.
+    """
+    if not limit_header or not count_header:
+        return
+    limits = dict(reversed(pair.split(':')) for pair in limit_header.split(','))
+    counts = dict(reversed(pair.split(':')) for pair in count_header.split(','))
+    for window, limit in limits.items():
+        used = int(counts.get(window, 0))
+        REGISTRY.set('lol_riot_rate_limit_remaining', int(limit) - used, scope=scope, window=f"{window}s")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Prometheus hace scrape cada pocos segundos: no ensuciar la consola
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Arranca (una sola vez por proceso) el endpoint /metrics en un hilo en segundo plano."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
@@ -0,0 +1,148 @@
+import math
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+# Métricas vigiladas por campeón y si un valor alto es bueno
+ALERT_METRICS = {
+    'cs_min': True,
+    'deaths': False,
+    'win': True,
+    'tilt_level': False,
+}
+
+# Desviación típica mínima de cada métrica: evita alertas por cambios minúsculos
+# cuando las primeras partidas salen casi iguales
+MIN_SIGMA = {'cs_min': 0.4, 'deaths': 1.0, 'win': 0.3, 'tilt_level': 0.5}
+
+# Partidas con las que se fija el nivel habitual antes de vigilar nada
+WARMUP = 5
+# Peso de cada partida en el nivel habitual (lento, ~40 partidas) y en la media reciente (~10)
+BASELINE_ALPHA = 0.05
+RECENT_ALPHA = 0.2
+# CUSUM en desviaciones típicas: holgura por partida y umbral de alerta. Con
+# k=0.5 y h=5 una bajada de ~1.2 sigma salta en unas 7 partidas y las falsas
+# alarmas quedan en torno a una cada 350 partidas por campeón y métrica
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+# Desviación máxima que aporta una sola partida: un partidazo o un desastre
+# aislado no basta para disparar la alerta (hacen falta al menos dos)
+MAX_Z = 3.0
+# Partidas seguidas en alerta tras las que el nivel nuevo pasa a ser el habitual
+REBASELINE_AFTER = 20
+
+
+class CusumDetector:
+    """
+    Detector incremental de empeoramiento de una métrica (EWMA + CUSUM unilateral).
+
+    Mantiene el nivel habitual (media y varianza con pesos exponenciales), una
+    media reciente y la suma CUSUM de las desviaciones hacia peor; cada partida
+    se procesa en O(1) y el estado cabe en un JSON pequeño. Mientras hay alerta
+    el nivel habitual no se mueve, para no "acostumbrarse" al bajón; si dura
+    REBASELINE_AFTER partidas, el nivel nuevo se da por asumido y se reinicia.
+    """
+
+    __slots__ = ('metric', 'n', 'mean', 'var', 'recent', 'cusum', 'run', 'run_sum')
+
+    def __init__(self, metric: str):
+        self.metric = metric
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.recent = 0.0
+        self.cusum = 0.0  # <= 0: cuánto peor que lo habitual se acumula
+        self.run = 0  # Partidas desde que la suma empezó a bajar
+        self.run_sum = 0.0
+
+    @property
+    def alarm(self) -> bool:
+        return self.n > WARMUP and self.cusum <= -CUSUM_H
+
+    @property
+    def sigma(self) -> float:
+        return max(math.sqrt(self.var), MIN_SIGMA.get(self.metric, 0.0))
+
+    @property
+    def run_mean(self) -> Optional[float]:
+        return self.run_sum / self.run if self.run else None
+
+    def update(self, value: float):
+        value = float(value)
+        self.n += 1
+        if self.n <= WARMUP:
+            # Media y varianza exactas de las primeras partidas (Welford)
+            delta = value - self.mean
+            self.mean += delta / self.n
+            self.var += (delta * (value - self.mean) - self.var) / self.n
+            self.recent = self.mean
+            return
+
+        direction = 1.0 if ALERT_METRICS.get(self.metric, True) else -1.0
+        z = max(-MAX_Z, min(MAX_Z, direction * (value - self.mean) / self.sigma))
+        self.cusum = min(0.0, self.cusum + z + CUSUM_K)
+        if self.cusum < 0:
+            self.run += 1
+            self.run_sum += value
+        else:
+            self.run, self.run_sum = 0, 0.0
+        self.recent += RECENT_ALPHA * (value - self.recent)
+
+        if self.alarm and self.run >= REBASELINE_AFTER:
+            self.mean = self.run_sum / self.run
+            self.cusum, self.run, self.run_sum = 0.0, 0, 0.0
+        elif not self.alarm:
+            delta = value - self.mean
+            self.mean += BASELINE_ALPHA * delta
+            self.var = (1 - BASELINE_ALPHA) * (self.var + BASELINE_ALPHA * delta * delta)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CusumDetector':
+        detector = cls(data['metric'])
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(detector, slot, data[slot])
+        return detector
+
+
+def match_observations(match: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """Valores (métrica, valor) de una partida recién guardada (dict de parse_match o fila de 'matches')."""
+    observations = [('win', 1.0 if match['win'] else 0.0), ('deaths', float(match['deaths']))]
+    cs_min = match.get('cs_min')
+    if cs_min is None:
+        duration = match.get('game_duration_minutes') or 0
+        cs_min = round(match['cs_total'] / duration, 2) if duration > 0 else 0.0
+    observations.append(('cs_min', float(cs_min)))
+    if match.get('tilt_level') is not None:
+        observations.append(('tilt_level', float(match['tilt_level'])))
+    return observations
+
+
+def build(matches: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], CusumDetector]:
+    """Detectores (campeón, métrica) recorriendo el historial en orden cronológico."""
+    detectors: Dict[Tuple[str, str], CusumDetector] = {}
+    for match in matches:
+        for metric, value in match_observations(match):
+            detector = detectors.get((match['champion'], metric))
+            if detector is None:
+                detector = detectors[(match['champion'], metric)] = CusumDetector(metric)
+            detector.update(value)
+    return detectors
+
+
+def alert_message(champion: str, detector: CusumDetector) -> str:
+    """Texto de la alerta, p.ej. 'Tu CS/min con Jax ha caído 1.2 por debajo de lo habitual (7.4) en las últimas 8 partidas'."""
+    metric, run = detector.metric, detector.run
+    games = f"en las últimas {run} partidas" if run > 1 else "en la última partida"
+    run_mean = detector.run_mean if detector.run_mean is not None else detector.recent
+    if metric == 'win':
+        return (f"Tu winrate con {champion} ha caído {(detector.mean - run_mean) * 100:.0f} puntos "
+                f"(del {detector.mean * 100:.0f}% al {run_mean * 100:.0f}%) {games}")
+    if metric == 'cs_min':
+        return (f"Tu CS/min con {champion} ha caído {detector.mean - run_mean:.1f} por debajo de lo habitual "
+                f"({detector.mean:.1f}) {games}")
+    label = "Tus muertes" if metric == 'deaths' else "Tu tilt"
+    verb = "han subido" if metric == 'deaths' else "ha subido"
+    return (f"{label} con {champion} {verb} {run_mean - detector.mean:.1f} por encima de lo habitual "
+            f"({detector.mean:.1f}) {games}")
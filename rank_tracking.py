@@ -0,0 +1,100 @@
+from typing import Optional, List, Dict, Any, Tuple
+
+# Escalera de ranked: 4 divisiones de 100 LP por liga hasta Diamante; de Master
+# en adelante no hay divisiones y los LP se acumulan sin tope
+TIERS = ['IRON', 'BRONZE', 'SILVER', 'GOLD', 'PLATINUM', 'EMERALD', 'DIAMOND',
+         'MASTER', 'GRANDMASTER', 'CHALLENGER']
+DIVISIONS = ['IV', 'III', 'II', 'I']
+APEX_TIERS = ('MASTER', 'GRANDMASTER', 'CHALLENGER')
+APEX_POINTS = TIERS.index('MASTER') * 400
+
+# Cola de match-v5 (queueId) -> queueType de league-v4
+QUEUE_TYPES = {420: 'RANKED_SOLO_5x5', 440: 'RANKED_FLEX_SR'}
+QUEUE_IDS = {queue_type: queue_id for queue_id, queue_type in QUEUE_TYPES.items()}
+
+# LP máximos que puede mover una sola partida: un reparto por encima de esto
+# significa que la ventana incluye algo más (decay, dodges, otra cuenta...)
+MAX_LP_PER_GAME = 60
+
+
+def ladder_points(tier: str, rank: str, lp: int) -> int:
+    """Posición absoluta en la escalera (p.ej. GOLD II 45 LP -> 1445), para restar dos snapshots."""
+    if tier in APEX_TIERS:
+        return APEX_POINTS + lp
+    return TIERS.index(tier) * 400 + DIVISIONS.index(rank) * 100 + lp
+
+
+def from_ladder_points(points: int) -> Tuple[str, str, int]:
+    """Inversa de ladder_points: (tier, rank, LP). Por encima de Diamante devuelve MASTER I."""
+    points = max(points, 0)
+    if points >= APEX_POINTS:
+        return 'MASTER', 'I', points - APEX_POINTS
+    return TIERS[points // 400], DIVISIONS[points % 400 // 100], points % 100
+
+
+def rank_label(snapshot: Dict[str, Any]) -> str:
+    """Texto del rango, p.ej. 'GOLD II · 45 LP' (sin división en Master+)."""
+    if snapshot['tier'] in APEX_TIERS:
+        return f"{snapshot['tier']} · {snapshot['lp']} LP"
+    return f"{snapshot['tier']} {snapshot['rank']} · {snapshot['lp']} LP"
+
+
+def queue_entry(entries: List[Dict[str, Any]], queue: int = 420) -> Optional[Dict[str, Any]]:
+    """
+    Extrae de la respuesta de league-v4 (entries/by-puuid) el rango de una cola.
+
+    Returns:
+        Dict compacto con queue, tier, rank, lp, wins y losses, o None si la
+        cuenta no tiene rango en esa cola (sin clasificar)
+    """
+    queue_type = QUEUE_TYPES.get(queue)
+    entry = next((e for e in entries or [] if e.get('queueType') == queue_type), None)
+    if entry is None or entry.get('tier') not in TIERS:
+        return None
+    return {
+        'queue': queue_type,
+        'tier': entry['tier'],
+        'rank': entry.get('rank') or 'I',
+        'lp': int(entry.get('leaguePoints', 0)),
+        'wins': int(entry.get('wins', 0)),
+        'losses': int(entry.get('losses', 0)),
+    }
+
+
+def split_lp(delta: int, results: List[bool]) -> Optional[List[int]]:
+    """
+    Reparte los LP ganados/perdidos entre dos snapshots entre las partidas jugadas.
+
+    Con una sola partida el reparto es exacto. Con varias se asume que cada
+    victoria suma y cada derrota resta lo mismo (x = delta / (victorias - derrotas)),
+    redondeando de forma que la suma siga siendo exactamente 'delta'.
+
+    Args:
+        delta: Diferencia de ladder_points entre los dos snapshots
+        results: Victoria/derrota de cada partida, en orden cronológico
+
+    Returns:
+        LP de cada partida, o None si el reparto no se puede deducir (tantas
+        victorias como derrotas) o no cuadra con los resultados
+    """
+    if not results:
+        return None
+    if len(results) == 1:
+        if (delta > 0) != results[0] or abs(delta) > MAX_LP_PER_GAME:
+            return None
+        return [delta]
+
+    balance = sum(1 if win else -1 for win in results)
+    if balance == 0:
+        return None
+    per_game = delta / balance
+    if per_game < 1 or per_game > MAX_LP_PER_GAME:
+        return None
+
+    values, exact, rounded = [], 0.0, 0
+    for win in results:
+        # Redondeo acumulado: el error de cada partida se compensa en la siguiente
+        exact += per_game if win else -per_game
+        values.append(round(exact) - rounded)
+        rounded += values[-1]
+    return values
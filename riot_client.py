@@ -1,16 +1,51 @@
+import os
 from datetime import datetime
+from typing import Optional, Dict
+import requests
 from riotwatcher import LolWatcher, RiotWatcher, ApiError
+from riotwatcher.Handlers.RateLimit import BasicRateLimiter
+from riotwatcher._apis import UrlConfig
+import metrics
+import match_parser
+import rank_tracking
+from match_parser import MalformedMatchError
+from circuit_breaker import get_breaker, CircuitOpenError
+
+# Timeout (segundos) de cada petición a Riot: durante una caída es mejor fallar rápido
+REQUEST_TIMEOUT = float(os.getenv("RIOT_TIMEOUT", "5"))
+
+# Mapeo de plataformas a rutas continentales
+ROUTING_MAP = {
+    'BR1': 'americas', 'LA1': 'americas', 'LA2': 'americas', 'NA1': 'americas',
+    'EUN1': 'europe', 'EUW1': 'europe', 'TR1': 'europe', 'RU': 'europe',
+    'JP1': 'asia', 'KR': 'asia',
+    'OC1': 'sea', 'PH2': 'sea', 'SG2': 'sea', 'TH2': 'sea', 'TW2': 'sea', 'VN2': 'sea',
+}
+
+
+class InstrumentedRateLimiter(BasicRateLimiter):
+    """Rate limiter de riotwatcher que además publica el margen restante de cada ventana."""
+
+    def record_response(self, region, endpoint_name, method_name, status, headers):
+        super().record_response(region, endpoint_name, method_name, status, headers)
+        metrics.inc('lol_riot_requests_total', endpoint=f"{endpoint_name}.{method_name}", status=status)
+        if headers:
+            metrics.record_rate_limits('app', headers.get('X-App-Rate-Limit'), headers.get('X-App-Rate-Limit-Count'))
+            metrics.record_rate_limits(f"{endpoint_name}.{method_name}",
+                                       headers.get('X-Method-Rate-Limit'), headers.get('X-Method-Rate-Limit-Count'))
+
 
 class LoLClient:
     """Cliente para interactuar con la API de Riot Games para League of Legends."""
     
-    def __init__(self, api_key: str, region: str = 'EUW1'):
+    def __init__(self, api_key: str, region: str = 'EUW1', base_url: Optional[str] = None):
         """
         Inicializa el cliente de Riot API.
         
         Args:
             api_key: Tu clave de API de Riot Games
             region: Región del servidor (por defecto 'EUW1')
+            base_url: URL alternativa (p.ej. un servidor mock) en lugar de api.riotgames.com
         """
         if not api_key:
             raise ValueError("API Key no puede estar vacía")
@@ -20,19 +55,48 @@ class LoLClient:
         self.platform = region.upper()
         
         # HERRAMIENTA 1: Para cosas del juego (Match)
-        self.lol_watcher = LolWatcher(api_key)
+        self.lol_watcher = LolWatcher(api_key, timeout=REQUEST_TIMEOUT, rate_limiter=InstrumentedRateLimiter())
+
+        # riotwatcher construye las URLs a partir de UrlConfig (global del proceso),
+        # así que se redirige después de crear LolWatcher, que lo reinicia
+        UrlConfig.riot_url = UrlConfig.root_url
+        if base_url:
+            UrlConfig.root_url = UrlConfig.riot_url = base_url.rstrip('/')
         
         # HERRAMIENTA 2: Para buscar cuentas (Riot ID)
-        self.riot_watcher = RiotWatcher(api_key)
+        self.riot_watcher = RiotWatcher(api_key, timeout=REQUEST_TIMEOUT, rate_limiter=InstrumentedRateLimiter())
         
         # Mapeo de regiones a rutas continentales
-        self.routing_map = {
-            'BR1': 'americas', 'LA1': 'americas', 'LA2': 'americas', 'NA1': 'americas',
-            'EUN1': 'europe', 'EUW1': 'europe', 'TR1': 'europe', 'RU': 'europe',
-            'JP1': 'asia', 'KR': 'asia',
-            'OC1': 'sea', 'PH2': 'sea', 'SG2': 'sea', 'TH2': 'sea', 'TW2': 'sea', 'VN2': 'sea',
-        }
+        self.routing_map = ROUTING_MAP
         self.continental_route = self.routing_map.get(self.platform, 'europe')
+
+        # Riot ID -> cuenta: el rango y las partidas de una sincronización comparten la consulta
+        self._accounts: Dict[str, dict] = {}
+
+    def _call(self, endpoint: str, func, *args, **kwargs):
+        """
+        Ejecuta una llamada de riotwatcher midiendo su latencia.
+
+        Pasa por el circuit breaker 'riot': si Riot está caído (errores 5xx,
+        timeouts o conexiones rechazadas) la llamada falla al instante con
+        CircuitOpenError en lugar de esperar al timeout.
+        """
+        breaker = get_breaker('riot')
+        breaker.check()
+        try:
+            with metrics.timer('lol_riot_request_seconds', endpoint=endpoint):
+                result = func(*args, **kwargs)
+        except ApiError as err:
+            if err.response is not None and err.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # 4xx: Riot responde, el problema es la petición
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
     
     def get_summoner_info(self, summoner_name_tag: str) -> dict:
         """
@@ -48,6 +112,8 @@ class LoLClient:
             ValueError: Si el formato del Riot ID es incorrecto
             ApiError: Si hay problemas con la API de Riot
         """
+        if summoner_name_tag in self._accounts:
+            return self._accounts[summoner_name_tag]
         try:
             if "#" not in summoner_name_tag:
                 raise ValueError("El formato debe ser Nombre#Tag (Ej: Faker#KR1)")
@@ -57,18 +123,19 @@ class LoLClient:
             if not game_name or not tag_line:
                 raise ValueError("Nombre o Tag vacíos. Usa el formato correcto: Nombre#Tag")
             
-            account = self.riot_watcher.account.by_riot_id(
+            account = self._call(
+                'account.by_riot_id',
+                self.riot_watcher.account.by_riot_id,
                 self.continental_route, 
                 game_name, 
                 tag_line
             )
-            puuid = account['puuid']
-
-            return {
-                'puuid': puuid,
+            self._accounts[summoner_name_tag] = {
+                'puuid': account['puuid'],
                 'name': account['gameName'],
                 'tag': account['tagLine']
             }
+            return self._accounts[summoner_name_tag]
         except ApiError as err:
             if err.response.status_code == 403:
                 raise ApiError("API Key inválida o caducada.", response=err.response)
@@ -78,10 +145,44 @@ class LoLClient:
                 raise ApiError("Límite de peticiones excedido. Espera unos minutos.", response=err.response)
             else:
                 raise ApiError(f"Error de API: {err.response.status_code}", response=err.response)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"Error inesperado al obtener info del invocador: {e}")
 
-    def get_recent_matches(self, summoner_name: str, limit: int = 10, queue: int = 420) -> list:
+    def get_rank_snapshot(self, summoner_name: str, queue: int = 420) -> Optional[dict]:
+        """
+        Rango actual del jugador en una cola (league-v4), con una sola llamada.
+
+        Conviene pedirlo antes que las partidas de la sincronización (ver
+        MatchDatabase.save_rank_snapshot).
+
+        Args:
+            summoner_name: Riot ID en formato 'Nombre#Tag'
+            queue: Cola de las partidas (420=Ranked Solo/Duo, 440=Ranked Flex)
+
+        Returns:
+            Dict de rank_tracking.queue_entry más puuid y taken_at, o None si no tiene rango
+
+        Raises:
+            Exception: Si hay errores al consultar la API
+        """
+        try:
+            puuid = self.get_summoner_info(summoner_name)['puuid']
+            taken_at = datetime.now()
+            entries = self._call('league.by_puuid', self.lol_watcher.league.by_puuid, self.region, puuid)
+        except CircuitOpenError:
+            raise
+        except ApiError as e:
+            raise Exception(f"Error de API al obtener el rango: {str(e)}")
+
+        snapshot = rank_tracking.queue_entry(entries, queue)
+        if snapshot:
+            snapshot.update(puuid=puuid, taken_at=taken_at)
+        return snapshot
+
+    def get_recent_matches(self, summoner_name: str, limit: int = 10, queue: int = 420,
+                           start_time: Optional[datetime] = None) -> list:
         """
         Descarga las últimas 'limit' partidas del jugador.
         
@@ -89,6 +190,7 @@ class LoLClient:
             summoner_name: Riot ID en formato 'Nombre#Tag'
             limit: Número de partidas a descargar (máx 20)
             queue: Tipo de cola (420=Ranked Solo/Duo, 440=Ranked Flex, None=Todas)
+            start_time: Sólo partidas empezadas desde ese momento (ver MatchDatabase.get_lp_sync_start)
             
         Returns:
             Lista de diccionarios con estadísticas de cada partida
@@ -102,11 +204,14 @@ class LoLClient:
             puuid = summoner_info['puuid']
             
             # 2. Buscar lista de IDs (FILTRANDO POR TIPO DE COLA)
-            match_ids = self.lol_watcher.match.matchlist_by_puuid(
+            match_ids = self._call(
+                'match.matchlist_by_puuid',
+                self.lol_watcher.match.matchlist_by_puuid,
                 self.continental_route, 
                 puuid, 
                 count=min(limit, 20),  # API limita a 20
-                queue=queue
+                queue=queue,
+                start_time=int(start_time.timestamp()) if start_time else None
             )
             
             if not match_ids:
@@ -116,83 +221,47 @@ class LoLClient:
             results = []
             for m_id in match_ids:
                 try:
-                    match_data = self.lol_watcher.match.by_id(self.continental_route, m_id)
-                    participant = next(
-                        (p for p in match_data['info']['participants'] if p['puuid'] == puuid), 
-                        None
-                    )
-                    
-                    if not participant:
+                    match_data = self._call('match.by_id', self.lol_watcher.match.by_id, self.continental_route, m_id)
+                    match_parser.archive_raw(match_data, puuid)
+                    stats = self.parse_match(match_data, puuid)
+                    if not stats:
                         continue
-                    
-                    # Cálculo seguro del rol
-                    role = participant.get('teamPosition', '')
-                    if not role or role == 'Invalid':
-                        role = participant.get('individualPosition', 'Unknown')
-                    
-                    # Duración del juego en minutos
-                    game_duration_minutes = round(match_data['info']['gameDuration'] / 60, 2)
-                    
-                    # Total de CS
-                    cs_total = participant['totalMinionsKilled'] + participant['neutralMinionsKilled']
-                    
-                    # Calcular CS/min
-                    cs_min = round(cs_total / game_duration_minutes, 2) if game_duration_minutes > 0 else 0.0
-
-                    stats = {
-                        'game_id': match_data['metadata']['matchId'],
-                        'date': datetime.fromtimestamp(
-                            match_data['info']['gameEndTimestamp'] / 1000
-                        ).strftime('%Y-%m-%d %H:%M:%S'),
-                        'champion_name': participant['championName'],
-                        'kills': participant['kills'],
-                        'deaths': participant['deaths'],
-                        'assists': participant['assists'],
-                        'win': participant['win'],
-                        'cs_total': cs_total,
-                        'cs_min': cs_min,
-                        'game_duration_minutes': game_duration_minutes,
-                        'control_wards_bought': participant['visionWardsBoughtInGame'],
-                        'role': role,
-                        'enemy_champion': self._get_enemy_laner(match_data, participant)
-                    }
                     results.append(stats)
-                    
+
+                except CircuitOpenError:
+                    raise  # Riot caído: no tiene sentido seguir con el resto de partidas
+                except MalformedMatchError as e:
+                    metrics.inc('lol_riot_match_errors_total', reason=e.reason)
+                    print(f"Partida {m_id} con formato inesperado: {e}")
+                    continue
                 except Exception as e:
+                    metrics.inc('lol_riot_match_errors_total')
                     print(f"Error procesando partida {m_id}: {e}")
                     continue
             
             return results
             
+        except CircuitOpenError:
+            raise
         except ApiError as e:
             raise Exception(f"Error de API al obtener partidas: {str(e)}")
         except Exception as e:
             raise Exception(f"Error inesperado al obtener partidas: {str(e)}")
     
-    def _get_enemy_laner(self, match_data: dict, player_data: dict) -> str:
+    @staticmethod
+    def parse_match(match_data: dict, puuid: str) -> dict:
         """
-        Intenta identificar al rival directo en la lane.
+        Extrae las estadísticas del jugador de la respuesta de match-v5.
         
         Args:
-            match_data: Datos completos de la partida
-            player_data: Datos del jugador
+            match_data: Datos completos de la partida (respuesta de match.by_id)
+            puuid: PUUID del jugador
             
         Returns:
-            Nombre del campeón enemigo o 'Unknown'
+            Dict con las estadísticas de la partida o None si el jugador no aparece
+
+        Raises:
+            MalformedMatchError: Si la respuesta no tiene la forma esperada
         """
-        try:
-            player_team = player_data['teamId']
-            player_role = player_data.get('teamPosition')
-            
-            if not player_role or player_role == 'Invalid': 
-                return 'Unknown'
-            
-            for participant in match_data['info']['participants']:
-                if (participant['teamId'] != player_team and 
-                    participant.get('teamPosition') == player_role):
-                    return participant['championName']
-                    
-            return 'Unknown'
-        except Exception as e:
-            print(f"Error identificando rival: {e}")
-            return 'Unknown'
\ No newline at end of file
+        record = match_parser.parse_match(match_data, puuid)
+        return record.to_dict() if record else None
\ No newline at end of file
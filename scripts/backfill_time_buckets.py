@@ -0,0 +1,18 @@
+import argparse
+from dotenv import load_dotenv
+from database import MatchDatabase
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Calcula día/hora (zona PLAYER_TIMEZONE) de las partidas para el heatmap.")
+parser.add_argument('--all', action='store_true', help="Recalcula todas las partidas (p.ej. tras cambiar PLAYER_TIMEZONE)")
+args = parser.parse_args()
+
+db = MatchDatabase()
+if not db.connection:
+    print("❌ No se pudo conectar a la base de datos.")
+    raise SystemExit(1)
+
+updated = db.backfill_time_buckets(recompute=args.all)
+print(f"✅ {updated} partidas actualizadas.")
+db.close()
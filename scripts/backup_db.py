@@ -1,23 +1,46 @@
-import shutil
 import os
-from datetime import datetime
+import argparse
+from dotenv import load_dotenv
+from database import MatchDatabase
+from backup import export_all, import_all, DEFAULT_BATCH_ROWS, FORMATS
 
 # Rutas
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Subimos un nivel a la raíz
-DB_PATH = os.path.join(BASE_DIR, 'data', 'lol_tracker.db')
 BACKUP_DIR = os.path.join(BASE_DIR, 'data', 'backups')
 
-# Crear carpeta de backups si no existe
-if not os.path.exists(BACKUP_DIR):
-    os.makedirs(BACKUP_DIR)
+load_dotenv()
 
-# Nombre del archivo con fecha
-timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-backup_filename = f"backup_{timestamp}.db"
-backup_path = os.path.join(BACKUP_DIR, backup_filename)
+parser = argparse.ArgumentParser(description="Backup de la base de datos en ficheros Parquet/Arrow particionados por mes.")
+subparsers = parser.add_subparsers(dest='command', required=True)
 
-if os.path.exists(DB_PATH):
-    shutil.copy2(DB_PATH, backup_path)
-    print(f"✅ Backup creado con éxito: {backup_filename}")
-else:
-    print("❌ No se encontró la base de datos original.")
\ No newline at end of file
+export_parser = subparsers.add_parser('export', help="Exporta las filas nuevas o editadas desde el último backup")
+export_parser.add_argument('--full', action='store_true', help="Ignora el watermark y exporta todo")
+export_parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+
+import_parser = subparsers.add_parser('import', help="Restaura un backup (las filas existentes se actualizan si el backup es más reciente)")
+
+for sub in (export_parser, import_parser):
+    sub.add_argument('--dir', default=BACKUP_DIR, help="Carpeta del backup")
+    sub.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help="Filas por lote en memoria")
+
+args = parser.parse_args()
+
+db = MatchDatabase()
+if not db.connection:
+    print("❌ No se pudo conectar a la base de datos.")
+    raise SystemExit(1)
+
+try:
+    if args.command == 'export':
+        for r in export_all(db.connection, args.dir, full=args.full, fmt=args.format, batch_rows=args.batch_rows):
+            desde = f"desde {r['since']}" if r['since'] else "completo"
+            print(f"✅ {r['table']}: {r['rows']} filas ({desde}) en {len(r['files'])} ficheros. Watermark: {r['watermark']}")
+    else:
+        for r in import_all(db.connection, args.dir, batch_rows=args.batch_rows,
+                            prepare=db.prepare_import, finish=db.finish_import):
+            print(f"✅ {r['table']}: {r['written']} filas nuevas o actualizadas de {r['rows_read']} leídas ({r['files']} ficheros)")
+except Exception as e:
+    print(f"❌ Error en el backup: {e}")
+    raise SystemExit(1)
+finally:
+    db.close()
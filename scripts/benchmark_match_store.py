@@ -0,0 +1,131 @@
+import gc
+import time
+import argparse
+import tracemalloc
+from dotenv import load_dotenv
+from riot_client import LoLClient
+from match_store import MatchStore
+
+from mock_riot_server import fake_match
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Compara memoria y velocidad de MatchStore frente a listas de dicts.")
+parser.add_argument('--matches', type=int, default=50000, help="Partidas sintéticas (mock de Riot)")
+parser.add_argument('--db', action='store_true', help="Usa el historial de la base de datos en vez de partidas sintéticas")
+parser.add_argument('--repeat', type=int, default=5, help="Repeticiones de cada recorrido (se toma la mejor)")
+args = parser.parse_args()
+
+
+def synthetic_rows():
+    """Partidas del mock parseadas con LoLClient.parse_match (el camino de la sincronización)."""
+    for n in range(args.matches):
+        match = fake_match(f"EUW1_1_{n}")
+        yield LoLClient.parse_match(match, match['metadata']['participants'][0])
+
+
+def db_rows():
+    from database import MatchDatabase
+    db = MatchDatabase()
+    if not db.connection:
+        print("❌ No se pudo conectar a la base de datos.")
+        raise SystemExit(1)
+    return db.iter_matches()
+
+
+def retained_memory(build):
+    """Resultado de build() y memoria que sigue ocupando (bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
+
+
+def best_of(fn) -> float:
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+source = db_rows if args.db else synthetic_rows
+rows, dict_bytes = retained_memory(lambda: [dict(r) for r in source()])
+store, store_bytes = retained_memory(lambda: MatchStore.from_rows(source()))
+n = len(rows)
+if not n:
+    print("⚠️ No hay partidas que comparar.")
+    raise SystemExit(0)
+
+
+# El mismo análisis de cada forma: winrate, KDA medio y winrate de un campeón
+champion = rows[0].get('champion') or rows[0].get('champion_name')
+
+
+def analyze_dicts():
+    wins = kills = deaths = assists = champ_games = champ_wins = 0
+    for r in rows:
+        wins += r['win']
+        kills += r['kills']
+        deaths += r['deaths']
+        assists += r['assists']
+        if (r.get('champion') or r.get('champion_name')) == champion:
+            champ_games += 1
+            champ_wins += r['win']
+    return wins, kills, deaths, assists, champ_games, champ_wins
+
+
+def analyze_rows():
+    wins = kills = deaths = assists = champ_games = champ_wins = 0
+    for r in store:
+        wins += r['win']
+        kills += r['kills']
+        deaths += r['deaths']
+        assists += r['assists']
+        if r['champion'] == champion:
+            champ_games += 1
+            champ_wins += r['win']
+    return wins, kills, deaths, assists, champ_games, champ_wins
+
+
+def analyze_tuples():
+    wins = kills = deaths = assists = champ_games = champ_wins = 0
+    for win, k, d, a, champ in store.iter_tuples('win', 'kills', 'deaths', 'assists', 'champion'):
+        wins += win
+        kills += k
+        deaths += d
+        assists += a
+        if champ == champion:
+            champ_games += 1
+            champ_wins += win
+    return wins, kills, deaths, assists, champ_games, champ_wins
+
+
+def analyze_columns():
+    win = store.column('win')
+    mask = store.column('champion') == store.string_id(champion)
+    return (int(win.sum()), int(store.column('kills').sum(dtype='int64')),
+            int(store.column('deaths').sum(dtype='int64')), int(store.column('assists').sum(dtype='int64')),
+            int(mask.sum()), int(win[mask].sum()))
+
+
+expected = analyze_dicts()
+for fn in (analyze_rows, analyze_tuples, analyze_columns):
+    assert fn() == expected, f"{fn.__name__} no coincide con la lista de dicts"
+
+print(f"📦 {n} partidas ({'base de datos' if args.db else 'mock de Riot + parse_match'})\n")
+print(f"{'':<28} {'Memoria':>10} {'Bytes/partida':>14}")
+print(f"{'Lista de dicts':<28} {dict_bytes / 1e6:>8.1f}MB {dict_bytes / n:>14.0f}")
+print(f"{'MatchStore':<28} {store_bytes / 1e6:>8.1f}MB {store_bytes / n:>14.0f}")
+print(f"   → {dict_bytes / store_bytes:.1f}x menos memoria")
+print(f"   → carga: {best_of(lambda: MatchStore.from_rows(rows)) / n * 1e6:.1f} µs por partida\n")
+
+base = best_of(analyze_dicts)
+print(f"{'Recorrido (winrate + KDA)':<28} {'Tiempo':>10} {'vs dicts':>14}")
+for label, fn in (("Lista de dicts", analyze_dicts), ("MatchStore: MatchRow", analyze_rows),
+                  ("MatchStore: iter_tuples", analyze_tuples), ("MatchStore: columnas NumPy", analyze_columns)):
+    elapsed = best_of(fn)
+    print(f"{label:<28} {elapsed * 1000:>8.1f}ms {base / elapsed:>13.1f}x")
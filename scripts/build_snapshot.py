@@ -0,0 +1,44 @@
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+from database import MatchDatabase
+import snapshot
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Precalcula el dashboard en un snapshot JSON/HTML (pensado para después de cada sync).")
+parser.add_argument('--out', default=None, help="Carpeta de destino (por defecto SNAPSHOT_DIR o data/snapshot)")
+parser.add_argument('--no-html', action='store_true', help="Sólo el JSON que lee la app, sin dashboard.html")
+parser.add_argument('--riot-id', default=os.getenv("RIOT_ID"), help="Cuenta cuyo rango se incluye (por defecto RIOT_ID del .env)")
+args = parser.parse_args()
+
+# El rango es por cuenta: el Riot ID se resuelve a su PUUID (una llamada a la API)
+puuid = None
+if args.riot_id:
+    try:
+        from riot_client import LoLClient
+        client = LoLClient(os.getenv("RIOT_API_KEY"), os.getenv("RIOT_REGION", "EUW1"), base_url=os.getenv("RIOT_API_BASE_URL"))
+        puuid = client.get_summoner_info(args.riot_id)['puuid']
+    except Exception as e:
+        print(f"⚠️ No se pudo resolver {args.riot_id}: el snapshot irá sin rango ({e})")
+
+db = MatchDatabase()
+if not db.connection:
+    print("❌ No se pudo conectar a la base de datos.")
+    raise SystemExit(1)
+
+start = time.perf_counter()
+try:
+    data = snapshot.build_snapshot(db, puuid)
+except Exception as e:
+    print(f"❌ No se genera el snapshot ({e}): se mantiene el anterior.")
+    raise SystemExit(1)
+finally:
+    db.close()
+
+if snapshot.write_snapshot(data, args.out, html=not args.no_html):
+    print(f"✅ Snapshot {data['revision']} generado en {time.perf_counter() - start:.2f}s "
+          f"({data['stats'].get('total_games', 0)} partidas).")
+else:
+    print(f"✅ Sin cambios desde el último snapshot ({data['revision']}).")
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import statistics
+from typing import List, Dict, Any
+
+import psycopg2
+from dotenv import load_dotenv
+import streamlit
+from streamlit.testing.v1 import AppTest
+from streamlit.runtime.runtime import Runtime
+
+from mock_riot_server import start_mock_server
+
+# La simulación de sesiones concurrentes toca internos privados de Streamlit
+# (ScriptCache.get_bytecode, Runtime._instance/instance/exists), que pueden cambiar
+# entre versiones. Probado con este rango; fuera de él se avisa, y si faltan se aborta
+TESTED_STREAMLIT = ((1, 37), (1, 66))
+
+try:
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+except ImportError:
+    ScriptCache = None
+
+# Rutas
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Subimos un nivel a la raíz
+APP_PATH = os.path.join(BASE_DIR, 'app.py')
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Prueba de carga: N sesiones simultáneas de la app contra un mock de Riot.")
+parser.add_argument('--sessions', default='1,5,10,20', help="Niveles de concurrencia separados por coma")
+parser.add_argument('--actions', type=int, default=15, help="Interacciones por sesión")
+parser.add_argument('--think-ms', type=float, default=200, help="Pausa media entre interacciones")
+parser.add_argument('--riot-url', help="Mock de Riot ya arrancado (por defecto se arranca uno en este proceso)")
+parser.add_argument('--mock-port', type=int, default=8089)
+parser.add_argument('--mock-latency-ms', type=float, default=50)
+parser.add_argument('--seed', type=int, default=42)
+parser.add_argument('--out', help="Guarda los resultados en JSON")
+args = parser.parse_args()
+
+if not args.riot_url:
+    start_mock_server(args.mock_port, latency=args.mock_latency_ms / 1000)
+os.environ['RIOT_API_BASE_URL'] = args.riot_url or f"http://127.0.0.1:{args.mock_port}"
+os.environ.setdefault('RIOT_API_KEY', 'RGAPI-load-test')
+os.environ.setdefault('RIOT_ID', 'LoadTest#EUW')
+
+_missing = [name for name, ok in (
+    ('ScriptCache.get_bytecode', ScriptCache is not None and callable(getattr(ScriptCache, 'get_bytecode', None))),
+    ('Runtime._instance', hasattr(Runtime, '_instance')),
+    ('Runtime.instance', callable(getattr(Runtime, 'instance', None))),
+    ('Runtime.exists', callable(getattr(Runtime, 'exists', None))),
+) if not ok]
+if _missing:
+    print(f"❌ Streamlit {streamlit.__version__} no tiene {', '.join(_missing)}: la prueba de carga "
+          f"necesita Streamlit {'.'.join(map(str, TESTED_STREAMLIT[0]))}-{'.'.join(map(str, TESTED_STREAMLIT[1]))}.")
+    raise SystemExit(1)
+_version = tuple(int(part) for part in streamlit.__version__.split('.')[:2] if part.isdigit())
+if not TESTED_STREAMLIT[0] <= _version <= TESTED_STREAMLIT[1]:
+    print(f"⚠️ Streamlit {streamlit.__version__} no está probado con la prueba de carga "
+          f"({'.'.join(map(str, TESTED_STREAMLIT[0]))}-{'.'.join(map(str, TESTED_STREAMLIT[1]))}); "
+          f"los tiempos pueden no ser comparables.")
+
+
+# AppTest compila app.py en cada run con una ScriptCache nueva; el servidor real lo
+# compila una vez por proceso. Se comparte el bytecode entre sesiones para medir
+# lo mismo que en producción (y evitar compilar en paralelo desde varios hilos).
+_bytecode: Dict[str, Any] = {}
+_bytecode_lock = threading.Lock()
+_compile = ScriptCache.get_bytecode
+
+
+def _shared_bytecode(self, script_path: str):
+    with _bytecode_lock:
+        if script_path not in _bytecode:
+            _bytecode[script_path] = _compile(self, script_path)
+        return _bytecode[script_path]
+
+
+ScriptCache.get_bytecode = _shared_bytecode
+
+# Cada AppTest.run() instala un Runtime simulado y lo quita al terminar, dejando sin
+# él a las sesiones que siguen en marcha. En el servidor real todas las sesiones
+# comparten un Runtime, así que se conserva el último instalado.
+_runtime: Dict[str, Any] = {'instance': None}
+
+
+def _shared_runtime(cls):
+    if cls._instance is not None:
+        _runtime['instance'] = cls._instance
+    if _runtime['instance'] is None:
+        raise RuntimeError("Runtime hasn't been created!")
+    return _runtime['instance']
+
+
+Runtime.instance = classmethod(_shared_runtime)
+Runtime.exists = classmethod(lambda cls: cls._instance is not None or _runtime['instance'] is not None)
+
+
+# --- Conexiones a Postgres ---
+class ConnectionMonitor(threading.Thread):
+    """Muestrea pg_stat_activity y guarda el máximo de conexiones a la base de datos."""
+
+    def __init__(self, interval: float = 0.02):
+        super().__init__(name='pg-monitor', daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+        self._connection = psycopg2.connect(
+            host=os.getenv("DB_HOST"), database=os.getenv("DB_NAME"), user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"), port=os.getenv("DB_PORT", "5432")
+        )
+        self._connection.autocommit = True
+
+    def run(self):
+        with self._connection.cursor() as cursor:
+            while not self._stop_event.is_set():
+                cursor.execute(
+                    "SELECT COUNT(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND pid != pg_backend_pid()"
+                )
+                self.peak = max(self.peak, cursor.fetchone()[0])
+                time.sleep(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        self._connection.close()
+        return self.peak
+
+
+# --- Interacciones de un usuario ---
+def _widget(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+def open_tab(at: AppTest, rng: random.Random):
+    tabs = at.radio(key='active_tab').options
+    return at.radio(key='active_tab').set_value(rng.choice(tabs))
+
+
+def scout_search(at: AppTest, rng: random.Random):
+    at.radio(key='active_tab').set_value("🔎 Scout & Matchups").run()
+    _widget(at.text_input, "Yo juego con...").input(rng.choice(["Jax", "Fiora", "Camille", ""]))
+    return _widget(at.text_input, "Contra...").input(rng.choice(["Zed", "Darius", "Renekton", "a"]))
+
+
+def sync(at: AppTest, rng: random.Random):
+    at.radio(key='active_tab').set_value("📊 Diario & Sincronización").run()
+    return _widget(at.button, "🔄 Sincronizar Rankeds").click()
+
+
+def post_game_form(at: AppTest, rng: random.Random):
+    if not at.session_state['last_match_data']:
+        sync(at, rng).run()
+    at.radio(key='active_tab').set_value("📊 Diario & Sincronización").run()
+    _widget(at.number_input, "LP Ganados/Perdidos").set_value(rng.choice([-18, -15, 15, 20]))
+    _widget(at.text_area, "🧠 Notas de Matchup (Estrategia para la próxima)").input(f"Prueba de carga {rng.random():.3f}")
+    return _widget(at.button, "💾 Guardar Análisis").click()
+
+
+# Peso aproximado de cada interacción en una sesión real
+ACTIONS = [(open_tab, 5), (scout_search, 3), (post_game_form, 1), (sync, 1)]
+
+
+def run_session(index: int, results: List[Dict[str, Any]], barrier: threading.Barrier):
+    rng = random.Random(args.seed + index)
+    at = AppTest.from_file(APP_PATH, default_timeout=300)
+    at.session_state['riot_id'] = f"LoadTest{index}#EUW"  # Cada sesión es un jugador distinto
+
+    def timed(action: str, pending):
+        start = time.perf_counter()
+        error = None
+        try:
+            pending.run()
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = str(e)
+        results.append({'action': action, 'seconds': time.perf_counter() - start, 'error': error})
+
+    barrier.wait()
+    timed('primer render', at)
+    for _ in range(args.actions):
+        time.sleep(rng.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0)
+        action = rng.choices([a for a, _ in ACTIONS], weights=[w for _, w in ACTIONS])[0]
+        try:
+            pending = action(at, rng)
+        except Exception as e:
+            results.append({'action': action.__name__, 'seconds': 0.0, 'error': f"Interacción no disponible: {e}"})
+            continue
+        timed(action.__name__, pending)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_level(sessions: int) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    barrier = threading.Barrier(sessions)
+    monitor = ConnectionMonitor()
+    monitor.start()
+    threads = [threading.Thread(target=run_session, args=(i, results, barrier)) for i in range(sessions)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    peak = monitor.stop()
+
+    latencies = [r['seconds'] for r in results if not r['error']]
+    by_action = {}
+    for action in sorted({r['action'] for r in results}):
+        values = [r['seconds'] for r in results if r['action'] == action and not r['error']]
+        by_action[action] = {'count': len(values), 'p50_ms': percentile(values, 50) * 1000,
+                             'p95_ms': percentile(values, 95) * 1000}
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'errors': len(results) - len(latencies),
+        'error_samples': sorted({r['error'] for r in results if r['error']})[:3],
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'max_ms': max(latencies) * 1000 if latencies else 0.0,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'peak_connections': peak,
+        'elapsed_s': elapsed,
+        'by_action': by_action,
+    }
+
+
+levels = [int(n) for n in args.sessions.split(',') if n.strip()]
+print(f"🧪 Mock de Riot: {os.environ['RIOT_API_BASE_URL']} | {args.actions} interacciones por sesión")
+print("   (sync y el formulario incluyen las pausas time.sleep de la propia app)\n")
+print(f"{'Sesiones':>8} {'Reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'Máx ms':>8} {'Reruns/s':>9} {'Conex. pico':>12} {'Errores':>8}")
+
+report = []
+for sessions in levels:
+    r = run_level(sessions)
+    report.append(r)
+    print(f"{r['sessions']:>8} {r['reruns']:>7} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['max_ms']:>8.0f} "
+          f"{r['throughput']:>9.1f} {r['peak_connections']:>12} {r['errors']:>8}")
+    for action, a in r['by_action'].items():
+        print(f"{'':>8}   · {action:<16} n={a['count']:<4} p50 {a['p50_ms']:>7.0f} ms   p95 {a['p95_ms']:>7.0f} ms")
+    for sample in r['error_samples']:
+        print(f"{'':>8}   ⚠️ {sample}")
+
+if args.out:
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {args.out}")
@@ -0,0 +1,196 @@
+import re
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+import rank_tracking
+
+# Servidor falso de la API de Riot (account-v1, match-v5 y league-v4) para pruebas
+# de carga y desarrollo sin API Key. Cada cuenta "juega" una partida cada GAME_INTERVAL
+# segundos, así que sincronizar de vez en cuando trae partidas nuevas, y su rango
+# sube y baja con esas mismas partidas.
+# Uso con la app: RIOT_API_BASE_URL=http://localhost:8089
+
+GAME_INTERVAL = 1800
+PLATFORM = 'EUW1'
+CHAMPIONS = ['Jax', 'Fiora', 'Camille', 'Renekton', 'Darius', 'Garen', 'Riven', 'Irelia', 'Aatrox', 'Sett',
+             'Ahri', 'Zed', 'Syndra', 'Yasuo', 'Lee Sin', 'Vi', 'Jinx', 'Ashe', 'Thresh', 'Lulu']
+POSITIONS = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+
+_accounts: Dict[int, str] = {}  # número de cuenta -> puuid
+_accounts_lock = threading.Lock()
+
+# La temporada de cada cuenta empieza SEASON_GAMES partidas antes de la primera
+# consulta, en START_POINTS (GOLD IV 0 LP); se guarda lo ya calculado
+SEASON_GAMES = 30
+START_POINTS = 1200
+_ladders: Dict[int, Tuple[int, int, int, int]] = {}  # cuenta -> (última partida, puntos, victorias, derrotas)
+
+
+def _account_number(puuid: str) -> int:
+    number = zlib.crc32(puuid.encode('utf-8'))
+    with _accounts_lock:
+        _accounts[number] = puuid
+    return number
+
+
+def _game_result(match_id: str) -> Tuple[random.Random, int, bool]:
+    # La cuenta es siempre el primer participante (equipo azul): gana si gana el azul
+    rng = random.Random(match_id)
+    duration = rng.randint(1200, 2400)
+    return rng, duration, rng.random() < 0.5
+
+
+def fake_league_entries(puuid: str) -> list:
+    """Rango de league-v4 de la cuenta: sale de sus partidas falsas hasta ahora."""
+    number = _account_number(puuid)
+    latest = int(time.time() // GAME_INTERVAL)
+    with _accounts_lock:
+        last, points, wins, losses = _ladders.get(number, (latest - SEASON_GAMES, START_POINTS, 0, 0))
+        for n in range(last + 1, latest + 1):
+            match_id = f"{PLATFORM}_{number}_{n}"
+            lp = 15 + zlib.crc32(match_id.encode('utf-8')) % 11
+            if _game_result(match_id)[2]:
+                points, wins = points + lp, wins + 1
+            else:
+                points, losses = max(points - lp, 0), losses + 1
+        _ladders[number] = (max(last, latest), points, wins, losses)
+
+    tier, rank, lp = rank_tracking.from_ladder_points(points)
+    return [{
+        'leagueId': f"mock-league-{tier.lower()}",
+        'queueType': 'RANKED_SOLO_5x5',
+        'tier': tier,
+        'rank': rank,
+        'puuid': puuid,
+        'leaguePoints': lp,
+        'wins': wins,
+        'losses': losses,
+        'veteran': False,
+        'inactive': False,
+        'freshBlood': False,
+        'hotStreak': False,
+    }]
+
+
+def fake_match(match_id: str) -> Optional[Dict[str, Any]]:
+    """Partida de match-v5 determinista a partir de su ID (EUW1_<cuenta>_<n>)."""
+    match = re.match(r'^[A-Z0-9]+_(\d+)_(\d+)$', match_id)
+    if not match:
+        return None
+    account, n = int(match.group(1)), int(match.group(2))
+    with _accounts_lock:
+        puuid = _accounts.get(account, f"mock-puuid-{account}")
+
+    rng, duration, blue_wins = _game_result(match_id)
+    end_ms = n * GAME_INTERVAL * 1000
+    champions = rng.sample(CHAMPIONS, 10)
+    participants = []
+    for i in range(10):
+        team_id = 100 if i < 5 else 200
+        cs = rng.randint(120, 280)
+        participants.append({
+            'puuid': puuid if i == 0 else f"mock-puuid-{account}-{n}-{i}",
+            'championName': champions[i],
+            'teamId': team_id,
+            'teamPosition': POSITIONS[i % 5],
+            'individualPosition': POSITIONS[i % 5],
+            'kills': rng.randint(0, 15),
+            'deaths': rng.randint(0, 10),
+            'assists': rng.randint(0, 20),
+            'win': blue_wins == (team_id == 100),
+            'totalMinionsKilled': cs,
+            'neutralMinionsKilled': rng.randint(0, 30),
+            'visionWardsBoughtInGame': rng.randint(0, 5),
+        })
+
+    patch = 1 + (n * GAME_INTERVAL // (14 * 86400)) % 24
+    return {
+        'metadata': {'matchId': match_id, 'participants': [p['puuid'] for p in participants]},
+        'info': {
+            'gameDuration': duration,
+            'gameEndTimestamp': end_ms,
+            'gameStartTimestamp': end_ms - duration * 1000,
+            'gameVersion': f"15.{patch}.{600 + patch}.1234",
+            'queueId': 420,
+            'participants': participants,
+        },
+    }
+
+
+class MockRiotHandler(BaseHTTPRequestHandler):
+    latency = 0.0  # Segundos de espera por petición (simula la latencia de Riot)
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        account = re.match(r'^/riot/account/v1/accounts/by-riot-id/([^/]+)/([^/]+)$', url.path)
+        if account:
+            game_name, tag_line = unquote(account.group(1)), unquote(account.group(2))
+            puuid = f"mock-puuid-{game_name.lower()}-{tag_line.lower()}"
+            _account_number(puuid)
+            return self._send_json({'puuid': puuid, 'gameName': game_name, 'tagLine': tag_line})
+
+        ids = re.match(r'^/lol/match/v5/matches/by-puuid/([^/]+)/ids$', url.path)
+        if ids:
+            number = _account_number(unquote(ids.group(1)))
+            count = int(query.get('count', ['20'])[0])
+            start = int(query.get('start', ['0'])[0])
+            latest = int(time.time() // GAME_INTERVAL)
+            ids = [(f"{PLATFORM}_{number}_{latest - i}", latest - i) for i in range(start, start + count)]
+            if 'startTime' in query:
+                # Como en Riot, startTime filtra por el inicio de la partida (las falsas duran hasta 40 min)
+                ids = [(match_id, n) for match_id, n in ids
+                       if n * GAME_INTERVAL - _game_result(match_id)[1] >= int(query['startTime'][0])]
+            return self._send_json([match_id for match_id, _ in ids])
+
+        league = re.match(r'^/lol/league/v4/entries/by-puuid/([^/]+)$', url.path)
+        if league:
+            return self._send_json(fake_league_entries(unquote(league.group(1))))
+
+        by_id = re.match(r'^/lol/match/v5/matches/([^/]+)$', url.path)
+        if by_id:
+            match = fake_match(unquote(by_id.group(1)))
+            if match:
+                return self._send_json(match)
+
+        self._send_json({'status': {'message': 'Data not found', 'status_code': 404}}, status=404)
+
+    def _send_json(self, payload: Any, status: int = 200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(port: int = 8089, host: str = '127.0.0.1', latency: float = 0.0) -> ThreadingHTTPServer:
+    """Arranca el servidor mock en un hilo en segundo plano y lo devuelve."""
+    MockRiotHandler.latency = latency
+    server = ThreadingHTTPServer((host, port), MockRiotHandler)
+    threading.Thread(target=server.serve_forever, name='mock-riot', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor mock de la API de Riot (account-v1, match-v5 y league-v4).")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--latency-ms', type=float, default=50, help="Latencia simulada por petición")
+    args = parser.parse_args()
+
+    MockRiotHandler.latency = args.latency_ms / 1000
+    print(f"🧪 Mock de Riot en http://{args.host}:{args.port} (RIOT_API_BASE_URL)")
+    ThreadingHTTPServer((args.host, args.port), MockRiotHandler).serve_forever()
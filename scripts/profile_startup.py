@@ -0,0 +1,48 @@
+import os
+import re
+import sys
+import time
+import subprocess
+from dotenv import load_dotenv
+from streamlit.testing.v1 import AppTest
+
+# Rutas
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Subimos un nivel a la raíz
+APP_PATH = os.path.join(BASE_DIR, 'app.py')
+
+HEAVY_MODULES = ['streamlit', 'psycopg2', 'pandas', 'numpy', 'plotly.graph_objects', 'riotwatcher']
+
+load_dotenv()
+
+# 1. Coste de importación de cada módulo pesado, en un intérprete limpio para cada uno
+print("📦 Importaciones (proceso nuevo por módulo)")
+for module in HEAVY_MODULES:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=BASE_DIR)
+    # Formato: "import time: self [us] | cumulative | imported package"
+    times = [int(m.group(1)) for m in re.finditer(rf'\|\s+(\d+) \|\s*{re.escape(module)}$', result.stderr, re.M)]
+    print(f"   {module:<22} {times[-1] / 1000:8.1f} ms" if times else f"   {module:<22}   (no disponible)")
+
+# 2. Primer render y cambio de pestaña, como lo vería un usuario
+print("\n🖥️  Renders de app.py")
+at = AppTest.from_file(APP_PATH, default_timeout=120)
+
+start = time.perf_counter()
+at.run()
+print(f"   {'primer render (frío)':<32} {(time.perf_counter() - start) * 1000:8.1f} ms")
+loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+print(f"   módulos pesados cargados: {', '.join(loaded)}")
+
+if at.exception or not at.radio:
+    print("⚠️ La app no llegó a mostrar las pestañas (¿falta RIOT_API_KEY o RIOT_ID en .env?).")
+    raise SystemExit(1)
+
+tabs = at.radio(key='active_tab').options
+for tab in tabs[1:] + tabs[:1]:
+    start = time.perf_counter()
+    at.radio(key='active_tab').set_value(tab).run()
+    print(f"   {'rerun → ' + tab:<32} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+start = time.perf_counter()
+at.run()
+print(f"   {'rerun sin cambios':<32} {(time.perf_counter() - start) * 1000:8.1f} ms")
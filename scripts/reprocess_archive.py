@@ -0,0 +1,73 @@
+import os
+import time
+import argparse
+from collections import Counter
+from dotenv import load_dotenv
+from match_parser import parse_lines, read_archive, SCHEMA_VERSION, DEFAULT_CHUNK_SIZE
+
+# Rutas
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Subimos un nivel a la raíz
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Vuelve a derivar las partidas desde el archivo de respuestas crudas de Riot.")
+parser.add_argument('--dir', default=os.getenv("RAW_ARCHIVE_DIR", os.path.join(BASE_DIR, 'data', 'raw')),
+                    help="Carpeta del archivo (RAW_ARCHIVE_DIR)")
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Procesos en paralelo (1 = sin pool)")
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Partidas por bloque enviado a cada proceso")
+parser.add_argument('--save', action='store_true', help="Guarda en la base de datos las partidas que falten")
+parser.add_argument('--batch', type=int, default=500, help="Partidas por transacción con --save")
+
+
+def main():
+    args = parser.parse_args()
+    if not os.path.isdir(args.dir):
+        print(f"❌ No existe el archivo {args.dir} (activa RAW_ARCHIVE_DIR al sincronizar).")
+        raise SystemExit(1)
+
+    db = None
+    if args.save:
+        from database import MatchDatabase
+        db = MatchDatabase()
+        if not db.connection:
+            print("❌ No se pudo conectar a la base de datos.")
+            raise SystemExit(1)
+
+    counts: Counter = Counter()
+    seen = set()
+    batch, saved, duplicates = [], 0, 0
+    start = time.perf_counter()
+    print(f"⚙️ Procesando {args.dir} con {args.workers} procesos (esquema v{SCHEMA_VERSION})...")
+
+    for record in parse_lines(read_archive(args.dir), workers=args.workers, chunk_size=args.chunk_size, counts=counts):
+        # Cada sincronización vuelve a descargar las últimas partidas: se archivan repetidas
+        if record.game_id in seen:
+            duplicates += 1
+            continue
+        seen.add(record.game_id)
+        if db:
+            batch.append(record.to_dict())
+            if len(batch) >= args.batch:
+                saved += db.save_matches(batch)
+                batch = []
+    if db:
+        if batch:
+            saved += db.save_matches(batch)
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    malformed = {k: v for k, v in counts.items() if k not in ('parsed', 'not_participant')}
+    print(f"✅ {total} respuestas en {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f}/s)")
+    print(f"   Partidas: {len(seen)} distintas ({duplicates} repetidas en el archivo)")
+    if counts['not_participant']:
+        print(f"   Sin el jugador: {counts['not_participant']}")
+    for reason, count in sorted(malformed.items(), key=lambda kv: -kv[1]):
+        print(f"   ⚠️ Mal formadas ({reason}): {count}")
+    if db:
+        print(f"💾 {saved} partidas nuevas guardadas en la base de datos.")
+
+
+# El pool de procesos vuelve a importar este módulo en cada worker (spawn)
+if __name__ == '__main__':
+    main()
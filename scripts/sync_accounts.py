@@ -0,0 +1,64 @@
+import os
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from async_riot_client import AsyncLoLClient
+from database import MatchDatabase
+import rank_tracking
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Sincroniza varias cuentas a la vez (pensado para cron).")
+parser.add_argument('riot_ids', nargs='*', help="Riot IDs 'Nombre#Tag' (por defecto RIOT_IDS o RIOT_ID del .env)")
+parser.add_argument('--region', default=os.getenv("RIOT_REGION", "EUW1"))
+parser.add_argument('--limit', type=int, default=20, help="Partidas por cuenta")
+parser.add_argument('--queue', type=int, default=420)
+parser.add_argument('--snapshot', action='store_true', help="Regenera el snapshot del dashboard al terminar (ver build_snapshot.py), con el rango de la primera cuenta")
+args = parser.parse_args()
+
+riot_ids = args.riot_ids or [r.strip() for r in os.getenv("RIOT_IDS", os.getenv("RIOT_ID", "")).split(',') if r.strip()]
+if not riot_ids:
+    print("❌ Indica al menos un Riot ID.")
+    raise SystemExit(1)
+
+
+async def main():
+    async with AsyncLoLClient(os.getenv("RIOT_API_KEY"), args.region, base_url=os.getenv("RIOT_API_BASE_URL")) as client:
+        # El rango antes que las partidas: una que termine entre medias cuenta en la siguiente sincronización
+        ranks = await client.get_rank_snapshots_many(riot_ids, queue=args.queue)
+        # Con rango previo, todas las partidas desde entonces (hasta --limit) para que la ventana de LP cuadre
+        start_times = {riot_id: db.get_lp_sync_start(rank['puuid'], rank['queue'])
+                       for riot_id, rank in ranks.items() if rank and not isinstance(rank, Exception)}
+        return ranks, await client.get_recent_matches_many(riot_ids, limit=args.limit, queue=args.queue,
+                                                           start_times=start_times)
+
+
+db = MatchDatabase()
+ranks, results = asyncio.run(main())
+
+for riot_id, matches in results.items():
+    if isinstance(matches, Exception):
+        print(f"❌ {riot_id}: {matches}")
+        continue
+    new_count = db.save_matches(matches)
+    print(f"✅ {riot_id}: {len(matches)} partidas descargadas, {new_count} nuevas.")
+
+    # LP de las partidas a partir de la diferencia con el rango anterior
+    rank = ranks.get(riot_id)
+    if isinstance(rank, Exception):
+        print(f"⚠️ {riot_id}: no se pudo leer el rango ({rank})")
+    elif rank:
+        attributed = db.save_rank_snapshot(rank['puuid'], rank, rank['taken_at'])
+        print(f"🏅 {riot_id}: {rank_tracking.rank_label(rank)}, LP asignados a {attributed} partidas.")
+
+if args.snapshot:
+    import snapshot
+    first_rank = ranks.get(riot_ids[0])
+    puuid = first_rank['puuid'] if first_rank and not isinstance(first_rank, Exception) else None
+    try:
+        data = snapshot.build_snapshot(db, puuid)
+        if snapshot.write_snapshot(data):
+            print(f"✅ Snapshot {data['revision']} actualizado.")
+    except Exception as e:
+        print(f"⚠️ No se actualiza el snapshot ({e}): se mantiene el anterior.")
+db.close()
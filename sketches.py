@@ -0,0 +1,174 @@
+import math
+import random
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+# Precisión de los sketches: con k=128 el error de rango es de ~1-2 percentiles y
+# cada sketch guarda unos pocos cientos de valores, juegues 50 o 50.000 partidas
+SKETCH_K = 128
+
+# Métricas con sketch y si un valor alto es bueno (para los percentiles "de mejora")
+SKETCH_METRICS = {
+    'cs_min': True,
+    'deaths': False,
+    'kda': True,
+    'game_duration_minutes': True,
+}
+
+# Partidas mínimas en un sketch para fiarse de sus percentiles (si no, umbrales fijos)
+MIN_SAMPLES = 10
+
+
+class KLLSketch:
+    """
+    Sketch de cuantiles KLL (Karnin, Lang y Liberty): mergeable y de tamaño acotado.
+
+    Los valores se guardan en niveles; cuando un nivel se llena se ordena y se
+    queda con la mitad de los elementos (uno sí, uno no), que pasan al nivel
+    siguiente con el doble de peso. El número de partidas es exacto; los rangos
+    son aproximados.
+    """
+
+    __slots__ = ('k', 'n', 'levels')
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        # Los niveles bajos (los más recientes, de poco peso) son más pequeños
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, value: float):
+        self.levels[0].append(float(value))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """Añade las partidas de otro sketch (p.ej. el de otro campeón o cuenta)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+        self.n += other.n
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                values.sort()
+                # Si hay un número impar, el último espera a la siguiente compactación
+                keep = [values.pop()] if len(values) % 2 else []
+                self.levels[level + 1].extend(values[random.getrandbits(1)::2])
+                self.levels[level] = keep
+            level += 1
+
+    def _weighted(self) -> List[Tuple[float, int]]:
+        return sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+
+    def percentile(self, value: float) -> Optional[float]:
+        """
+        Percentil (0-100) de 'value' en la distribución: partidas por debajo más la
+        mitad de las iguales. None si el sketch está vacío.
+        """
+        if not self.n:
+            return None
+        below = equal = 0
+        for level, values in enumerate(self.levels):
+            weight = 1 << level
+            for v in values:
+                if v < value:
+                    below += weight
+                elif v == value:
+                    equal += weight
+        return 100.0 * (below + equal / 2) / self.n
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor aproximado del cuantil q (0-1), p.ej. quantile(0.5) es la mediana."""
+        if not self.n:
+            return None
+        target = q * self.n
+        cumulative = 0
+        weighted = self._weighted()
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'k': self.k, 'n': self.n, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KLLSketch':
+        sketch = cls(data.get('k', SKETCH_K))
+        sketch.n = data.get('n', 0)
+        sketch.levels = [list(values) for values in data.get('levels', [[]])] or [[]]
+        return sketch
+
+
+def match_values(match: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Valores de cada métrica con sketch para una partida.
+
+    Acepta tanto el dict de LoLClient.parse_match como una fila de 'matches'.
+    """
+    deaths = match['deaths']
+    duration = match.get('game_duration_minutes') or 0.0
+    cs_min = match.get('cs_min')
+    if cs_min is None:
+        cs_min = round(match['cs_total'] / duration, 2) if duration > 0 else 0.0
+    return {
+        'cs_min': float(cs_min),
+        'deaths': float(deaths),
+        'kda': round((match['kills'] + match['assists']) / max(deaths, 1), 3),
+        'game_duration_minutes': float(duration),
+    }
+
+
+def sketch_keys(match: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Ámbitos (scope, key) a los que cuenta una partida: el historial completo del
+    jugador, su campeón y su rol.
+    """
+    champion = match.get('champion') or match.get('champion_name')
+    keys = [('player', '')]
+    if champion:
+        keys.append(('champion', champion))
+    if match.get('role'):
+        keys.append(('role', match['role']))
+    return keys
+
+
+def build(matches: Iterable[Dict[str, Any]], k: int = SKETCH_K) -> Dict[Tuple[str, str, str], KLLSketch]:
+    """Sketches (scope, key, métrica) de un conjunto de partidas (p.ej. el historial en streaming)."""
+    result: Dict[Tuple[str, str, str], KLLSketch] = {}
+    for match in matches:
+        values = match_values(match)
+        for scope, key in sketch_keys(match):
+            for metric, value in values.items():
+                sketch = result.get((scope, key, metric))
+                if sketch is None:
+                    sketch = result[(scope, key, metric)] = KLLSketch(k)
+                sketch.update(value)
+    return result
+
+
+def improvement_percentile(sketch: Optional[KLLSketch], metric: str, value: float) -> Optional[float]:
+    """
+    Percentil "de mejora" (100 = tu mejor partida) de 'value', invertido en las
+    métricas donde menos es mejor (muertes). None si hay menos de MIN_SAMPLES partidas.
+    """
+    if sketch is None or len(sketch) < MIN_SAMPLES:
+        return None
+    pct = sketch.percentile(value)
+    return pct if SKETCH_METRICS.get(metric, True) else 100.0 - pct
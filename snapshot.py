@@ -0,0 +1,244 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from decimal import Decimal
+from html import escape
+from typing import Optional, List, Dict, Any, Tuple
+import metrics
+import charts
+import sketches
+# plotly se importa al construir las figuras: quien sólo lee el snapshot no lo necesita
+
+# Versión del formato del snapshot: súbela si cambia la estructura, y los visores
+# ignorarán los ficheros antiguos en vez de pintar algo a medias
+SNAPSHOT_FORMAT = 1
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshot')
+SNAPSHOT_FILE = 'dashboard.json'
+HTML_FILE = 'dashboard.html'
+
+# Partidas del historial y rivales del Scout incluidos
+RECENT_GAMES = 10
+NEMESIS_GAMES = 2
+
+# Campos de fecha de las filas que se convierten de vuelta a datetime al leer
+_DATE_FIELDS = ('date',)
+
+# Último snapshot leído por ruta: (mtime_ns, contenido). Con muchos visores en el
+# mismo proceso el fichero sólo se parsea cuando cambia
+_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'tolist'):  # Arrays y escalares de NumPy
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} no es serializable")
+
+
+def _figure_spec(fig) -> Dict[str, Any]:
+    """Figura de Plotly como dict JSON puro (lo que st.plotly_chart y plotly.js dibujan tal cual)."""
+    return json.loads(fig.to_json())
+
+
+def build_snapshot(db, puuid: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Calcula de una vez todos los agregados del dashboard (sin filtro de parche).
+
+    Args:
+        db: MatchDatabase abierta; todas las lecturas van por sus readers.
+        puuid: Cuenta cuyo rango se muestra (sin ella el snapshot va sin rango).
+
+    Returns:
+        Dict serializable con las estadísticas, las figuras ya construidas, el
+        historial con sus logros y percentiles, el Champion Pool y las alertas.
+
+    Raises:
+        Exception: Si alguna lectura falló o se sirvió de la caché (db.stale). Los
+            readers devuelven vacío en vez de fallar, y ese snapshot a medias no
+            debe sustituir al último bueno.
+    """
+    errors = db.errors
+    recents = db.get_recent_matches(RECENT_GAMES)
+    keys = (('player', ''),) + tuple(sorted({('champion', r['champion']) for r in recents}))
+    match_sketches = db.get_sketches(keys)
+
+    history = []
+    for r in recents:
+        pct, label = charts.match_percentiles(r, match_sketches)
+        history.append({**r,
+                        'badges': charts.match_badges(r, pct),
+                        'percentile_caption': charts.percentile_caption(pct, label)})
+
+    trends = {}
+    for window, kwargs in charts.TREND_WINDOWS.items():
+        trend = db.get_trend(rolling=5, **kwargs)
+        if len(trend) > 1:
+            trends[window] = {'figure': _figure_spec(charts.lp_trend_figure(trend, window)),
+                              'caption': charts.trend_caption(trend)}
+        else:
+            trends[window] = None
+
+    heat_data = db.get_activity_heatmap_data()
+    player = match_sketches.get(('player', ''), {})
+
+    snapshot = {
+        'stats': db.get_stats_summary(),
+        'player_sketches': {metric: sketch.to_dict() for metric, sketch in player.items()},
+        'alerts': db.get_performance_alerts(),
+        'recent_matches': history,
+        'trends': trends,
+        'heatmap': _figure_spec(charts.heatmap_figure(heat_data)) if heat_data else None,
+        'nemesis': db.get_nemesis_list(min_games=NEMESIS_GAMES),
+        'champion_pool': db.get_champion_performance(),
+        'latest_patch': db.get_latest_patch(),
+        'rank': db.get_current_rank(puuid) if puuid else None,
+    }
+    if db.stale or db.errors != errors:
+        raise Exception("la base de datos no respondió a todas las lecturas")
+
+    # Lo que se guarda pasa por JSON: así el contenido (y la revisión) es el mismo que leerán los visores
+    snapshot = json.loads(json.dumps(snapshot, default=_json_default))
+    revision = hashlib.sha1(json.dumps(snapshot, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return {'format': SNAPSHOT_FORMAT, 'revision': revision,
+            'generated_at': datetime.now().isoformat(timespec='seconds'), **snapshot}
+
+
+def _atomic_write(path: str, data: str):
+    # Se escribe aparte y se renombra: un visor nunca lee un fichero a medio escribir
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(snapshot: Dict[str, Any], out_dir: Optional[str] = None, html: bool = True) -> bool:
+    """
+    Guarda el snapshot (JSON y, opcionalmente, una página HTML autónoma).
+
+    Args:
+        snapshot: resultado de build_snapshot.
+        out_dir: carpeta de destino (por defecto SNAPSHOT_DIR o data/snapshot).
+        html: si también se genera dashboard.html.
+
+    Returns:
+        False si el snapshot guardado ya tenía la misma revisión (no se reescribe
+        nada y los visores no vuelven a leer el fichero).
+    """
+    out_dir = out_dir or os.getenv("SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    json_path = os.path.join(out_dir, SNAPSHOT_FILE)
+
+    current = load_snapshot(json_path)
+    if current is not None and current.get('revision') == snapshot['revision']:
+        return False
+
+    if html:
+        _atomic_write(os.path.join(out_dir, HTML_FILE), render_html(snapshot))
+    _atomic_write(json_path, json.dumps(snapshot, ensure_ascii=False, default=_json_default))
+    return True
+
+
+def load_snapshot(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Lee el snapshot, o None si no existe o es de otro formato.
+
+    Se cachea por fecha de modificación: mientras no se regenere, cada rerun de
+    cada visor es un os.stat. Las fechas del historial vuelven como datetime.
+    """
+    path = path or os.path.join(os.getenv("SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR, SNAPSHOT_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+    metrics.record_cache('snapshot', cached is not None and cached[0] == mtime)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('format') != SNAPSHOT_FORMAT:
+        return None
+
+    for row in data.get('recent_matches', []):
+        for field in _DATE_FIELDS:
+            if row.get(field):
+                row[field] = datetime.fromisoformat(row[field])
+    data['generated_at'] = datetime.fromisoformat(data['generated_at'])
+
+    with _cache_lock:
+        _cache[path] = (mtime, data)
+    return data
+
+
+def player_sketches(snapshot: Dict[str, Any]) -> Dict[str, sketches.KLLSketch]:
+    return {metric: sketches.KLLSketch.from_dict(data) for metric, data in snapshot.get('player_sketches', {}).items()}
+
+
+def _html_table(rows: List[Dict[str, Any]], columns: List[Tuple[str, str]]) -> str:
+    head = ''.join(f"<th>{escape(title)}</th>" for _, title in columns)
+    body = ''.join("<tr>" + ''.join(f"<td>{escape('' if row.get(key) is None else str(row[key]))}</td>" for key, _ in columns) + "</tr>"
+                   for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def render_html(snapshot: Dict[str, Any]) -> str:
+    """Página HTML autónoma (plotly.js desde la CDN) para compartir sin servidor."""
+    pio = metrics.lazy_import('plotly.io')
+    stats = snapshot['stats']
+    figures = []
+
+    def figure(spec):
+        # plotly.js se incluye una sola vez, con la primera figura
+        figures.append(spec)
+        return pio.to_html(spec, include_plotlyjs='cdn' if len(figures) == 1 else False, full_html=False)
+
+    parts = ["<h1>🛡️ LoL Tryhard Tracker</h1>",
+             f"<p>Generado el {escape(str(snapshot['generated_at']))} · revisión {escape(snapshot['revision'])}</p>"]
+    if stats:
+        parts.append(f"<p>{stats['total_games']} partidas · WR {stats['winrate']}% · KDA {escape(str(stats['kda']))} · "
+                     f"CS/min {stats['cs_min_avg']}</p>")
+    if snapshot.get('rank'):
+        parts.append(f"<p>{escape(charts.rank_caption(snapshot['rank']))}</p>")
+    for alert in snapshot['alerts']:
+        parts.append(f"<p>⚠️ {escape(alert['message'])}</p>")
+
+    parts.append("<h2>📈 Tendencia de LP</h2>")
+    for trend in snapshot['trends'].values():
+        if trend:
+            parts.append(figure(trend['figure']))
+            parts.append(f"<p>{escape(trend['caption'])}</p>")
+    if snapshot['heatmap']:
+        parts.append("<h2>🕰️ Tu Horario Biológico (Winrate)</h2>")
+        parts.append(figure(snapshot['heatmap']))
+
+    parts.append("<h2>📜 Historial de Partidas</h2>")
+    rows = [{**r, 'result': "✅" if r['win'] else "❌", 'kda': f"{r['kills']}/{r['deaths']}/{r['assists']}"}
+            for r in snapshot['recent_matches']]
+    parts.append(_html_table(rows, [('result', ''), ('champion', 'Campeón'), ('enemy_champion', 'Rival'),
+                                    ('kda', 'KDA'), ('cs_min', 'CS/min'), ('lp_change', 'LP'),
+                                    ('badges', 'Logros'), ('notes', 'Notas')]))
+    parts.append("<h2>⚠️ Tus Pesadillas (Nemesis)</h2>")
+    parts.append(_html_table(snapshot['nemesis'], [('enemy_champion', 'Rival'), ('games', 'Partidas'),
+                                                   ('winrate', 'WR %'), ('avg_deaths', 'Muertes')]))
+    parts.append("<h2>🏆 Champion Pool</h2>")
+    parts.append(_html_table(snapshot['champion_pool'], [('champion', 'Campeón'), ('games_played', 'Partidas'),
+                                                         ('winrate', 'WR %'), ('kda_ratio', 'KDA'),
+                                                         ('avg_cs_min', 'CS/min')]))
+
+    return ("<!DOCTYPE html><html lang='es'><head><meta charset='utf-8'><title>LoL Tryhard Tracker</title>"
+            "<style>body{font-family:sans-serif;max-width:1100px;margin:auto}"
+            "table{border-collapse:collapse}td,th{padding:4px 8px;border-bottom:1px solid #ddd}</style>"
+            "</head><body>" + "\n".join(parts) + "</body></html>")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos viven en la raíz del repositorio (sin paquete): se importan como en la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
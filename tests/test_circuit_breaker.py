@@ -0,0 +1,160 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, SnapshotCache, CLOSED, OPEN, HALF_OPEN
+from database import _last_known_good
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('test', failure_threshold=3, reset_timeout=30, clock=clock)
+
+
+def test_opens_after_consecutive_failures(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Un acierto reinicia la cuenta
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.is_open
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError) as err:
+        breaker.check()
+    assert err.value.dependency == 'test' and err.value.retry_in == 30
+
+
+def test_retry_in_counts_down(breaker, clock):
+    assert breaker.retry_in() == 0.0
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 12
+    assert breaker.retry_in() == pytest.approx(18)
+    clock.now += 100
+    assert breaker.retry_in() == 0.0
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 29.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow() and not breaker.allow()  # El resto espera a la sonda
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_probe_opens_again(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()  # Un solo fallo en semiabierto basta
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+
+
+def test_snapshot_cache_evicts_least_recent():
+    cache = SnapshotCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 3)
+    cache.put('c', 4)
+    assert cache.get('b') is None
+    assert cache.get('a')[1] == 3 and cache.get('c')[1] == 4
+
+
+class FakeConnection:
+    closed = False
+
+
+class FakeDatabase:
+    """Lo que _last_known_good usa de MatchDatabase; las lecturas devuelven lo que diga 'responses'."""
+
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.replica = None
+        self.stale = False
+        self.errors = 0
+        self.calls = []
+        self.fail = False
+
+    @_last_known_good
+    def get_rows(self, limit, patch=None, days=None):
+        self.calls.append((limit, patch, days))
+        if self.fail:
+            self.errors += 1  # Como _report_error: vacío en vez de excepción
+            return []
+        return [f"{limit}-{patch}-{days}"]
+
+
+@pytest.fixture(autouse=True)
+def snapshots(monkeypatch):
+    cache = SnapshotCache()
+    monkeypatch.setattr(circuit_breaker, 'DB_SNAPSHOTS', cache)
+    return cache
+
+
+def test_good_reads_are_stored_by_arguments(snapshots):
+    db = FakeDatabase()
+    assert db.get_rows(10, patch='15.4', days=7) == ["10-15.4-7"]
+    db.get_rows(10)
+
+    assert snapshots.get(('get_rows', (10,), (('days', 7), ('patch', '15.4'))))[1] == ["10-15.4-7"]
+    assert snapshots.get(('get_rows', (10,), ()))[1] == ["10-None-None"]
+    assert not db.stale
+
+    # Mismos kwargs en otro orden: misma entrada
+    db.fail = True
+    assert db.get_rows(10, days=7, patch='15.4') == ["10-15.4-7"] and db.stale
+
+
+def test_failed_reads_do_not_replace_the_snapshot(snapshots):
+    db = FakeDatabase()
+    db.get_rows(5)
+    db.fail = True
+    assert db.get_rows(5) == ["5-None-None"]
+    assert db.stale
+    assert snapshots.get(('get_rows', (5,), ()))[1] == ["5-None-None"]
+
+    # Sin resultado bueno previo se devuelve lo que haya dado la lectura
+    other = FakeDatabase()
+    other.fail = True
+    assert other.get_rows(6) == [] and not other.stale
+    assert snapshots.get(('get_rows', (6,), ())) is None
+
+
+def test_lost_connection_serves_the_snapshot():
+    FakeDatabase().get_rows(3)
+    db = FakeDatabase()
+    db.connection = None
+    assert db.get_rows(3) == ["3-None-None"] and db.stale
+    assert db.calls == [(3, None, None)]  # La lectura se intenta igualmente
+
+    db = FakeDatabase()
+    db.replica = FakeConnection()
+    db.replica.closed = True
+    assert db.get_rows(3) == ["3-None-None"] and db.stale
@@ -0,0 +1,86 @@
+import copy
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import match_parser
+from match_parser import MalformedMatchError, SCHEMA_VERSION
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'match_v5.json')
+
+
+@pytest.fixture
+def match():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_parse_match(match):
+    record = match_parser.parse_match(match, 'player-puuid')
+
+    assert record.game_id == 'EUW1_7_1000000'
+    # La fecha es la hora local del final de la partida, como al sincronizar
+    assert record.date == datetime.fromtimestamp(1800000000).strftime('%Y-%m-%d %H:%M:%S')
+    assert record.champion_name == 'Fiora' and record.role == 'TOP'
+    assert (record.kills, record.deaths, record.assists) == (14, 3, 18)
+    assert record.win is False
+    assert record.game_duration_minutes == 30.38
+    assert record.cs_total == 150 and record.cs_min == 4.94
+    assert record.control_wards_bought == 2
+    assert record.enemy_champion == 'Sett'
+    assert record.game_version == '15.4.661.6754'
+    assert (record.puuid, record.queue_id) == ('player-puuid', 420)
+    assert record.schema_version == SCHEMA_VERSION
+    assert record.to_dict()['champion_name'] == 'Fiora'
+
+
+def test_not_a_participant(match):
+    assert match_parser.parse_match(match, 'someone-else') is None
+
+
+def test_role_falls_back_to_individual_position(match):
+    player = match['info']['participants'][0]
+    player['teamPosition'] = ''
+    player['individualPosition'] = 'JUNGLE'
+    record = match_parser.parse_match(match, 'player-puuid')
+    assert record.role == 'JUNGLE'
+    assert record.enemy_champion == 'Unknown'  # Sin teamPosition no hay rival directo
+
+
+@pytest.mark.parametrize('mutate, reason', [
+    (lambda m: m['info'].pop('gameDuration'), 'missing_field'),
+    (lambda m: m['metadata'].pop('matchId'), 'missing_field'),
+    (lambda m: m['info']['participants'][0].update(kills=None, totalMinionsKilled='x'), 'bad_type'),
+    (lambda m: m['info'].update(participants=None), 'bad_type'),
+])
+def test_malformed_responses(match, mutate, reason):
+    mutate(match)
+    with pytest.raises(MalformedMatchError) as error:
+        match_parser.parse_match(match, 'player-puuid')
+    assert error.value.reason == reason
+
+
+def test_parse_chunk_counts_by_reason(match):
+    broken = copy.deepcopy(match)
+    del broken['info']['gameDuration']
+    lines = [
+        match_parser.dumps({'schema_version': 1, 'puuid': 'player-puuid', 'match': match}),
+        match_parser.dumps({'schema_version': 1, 'puuid': 'player-puuid', 'match': broken}),
+        match_parser.dumps({'schema_version': 1, 'puuid': 'someone-else', 'match': match}),
+        match_parser.dumps({'match': match}),
+        b'{not json',
+    ]
+    records, counts = match_parser.parse_chunk(lines)
+    assert [r.game_id for r in records] == ['EUW1_7_1000000']
+    assert counts == {'parsed': 1, 'missing_field': 1, 'not_participant': 1, 'bad_envelope': 1, 'invalid_json': 1}
+
+
+def test_archive_round_trip(match, tmp_path):
+    match_parser.archive_raw(match, 'player-puuid', archive_dir=str(tmp_path))
+    lines = list(match_parser.read_archive(str(tmp_path)))
+    assert len(lines) == 1
+    records, counts = match_parser.parse_chunk(lines)
+    assert counts == {'parsed': 1}
+    assert records[0] == match_parser.parse_match(match, 'player-puuid')
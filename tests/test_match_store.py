@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from match_store import MatchStore, COLUMNS
+
+
+def db_row(game_id, champion='Jax', win=True, **extra):
+    row = {name: None for name in COLUMNS}
+    row.update(game_id=game_id, date=datetime(2025, 3, 1, 20, 0), champion=champion, role='TOP',
+               kills=5, deaths=2, assists=7, cs_total=210, cs_min=7.0, control_wards=2, win=win,
+               enemy_champion='Renekton', game_duration_minutes=30.0, game_version='15.4.600.1234')
+    row.update(extra)
+    return row
+
+
+def test_round_trip_keeps_values_and_nulls():
+    rows = [db_row('EUW1_1', notes='Ir a 6 antes', lp_change=-18, tilt_level=3),
+            db_row('EUW1_2', champion='Fiora', win=False)]
+    store = MatchStore.from_rows(rows)
+
+    assert len(store) == 2
+    first = store.to_dicts()[0]
+    assert first['notes'] == 'Ir a 6 antes' and first['lp_change'] == -18 and first['tilt_level'] == 3
+    assert first['patch'] == '15.4'  # Derivado de game_version como la columna generada
+    second = store[-1]
+    assert second['lp_change'] is None and second.get('notes', '') == ''
+    assert second.win is False and second['champion'] == 'Fiora'
+    assert store[0]['cs_min'] == pytest.approx(7.0)
+    assert store[0]['date'] == datetime(2025, 3, 1, 20, 0)
+
+
+def test_accepts_parse_match_dicts():
+    # Nombres de LoLClient.parse_match (champion_name, control_wards_bought) y fecha en texto
+    store = MatchStore.from_rows([{
+        'game_id': 'EUW1_9', 'date': '2025-03-02 18:30:00', 'champion_name': 'Camille',
+        'control_wards_bought': 4, 'kills': 1, 'deaths': 0, 'assists': 3, 'win': True,
+        'cs_total': 180, 'cs_min': 6.5, 'game_duration_minutes': 27.7, 'role': 'TOP',
+        'enemy_champion': 'Jax', 'game_version': None, 'puuid': 'p', 'queue_id': 420,
+    }])
+    row = store[0]
+    assert row['champion'] == 'Camille' and row['control_wards'] == 4
+    assert row['date'] == datetime(2025, 3, 2, 18, 30)
+    assert row['patch'] is None
+
+
+def test_strings_are_interned_across_columns():
+    store = MatchStore.from_rows([db_row('A'), db_row('B', champion='Renekton', enemy_champion='Jax')])
+    jax = store.string_id('Jax')
+    assert jax is not None
+    assert store.column('champion')[0] == jax == store.column('enemy_champion')[1]
+    assert store.strings('champion') == ['Jax', 'Renekton']
+    assert store.string_id('Teemo') is None
+
+
+def test_columns_and_tuples():
+    store = MatchStore.from_rows([db_row('A', kills=3), db_row('B', kills=9, win=False)])
+    assert store.column('kills').dtype == np.int16
+    assert store.column('kills').tolist() == [3, 9]
+    assert store.column('date').dtype == np.dtype('datetime64[s]')
+    assert list(store.iter_tuples('game_id', 'kills', 'win')) == [('A', 3, 1), ('B', 9, 0)]
+
+
+def test_winrate_by():
+    store = MatchStore.from_rows([db_row('A'), db_row('B', win=False), db_row('C', champion='Fiora')])
+    result = store.winrate_by('champion')
+    assert result['Jax'] == {'games': 2, 'wins': 1, 'winrate': 50.0}
+    assert result['Fiora']['games'] == 1
+
+
+def test_index_errors():
+    store = MatchStore.from_rows([db_row('A')])
+    with pytest.raises(IndexError):
+        store[1]
+    with pytest.raises(AttributeError):
+        store[0].no_such_column
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from matchup_index import MatchupIndex
+
+START = datetime(2025, 3, 1, 20, 0)
+
+
+def row(i, champion='Jax', enemy='Renekton', win=True, deaths=2, cs_min=7.0, notes=None):
+    return {'game_id': f"EUW1_{i}", 'date': START + timedelta(hours=i), 'champion': champion,
+            'enemy_champion': enemy, 'win': win, 'deaths': deaths, 'cs_min': cs_min, 'notes': notes,
+            'kills': 5}  # Columnas de más: el índice sólo guarda INDEX_COLUMNS
+
+
+def built(rows):
+    index = MatchupIndex()
+    index.start_build()
+    index.build(rows)
+    return index
+
+
+def test_build_aggregates_pairs():
+    index = built([row(1, win=True, deaths=1, cs_min=8.0, notes="Respetar el nivel 2"),
+                   row(2, win=False, deaths=5, cs_min=6.0),
+                   row(3, enemy='Fiora')])
+    stats = index.matchup('Jax', 'Renekton')
+    assert index.ready
+    assert stats['games'] == 2 and stats['wins'] == 1 and stats['winrate'] == 50.0
+    assert stats['avg_deaths'] == 3.0 and stats['avg_cs_min'] == pytest.approx(7.0)
+    assert stats['latest_notes'] == ["Respetar el nivel 2"]
+    assert 'kills' not in index.matchup_notes('Jax', 'Renekton')[0]
+    assert index.matchup('Jax', 'Darius') is None
+
+
+def test_keys_ignore_case_and_spaces():
+    index = built([row(1, champion='Jax', enemy='Renekton'), row(2, champion='jax', enemy=' RENEKTON ')])
+    assert index.matchup('JAX', 'renekton')['games'] == 2
+    assert [m['game_id'] for m in index.matchup_notes(' jax', 'Renekton ')] == ['EUW1_2', 'EUW1_1']
+    assert len(index.matches_vs_enemy('REN')) == 2
+
+
+def test_duplicate_and_empty_game_ids_are_skipped():
+    index = built([row(1), row(1), {**row(2), 'game_id': None}])
+    index.apply_match(row(1))
+    assert index.matchup('Jax', 'Renekton')['games'] == 1
+
+
+def test_writes_during_build_are_queued():
+    index = MatchupIndex()
+    index.apply_match(row(9))  # Sin índice ni carga en curso: se ignora
+    index.start_build()
+    index.apply_match(row(5, notes=None))
+    index.apply_match(row(1))  # También está en la tabla leída: no se cuenta dos veces
+    index.apply_details('EUW1_5', notes="Guardada durante la carga")
+    assert not index.ready and index.matchup('Jax', 'Renekton') is None
+
+    index.build([row(1), row(2)])
+    stats = index.matchup('Jax', 'Renekton')
+    assert stats['games'] == 3
+    assert stats['latest_notes'] == ["Guardada durante la carga"]
+    # Más reciente primero aunque llegara antes que las filas de la tabla
+    assert [m['game_id'] for m in index.matchup_notes('Jax', 'Renekton')] == ['EUW1_5', 'EUW1_2', 'EUW1_1']
+
+
+def test_apply_after_build():
+    index = built([row(1), row(3)])
+    index.apply_match(row(2, win=False))
+    index.apply_details('EUW1_2', notes="Jugar por detrás")
+    assert [m['game_id'] for m in index.matchup_notes('Jax', 'Renekton', limit=2)] == ['EUW1_3', 'EUW1_2']
+    assert index.matchup('Jax', 'Renekton')['latest_notes'] == ["Jugar por detrás"]
+
+
+def test_invalidate_during_build_discards_it():
+    index = built([row(1)])
+    index.start_build()
+    index.invalidate()
+    index.build([row(1), row(2)])
+    assert not index.ready and index.matchup('Jax', 'Renekton') is None
+
+    index.start_build()
+    index.build([row(1), row(2)])
+    assert index.ready and index.matchup('Jax', 'Renekton')['games'] == 2
+
+
+def test_nemesis_filters_and_orders():
+    rows = ([row(i, champion='Jax', enemy='Renekton', win=i % 3 == 0) for i in range(1, 4)]
+            + [row(i, champion='Fiora', enemy='renekton', win=False) for i in range(4, 6)]
+            + [row(i, enemy='Darius', win=False) for i in range(6, 8)]
+            + [row(8, enemy='Teemo', win=False)]
+            + [row(i, enemy='unknown', win=False) for i in range(9, 12)]
+            + [row(i, enemy='Garen', win=True) for i in range(12, 15)])
+    nemesis = built(rows).nemesis(min_games=2)
+
+    # Renekton suma las partidas con Jax y con Fiora; Teemo (1 partida) y 'unknown' no cuentan
+    assert [n['enemy_champion'] for n in nemesis] == ['Darius', 'Renekton', 'Garen']
+    renekton = nemesis[1]
+    assert renekton['games'] == 5 and renekton['wins'] == 1 and renekton['winrate'] == 20.0
+    # Mismo winrate: primero el que tiene más partidas
+    assert built(rows).nemesis(min_games=1, limit=1)[0]['enemy_champion'] == 'Darius'
+    assert [n['enemy_champion'] for n in built(rows).nemesis(min_games=4)] == ['Renekton']
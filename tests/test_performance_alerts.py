@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+import performance_alerts
+from performance_alerts import CusumDetector, WARMUP, REBASELINE_AFTER
+
+
+def feed(detector, values):
+    for value in values:
+        detector.update(value)
+    return detector
+
+
+def steady(mean, n, spread=0.3, seed=1):
+    rng = random.Random(seed)
+    return [mean + rng.uniform(-spread, spread) for _ in range(n)]
+
+
+def test_warmup_uses_exact_mean():
+    detector = feed(CusumDetector('cs_min'), [7.0, 8.0, 6.0, 7.0, 7.0])
+    assert detector.n == WARMUP
+    assert detector.mean == pytest.approx(7.0)
+    assert detector.sigma == pytest.approx(0.4 ** 0.5)  # Varianza poblacional 0.4 (por encima de MIN_SIGMA)
+    assert not detector.alarm
+
+
+def test_stable_history_does_not_alarm():
+    detector = feed(CusumDetector('cs_min'), steady(7.5, 300))
+    assert not detector.alarm
+
+
+def test_drop_alarms_within_a_few_games():
+    detector = feed(CusumDetector('cs_min'), steady(7.5, 40))
+    games = 0
+    while not detector.alarm:
+        detector.update(6.5)
+        games += 1
+        assert games < 15
+    assert games >= 2  # Una sola partida mala nunca basta (MAX_Z)
+    assert detector.run == games
+    assert detector.run_mean == pytest.approx(6.5)
+    message = performance_alerts.alert_message('Jax', detector)
+    assert message.startswith(f"Tu CS/min con Jax ha caído {detector.mean - 6.5:.1f} "
+                              f"por debajo de lo habitual ({detector.mean:.1f})")
+    assert message.endswith(f"en las últimas {games} partidas")
+
+
+def test_direction_depends_on_metric():
+    # Más muertes es peor: subir alarma, bajar no
+    worse = feed(CusumDetector('deaths'), steady(4, 30, spread=1) + [9] * 10)
+    better = feed(CusumDetector('deaths'), steady(4, 30, spread=1) + [0] * 30)
+    assert worse.alarm and not better.alarm
+    assert "Tus muertes con Fiora han subido" in performance_alerts.alert_message('Fiora', worse)
+
+
+def test_isolated_disaster_does_not_alarm():
+    detector = feed(CusumDetector('cs_min'), steady(7.5, 40) + [0.0] + steady(7.5, 20, seed=2))
+    assert not detector.alarm
+
+
+def test_rebaseline_after_long_alarm():
+    detector = feed(CusumDetector('cs_min'), steady(7.5, 40))
+    # Tras REBASELINE_AFTER partidas en alerta el nivel nuevo es el habitual
+    feed(detector, [6.0] * (2 * REBASELINE_AFTER))
+    assert not detector.alarm
+    assert detector.mean == pytest.approx(6.0, abs=0.3)
+
+
+def test_baseline_frozen_during_alarm():
+    detector = feed(CusumDetector('cs_min'), steady(7.5, 40))
+    while not detector.alarm:
+        detector.update(6.0)
+    mean = detector.mean
+    detector.update(6.0)
+    assert detector.alarm and detector.mean == mean
+
+
+def test_dict_round_trip():
+    detector = feed(CusumDetector('win'), [1, 0, 1, 1, 0, 0, 0, 1, 0])
+    restored = CusumDetector.from_dict(detector.to_dict())
+    assert restored.to_dict() == detector.to_dict()
+    restored.update(0)
+    detector.update(0)
+    assert restored.to_dict() == detector.to_dict()
+
+
+def test_build_per_champion_and_metric():
+    matches = [{'champion': 'Jax', 'win': True, 'deaths': 2, 'cs_min': 7.0, 'tilt_level': None},
+               {'champion': 'Jax', 'win': False, 'deaths': 6, 'cs_total': 150, 'game_duration_minutes': 30.0,
+                'tilt_level': 4},
+               {'champion': 'Fiora', 'win': True, 'deaths': 1, 'cs_min': 8.0}]
+    detectors = performance_alerts.build(matches)
+    assert sorted(detectors) == [('Fiora', 'cs_min'), ('Fiora', 'deaths'), ('Fiora', 'win'),
+                                 ('Jax', 'cs_min'), ('Jax', 'deaths'), ('Jax', 'tilt_level'), ('Jax', 'win')]
+    assert detectors[('Jax', 'cs_min')].mean == pytest.approx(6.0)  # 7.0 y 150/30
+    assert detectors[('Jax', 'tilt_level')].n == 1
@@ -0,0 +1,61 @@
+import pytest
+
+import rank_tracking
+from rank_tracking import ladder_points, from_ladder_points, rank_label, queue_entry, split_lp
+
+
+def test_ladder_points():
+    assert ladder_points('GOLD', 'II', 45) == 1445
+    assert ladder_points('IRON', 'IV', 0) == 0
+    assert ladder_points('DIAMOND', 'I', 99) == rank_tracking.APEX_POINTS - 1
+    # Sin divisiones en Master+: la división se ignora
+    assert ladder_points('GRANDMASTER', 'I', 350) == rank_tracking.APEX_POINTS + 350
+
+
+@pytest.mark.parametrize('tier,rank,lp', [('GOLD', 'II', 45), ('IRON', 'IV', 0), ('EMERALD', 'I', 99),
+                                          ('MASTER', 'I', 0), ('MASTER', 'I', 812)])
+def test_from_ladder_points_inverts(tier, rank, lp):
+    assert from_ladder_points(ladder_points(tier, rank, lp)) == (tier, rank, lp)
+
+
+def test_from_ladder_points_clamps_below_zero():
+    assert from_ladder_points(-30) == ('IRON', 'IV', 0)
+
+
+def test_rank_label():
+    assert rank_label({'tier': 'GOLD', 'rank': 'II', 'lp': 45}) == "GOLD II · 45 LP"
+    assert rank_label({'tier': 'CHALLENGER', 'rank': 'I', 'lp': 1200}) == "CHALLENGER · 1200 LP"
+
+
+def test_queue_entry():
+    entries = [{'queueType': 'RANKED_FLEX_SR', 'tier': 'SILVER', 'rank': 'I', 'leaguePoints': 10, 'wins': 3, 'losses': 4},
+               {'queueType': 'RANKED_SOLO_5x5', 'tier': 'GOLD', 'rank': 'II', 'leaguePoints': 45, 'wins': 30, 'losses': 25}]
+    assert queue_entry(entries) == {'queue': 'RANKED_SOLO_5x5', 'tier': 'GOLD', 'rank': 'II',
+                                    'lp': 45, 'wins': 30, 'losses': 25}
+    assert queue_entry(entries, 440)['tier'] == 'SILVER'
+    assert queue_entry(entries[:1]) is None
+    assert queue_entry(None) is None
+    assert rank_tracking.QUEUE_IDS['RANKED_FLEX_SR'] == 440
+
+
+@pytest.mark.parametrize('delta,results,expected', [
+    (21, [True], [21]),
+    (-18, [False], [-18]),
+    (-18, [True], None),              # El signo no cuadra con el resultado
+    (75, [True], None),               # Más de lo que mueve una partida
+    (40, [True, True], [20, 20]),
+    (43, [True, False, True, True, False, True], [22, -22, 22, 21, -21, 21]),
+    (-50, [False, False, True, False], [-25, -25, 25, -25]),
+    (0, [True, False], None),         # Tantas victorias como derrotas
+    (-10, [True, True], None),
+    (130, [True, True], None),
+    (30, [], None),
+])
+def test_split_lp(delta, results, expected):
+    assert split_lp(delta, results) == expected
+
+
+def test_split_lp_sums_to_delta():
+    for delta in range(2, 120):
+        values = split_lp(delta, [True, True, False, True, True])
+        assert values is None or sum(values) == delta
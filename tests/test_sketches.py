@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+import sketches
+from sketches import KLLSketch
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    # La compactación elige al azar qué mitad sobrevive
+    random.seed(7)
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def test_exact_while_small():
+    sketch = KLLSketch()
+    for value in [5, 1, 3, 2, 4]:
+        sketch.update(value)
+    assert len(sketch) == 5
+    assert sketch.quantile(0.5) == 3
+    assert sketch.percentile(3) == 50.0  # 2 por debajo y la mitad de la igual
+    assert sketch.percentile(0) == 0.0 and sketch.percentile(10) == 100.0
+
+
+def test_empty():
+    sketch = KLLSketch()
+    assert sketch.quantile(0.5) is None and sketch.percentile(1) is None
+
+
+def test_accuracy_and_bounded_size():
+    rng = random.Random(1)
+    values = [rng.gauss(7.0, 1.5) for _ in range(20000)]
+    sketch = KLLSketch()
+    for value in values:
+        sketch.update(value)
+
+    assert len(sketch) == 20000
+    assert sum(len(level) for level in sketch.levels) < 1000
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        # Error de rango: el valor devuelto está cerca del cuantil q en la distribución real
+        estimate = sketch.quantile(q)
+        assert sketch.percentile(estimate) == pytest.approx(q * 100, abs=3)
+        assert abs(sum(v < estimate for v in values) / len(values) - q) < 0.03
+    assert sketch.percentile(exact_quantile(values, 0.9)) == pytest.approx(90, abs=3)
+
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(2)
+    low = [rng.uniform(0, 10) for _ in range(5000)]
+    high = [rng.uniform(10, 20) for _ in range(3000)]
+    a, b = KLLSketch(), KLLSketch()
+    for value in low:
+        a.update(value)
+    for value in high:
+        b.update(value)
+
+    a.merge(b)
+    assert len(a) == 8000
+    assert sum(len(level) for level in a.levels) < 1000
+    # Todo lo de 'low' queda por debajo de 10: 5000 de 8000 partidas
+    assert a.percentile(10) == pytest.approx(62.5, abs=3)
+    assert a.quantile(0.5) == pytest.approx(exact_quantile(low + high, 0.5), abs=0.5)
+
+
+def test_dict_round_trip():
+    sketch = KLLSketch(k=32)
+    for value in range(500):
+        sketch.update(value)
+    restored = KLLSketch.from_dict(sketch.to_dict())
+    assert restored.k == 32 and len(restored) == 500 and restored.levels == sketch.levels
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+
+def test_improvement_percentile_inverts_deaths():
+    sketch = KLLSketch()
+    for value in range(20):
+        sketch.update(value)
+    assert sketches.improvement_percentile(sketch, 'cs_min', 15) == 77.5
+    assert sketches.improvement_percentile(sketch, 'deaths', 15) == 22.5
+
+    small = KLLSketch()
+    for value in range(sketches.MIN_SAMPLES - 1):
+        small.update(value)
+    assert sketches.improvement_percentile(small, 'cs_min', 3) is None
+    assert sketches.improvement_percentile(None, 'cs_min', 3) is None
+
+
+def test_build_scopes():
+    matches = [{'champion': 'Jax', 'role': 'TOP', 'kills': 4, 'deaths': 0, 'assists': 6,
+                'cs_min': 7.5, 'game_duration_minutes': 28.0},
+               {'champion_name': 'Fiora', 'role': 'TOP', 'kills': 1, 'deaths': 5, 'assists': 2,
+                'cs_total': 240, 'game_duration_minutes': 30.0}]
+    built = sketches.build(matches)
+    assert len(built[('player', '', 'cs_min')]) == 2
+    assert len(built[('role', 'TOP', 'deaths')]) == 2
+    assert built[('champion', 'Fiora', 'cs_min')].quantile(0.5) == 8.0  # Calculado de cs_total
+    assert built[('champion', 'Jax', 'kda')].quantile(0.5) == 10.0  # Sin muertes cuenta como 1
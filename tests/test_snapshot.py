@@ -0,0 +1,161 @@
+import json
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+import snapshot
+import sketches
+
+
+class FakeDatabase:
+    """Los readers de MatchDatabase que usa build_snapshot, con datos fijos."""
+
+    def __init__(self):
+        self.errors = 0
+        self.stale = False
+        start = datetime(2025, 3, 1, 20, 0)
+        self.matches = [{'game_id': f"EUW1_{i}", 'date': start + timedelta(hours=i), 'champion': 'Jax',
+                         'role': 'TOP', 'kills': 3 + i % 4, 'deaths': 1 + i % 3, 'assists': 6, 'cs_total': 200,
+                         'cs_min': 6.5 + (i % 5) * 0.3, 'control_wards': i % 4, 'win': i % 2 == 0,
+                         'enemy_champion': 'Renekton', 'game_duration_minutes': 30.0, 'lp_change': 20 if i % 2 == 0 else -18,
+                         'notes': None, 'game_version': '15.4.600.1', 'patch': '15.4'}
+                        for i in range(12)]
+
+    def get_recent_matches(self, limit):
+        return sorted(self.matches, key=lambda m: m['date'], reverse=True)[:limit]
+
+    def get_sketches(self, keys):
+        built = sketches.build(self.matches)
+        return {key: {metric: built[key + (metric,)] for metric in sketches.SKETCH_METRICS}
+                for key in keys if key + ('cs_min',) in built}
+
+    def get_trend(self, rolling=5, last_n=None, days=None):
+        trend, total = [], 0
+        for m in self.matches[-(last_n or len(self.matches)):]:
+            total += m['lp_change']
+            trend.append({'date': m['date'], 'champion': m['champion'], 'cumulative_lp': total,
+                          'rolling_winrate': 50.0, 'rolling_cs_min': 7.0, 'rolling_deaths': 2.0})
+        return trend
+
+    def get_activity_heatmap_data(self):
+        return [{'weekday': 6, 'hour': 20, 'games': 4, 'wins': 3}, {'weekday': 0, 'hour': 21, 'games': 2, 'wins': 0}]
+
+    def get_stats_summary(self):
+        return {'total_games': 12, 'total_wins': 6, 'winrate': 50.0, 'kda': "4.5 / 2.0 / 6.0", 'cs_min_avg': 7.1}
+
+    def get_performance_alerts(self):
+        return [{'champion': 'Jax', 'metric': 'cs_min', 'message': "Tu CS/min con Jax ha caído"}]
+
+    def get_nemesis_list(self, min_games=2):
+        return [{'enemy_champion': 'Renekton', 'games': 12, 'winrate': Decimal('50.0'), 'avg_deaths': Decimal('2.0')}]
+
+    def get_champion_performance(self):
+        return [{'champion': 'Jax', 'games_played': 12, 'winrate': 50.0, 'kda_ratio': 4.5, 'avg_cs_min': 7.1}]
+
+    def get_latest_patch(self):
+        return '15.4'
+
+    def get_current_rank(self, puuid, queue='RANKED_SOLO_5x5'):
+        if puuid != 'p':
+            return None
+        return {'puuid': 'p', 'queue': 'RANKED_SOLO_5x5', 'taken_at': datetime(2025, 3, 2), 'tier': 'GOLD',
+                'rank': 'II', 'lp': 45, 'wins': 30, 'losses': 25}
+
+
+@pytest.fixture
+def built():
+    return snapshot.build_snapshot(FakeDatabase(), 'p')
+
+
+def test_build_is_json_and_revision_is_stable(built):
+    assert built['format'] == snapshot.SNAPSHOT_FORMAT
+    json.dumps(built)  # Ya serializable: Decimal y datetime convertidos
+    assert built['nemesis'][0]['winrate'] == 50.0
+    assert len(built['recent_matches']) == snapshot.RECENT_GAMES
+    assert set(built['trends']) == set(snapshot.charts.TREND_WINDOWS)
+    assert built['heatmap']['data'][0]['type'] == 'heatmap'
+    assert built['player_sketches']['cs_min']['n'] == 12
+
+    # Los mismos datos dan la misma revisión aunque cambie la hora de generación
+    again = snapshot.build_snapshot(FakeDatabase(), 'p')
+    assert again['revision'] == built['revision']
+    changed = FakeDatabase()
+    changed.matches[-1]['notes'] = "Nota nueva"
+    assert snapshot.build_snapshot(changed, 'p')['revision'] != built['revision']
+
+
+def test_rank_is_the_requested_account(built):
+    assert built['rank']['puuid'] == 'p'
+    assert snapshot.build_snapshot(FakeDatabase(), 'otra-cuenta')['rank'] is None
+    assert snapshot.build_snapshot(FakeDatabase())['rank'] is None
+
+
+def test_write_and_load(built, tmp_path):
+    out_dir = str(tmp_path)
+    assert snapshot.write_snapshot(built, out_dir)
+    assert os.path.exists(os.path.join(out_dir, snapshot.HTML_FILE))
+
+    loaded = snapshot.load_snapshot(os.path.join(out_dir, snapshot.SNAPSHOT_FILE))
+    assert loaded['revision'] == built['revision']
+    assert isinstance(loaded['generated_at'], datetime)
+    assert loaded['recent_matches'][0]['date'] == datetime(2025, 3, 2, 7, 0)
+    assert snapshot.player_sketches(loaded)['cs_min'].quantile(0.5) == pytest.approx(7.1, abs=0.31)
+
+    # Misma revisión: no se reescribe nada
+    assert not snapshot.write_snapshot(built, out_dir)
+
+
+def test_load_is_cached_until_the_file_changes(built, tmp_path):
+    path = os.path.join(str(tmp_path), snapshot.SNAPSHOT_FILE)
+    snapshot.write_snapshot(built, str(tmp_path), html=False)
+    first = snapshot.load_snapshot(path)
+    assert snapshot.load_snapshot(path) is first
+
+    newer = dict(built, revision='otra')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(newer, f, default=snapshot._json_default)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+    assert snapshot.load_snapshot(path)['revision'] == 'otra'
+
+
+def test_other_format_or_missing_is_ignored(built, tmp_path):
+    path = os.path.join(str(tmp_path), snapshot.SNAPSHOT_FILE)
+    assert snapshot.load_snapshot(path) is None
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(built, format=snapshot.SNAPSHOT_FORMAT + 1), f, default=snapshot._json_default)
+    assert snapshot.load_snapshot(path) is None
+
+
+def test_render_html_escapes(built):
+    built['recent_matches'][0]['notes'] = "<script>alert(1)</script>"
+    page = snapshot.render_html(built)
+    assert "&lt;script&gt;" in page and "<script>alert(1)" not in page
+    assert "GOLD II · 45 LP" in page
+
+
+def test_render_html_without_stats(built):
+    # get_stats_summary devuelve {} si falla la lectura
+    page = snapshot.render_html(dict(built, stats={}))
+    assert "revisión" in page and "partidas ·" not in page
+
+
+class FailingDatabase(FakeDatabase):
+    def get_nemesis_list(self, min_games=2):
+        self.errors += 1  # Como _report_error: el reader captura el error y devuelve vacío
+        return []
+
+
+class StaleDatabase(FakeDatabase):
+    def get_champion_performance(self):
+        self.stale = True  # Servido de la caché de último resultado bueno
+        return super().get_champion_performance()
+
+
+@pytest.mark.parametrize('db_class', [FailingDatabase, StaleDatabase])
+def test_degraded_build_does_not_replace_the_snapshot(built, tmp_path, db_class):
+    snapshot.write_snapshot(built, str(tmp_path), html=False)
+    with pytest.raises(Exception, match="no respondió"):
+        snapshot.build_snapshot(db_class(), 'p')
+    assert snapshot.load_snapshot(os.path.join(str(tmp_path), snapshot.SNAPSHOT_FILE))['nemesis']
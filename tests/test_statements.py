@@ -0,0 +1,101 @@
+import itertools
+from collections import OrderedDict
+
+import psycopg2.errors
+import pytest
+
+import database
+from database import MatchDatabase
+
+
+class FakeConnection:
+    """Lo que _execute usa de StatementConnection, sin servidor."""
+
+    def __init__(self):
+        self.statements = OrderedDict()
+        self.statement_ids = itertools.count(1)
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    """Guarda el SQL recibido; puede fallar el EXECUTE como un plan cacheado que cambió de tipo."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+        self.fail_execute = False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if self.fail_execute and sql.startswith('EXECUTE'):
+            self.fail_execute = False
+            raise psycopg2.errors.FeatureNotSupported("cached plan must not change result type")
+
+
+@pytest.fixture
+def db():
+    return MatchDatabase.__new__(MatchDatabase)  # _execute no necesita conexión propia
+
+
+@pytest.fixture
+def cursor():
+    return FakeCursor(FakeConnection())
+
+
+def test_prepares_once_with_positional_params(db, cursor):
+    query = "SELECT * FROM matches WHERE champion = %s AND date > %s"
+    db._execute(cursor, query, ('Jax', '2025-03-01'))
+    db._execute(cursor, query, ('Fiora', '2025-03-02'))
+
+    assert cursor.executed == [
+        ("PREPARE lol_stmt_1 AS SELECT * FROM matches WHERE champion = $1 AND date > $2", None),
+        ("EXECUTE lol_stmt_1 (%s, %s)", ('Jax', '2025-03-01')),
+        ("EXECUTE lol_stmt_1 (%s, %s)", ('Fiora', '2025-03-02')),
+    ]
+    assert dict(cursor.connection.statements) == {query: 'lol_stmt_1'}
+
+
+def test_without_params(db, cursor):
+    db._execute(cursor, "SELECT patch FROM patch_windows")
+    assert cursor.executed[-1] == ("EXECUTE lol_stmt_1", None)
+
+
+def test_each_connection_has_its_own_statements(db, cursor):
+    other = FakeCursor(FakeConnection())
+    db._execute(cursor, "SELECT 1")
+    db._execute(other, "SELECT 1")
+    assert other.executed[0][0] == "PREPARE lol_stmt_1 AS SELECT 1"
+
+
+def test_lru_eviction_deallocates(db, cursor, monkeypatch):
+    monkeypatch.setattr(database, 'STATEMENT_CACHE_SIZE', 2)
+    db._execute(cursor, "SELECT 1")
+    db._execute(cursor, "SELECT 2")
+    db._execute(cursor, "SELECT 1")  # Ahora la menos usada es 'SELECT 2'
+    cursor.executed.clear()
+
+    db._execute(cursor, "SELECT 3")
+    assert [sql for sql, _ in cursor.executed] == ["DEALLOCATE lol_stmt_2", "PREPARE lol_stmt_3 AS SELECT 3",
+                                                   "EXECUTE lol_stmt_3"]
+    assert list(cursor.connection.statements.values()) == ['lol_stmt_1', 'lol_stmt_3']
+
+
+def test_changed_result_type_rolls_back_and_prepares_again(db, cursor):
+    query = "SELECT * FROM matches WHERE game_id = %s"
+    db._execute(cursor, query, ('EUW1_1',))
+    cursor.fail_execute = True
+    with pytest.raises(psycopg2.errors.FeatureNotSupported):
+        db._execute(cursor, query, ('EUW1_1',))
+
+    # Transacción abortada: rollback antes de liberar el nombre en el servidor
+    assert cursor.connection.rollbacks == 1
+    assert cursor.executed[-1] == ("DEALLOCATE lol_stmt_1", None)
+    assert query not in cursor.connection.statements
+
+    cursor.executed.clear()
+    db._execute(cursor, query, ('EUW1_1',))
+    assert [sql for sql, _ in cursor.executed] == ["PREPARE lol_stmt_2 AS SELECT * FROM matches WHERE game_id = $1",
+                                                   "EXECUTE lol_stmt_2 (%s)"]